@@ -11,6 +11,7 @@ from harvest.definitions import Account, RuntimeData, OptionData, ChainInfo, Cha
 
 if TYPE_CHECKING:
     from harvest.client import Client
+    from harvest.storage._base import LocalAlgorithmStorage
 from harvest.enum import Interval
 from harvest.plugin._base import Plugin
 from harvest.util.date import convert_input_to_datetime, datetime_utc_to_local, pandas_timestamp_to_local
@@ -43,6 +44,7 @@ class Algorithm:
     stats: RuntimeData  # Stats object
     account: Account  # Account object
     trader: BrokerHub | None = None  # Reference to the owning trader (set externally)
+    storage: "LocalAlgorithmStorage | None" = None  # Transactions and performance of this algorithm, flushed every tick
 
     def __init__(self, watch_list: list[str], interval: Interval, aggregations: list[Interval]):
         self.interval = interval
@@ -618,6 +620,22 @@ class Algorithm:
         df_with_timezone = pandas_timestamp_to_local(df, self.stats.broker_timezone)
         return TickerFrame(df_with_timezone)
 
+    def get_late_symbols(self, interval=None) -> list[str]:
+        """Returns the symbols whose latest candle was late on the last tick.
+
+        The broker retries symbols whose latest candle is not available yet until a
+        deadline, then runs the algorithms with the candles it has. The latest stored
+        candle of a late symbol is from an earlier interval, while a symbol that has no
+        candles at all is simply missing from the price history.
+
+        :param str? interval: Interval of the candles. defaults to the interval of the algorithm
+        :returns: A list of symbols
+        """
+        interval_enum = self.interval
+        if interval is not None:
+            interval_enum = interval_string_to_enum(interval) if isinstance(interval, str) else interval
+        return list(self.client.broker.late_symbols.get(interval_enum, []))
+
     def get_asset_profit_percent(self, symbol: str | None = None) -> float | None:
         """Returns the return of a specified asset.
 
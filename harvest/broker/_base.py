@@ -1,15 +1,24 @@
 # Standard library imports
 import datetime as dt
+import heapq
+import itertools
+import random
+import threading
 import time
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor, wait
 from os.path import exists
 from typing import Any, Callable, Dict
+from urllib.parse import urlparse
 
 # Third-party imports
 import pandas as pd
+import requests
 import yaml
+from requests.adapters import HTTPAdapter
 
 # Local imports
+from harvest.broker.rate_limit import RateLimiter, RequestPriority, parse_retry_after
 from harvest.definitions import (
     Account,
     ChainData,
@@ -36,6 +45,25 @@ from harvest.util.helper import (
     utc_current_time,
 )
 
+# Guards the creation of the HTTP session and rate limiter of each broker
+_http_session_lock = threading.Lock()
+# Monotonic time by which the requests of the current thread must be sent. Set while
+# tick() fetches the latest candles, so requests never wait on a quota past its deadline.
+_request_deadline = threading.local()
+
+
+def _make_http_session(pool_size: int) -> requests.Session:
+    """
+    Creates an HTTP session that keeps up to `pool_size` connections per host alive,
+    and asks servers to compress responses.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+    return session
+
 
 class Broker:
     """
@@ -53,11 +81,33 @@ class Broker:
         Interval.HR_1,
         Interval.DAY_1,
     ]
+    # Request quotas of the API by endpoint name, as (requests, seconds). Requests sent
+    # through http_get with a listed endpoint are scheduled to stay within its quota.
+    rate_limits: dict[str, tuple[int, float]] = {}
 
     # Name of the exchange this API trades on
     exchange = ""
     # List of attributes that are required to be in the secret file, e.g. 'api_key'
     req_keys = []
+    # Maximum number of fetch_latest_price calls fetch_latest_prices makes at the same time.
+    # Set to 1 if the API client cannot be called from several threads.
+    max_fetch_workers = 8
+    # Seconds tick() waits before re-fetching a candle that is not up to date yet.
+    # The wait doubles on every attempt of the same symbol, up to retry_max_delay.
+    retry_base_delay = 0.5
+    retry_max_delay = 10.0
+    # Number of times tick() fetches a symbol before it stops waiting for its latest candle
+    retry_max_attempts = 8
+    # Fraction of the shortest due interval tick() may spend before it sends the
+    # candles it has, leaving out the symbols whose latest candle is still missing
+    tick_deadline_ratio = 0.5
+    # Number of connections per host the HTTP session keeps alive. None uses
+    # max_fetch_workers, so concurrent requests never wait for or drop a connection.
+    http_pool_size: int | None = None
+    # Seconds HTTP requests wait to connect, and then for the response
+    http_timeout = (5.0, 30.0)
+    # Number of times http_get resends a request the server answered with 429 Too Many Requests
+    http_max_retries = 3
 
     def __init__(self, secret_path: str | None = None) -> None:
         """
@@ -79,6 +129,8 @@ class Broker:
 
         self.secret_path = secret_path
         self.watch_dict = {}
+        # Symbols of each interval whose latest candle was still missing at the deadline of the last tick
+        self.late_symbols: dict[Interval, list[str]] = {}
 
     def setup(self, runtime_data: RuntimeData) -> None:
         """
@@ -249,8 +301,10 @@ class Broker:
             raise Exception(f"Unsupported interval {lowest_interval}.")
 
         while self.continue_polling():
+            started = time.monotonic()
             self.tick()
-            time.sleep(poll_seconds)
+            # Retries may take up to the tick deadline, so sleep only for the rest of the interval
+            time.sleep(max(0.0, poll_seconds - (time.monotonic() - started)))
 
     def check_if_latest_candle(self, interval: Interval, candle: TickerCandle) -> bool:
         """
@@ -283,36 +337,171 @@ class Broker:
         timestamp should be an offset-aware datetime object in UTC timezone.
 
         The dictionary should be passed to the trader by calling `self.step_callback()`
+
+        Symbols whose latest candle is not available yet are re-fetched with exponential
+        backoff, up to `retry_max_attempts` times. Once every symbol is fetched or out of
+        attempts, or `tick_deadline_ratio` of the shortest due interval has passed, the
+        candles fetched so far are passed on, and the symbols still missing are listed in
+        `self.late_symbols`.
         """
+        started = time.monotonic()
         df_dict = {}
-        retry_queue = []
+        due = []
         for interval, symbols in self.watch_dict.items():
-            interval_delta = interval_to_timedelta(interval)
             if not check_interval(self.stats.utc_timestamp, interval):
                 continue
             df_dict[interval] = {}
-            for symbol in symbols:
-                candle = self.fetch_latest_price(symbol, interval)
-                if not self.check_if_latest_candle(interval, candle):
-                    retry_queue.append((symbol, interval, self.stats.utc_timestamp - interval_delta))
-                    continue
-                df_dict[interval][symbol] = candle
-
-        retries = 5
-        while retry_queue and retries > 0:
-            symbol, interval, timestamp = retry_queue.pop(0)
-            candle = self.fetch_latest_price(symbol, interval)
-            if self.check_if_latest_candle(interval, candle):
-                df_dict[interval][symbol] = candle
-            else:
-                retry_queue.append((symbol, interval, timestamp))
-                retries -= 1
+            due.extend((symbol, interval) for symbol in symbols)
+        if not due:
+            self.late_symbols = {}
+            self.step_callback(df_dict)
+            return
+
+        shortest = min(interval for _, interval in due)
+        deadline = started + interval_to_timedelta(shortest).total_seconds() * self.tick_deadline_ratio
+
+        # Min-heap of (time of next attempt, order, symbol, interval, attempts made)
+        queue = [(started, order, symbol, interval, 0) for order, (symbol, interval) in enumerate(due)]
+        # (order, symbol, interval) of the symbols that ran out of attempts
+        given_up = []
+        while queue:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if queue[0][0] > now:
+                time.sleep(min(queue[0][0], deadline) - now)
+                continue
+
+            batch = {}
+            while queue and queue[0][0] <= now:
+                entry = heapq.heappop(queue)
+                batch.setdefault(entry[3], []).append(entry)
+            candles = {}
+            _request_deadline.value = deadline
+            try:
+                for interval, entries in batch.items():
+                    try:
+                        candles[interval] = self.fetch_latest_prices([entry[2] for entry in entries], interval)
+                    except Exception as e:
+                        debugger.warning(f"Failed to fetch the latest {interval} candles: {e!r}")
+                        candles[interval] = {}
+            finally:
+                _request_deadline.value = None
+
+            now = time.monotonic()
+            for _, order, symbol, interval, attempts in itertools.chain.from_iterable(batch.values()):
+                candle = candles[interval].get(symbol)
+                if candle is not None and self.check_if_latest_candle(interval, candle):
+                    df_dict[interval][symbol] = candle
+                elif attempts + 1 >= self.retry_max_attempts:
+                    given_up.append((order, symbol, interval))
+                else:
+                    heapq.heappush(queue, (now + self._retry_delay(attempts), order, symbol, interval, attempts + 1))
+
+        late_symbols = {}
+        for _, symbol, interval in sorted(given_up + [entry[1:4] for entry in queue]):
+            late_symbols.setdefault(interval, []).append(symbol)
+        if late_symbols:
+            debugger.warning(
+                "Latest candles still missing at the tick deadline: "
+                + ", ".join(f"{interval}: {symbols}" for interval, symbols in late_symbols.items())
+            )
+        self.late_symbols = late_symbols
         self.step_callback(df_dict)
 
+    def _retry_delay(self, attempts: int) -> float:
+        """
+        Returns the seconds to wait before the next attempt of a symbol that was
+        fetched `attempts + 1` times. The delay grows exponentially, and is drawn
+        from its upper half so symbols that failed together do not retry together.
+        """
+        delay = min(self.retry_max_delay, self.retry_base_delay * 2**attempts)
+        return random.uniform(delay / 2, delay)
+
+    @property
+    def http_session(self) -> requests.Session:
+        """
+        Pooled HTTP session of the broker, created on first use.
+
+        REST brokers should send their requests through it (see `http_get`) instead of
+        the module-level `requests` functions, so connections are kept alive and a
+        request to a host that was already contacted costs only its round trip, not a
+        new TCP and TLS handshake. The session is replaced when `http_pool_size` or
+        `max_fetch_workers` changes, so its pool always matches the current concurrency.
+        """
+        pool_size = self.http_pool_size or self.max_fetch_workers
+        session = self.__dict__.get("_http_session")
+        if session is None or self.__dict__.get("_http_pool_size") != pool_size:
+            with _http_session_lock:
+                session = self.__dict__.get("_http_session")
+                if session is None or self.__dict__.get("_http_pool_size") != pool_size:
+                    if session is not None:
+                        session.close()
+                    session = self._http_session = _make_http_session(pool_size)
+                    self._http_pool_size = pool_size
+        return session
+
+    @property
+    def rate_limiter(self) -> RateLimiter:
+        """
+        Rate limiter enforcing `rate_limits`, created on first use.
+        """
+        limiter = self.__dict__.get("_rate_limiter")
+        if limiter is None:
+            with _http_session_lock:
+                limiter = self.__dict__.get("_rate_limiter")
+                if limiter is None:
+                    limiter = self._rate_limiter = RateLimiter(self.rate_limits)
+        return limiter
+
+    def http_get(
+        self,
+        url: str,
+        params: dict | None = None,
+        headers: dict | None = None,
+        endpoint: str | None = None,
+        priority: RequestPriority = RequestPriority.DEFAULT,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Sends a GET request through the broker's HTTP session, with `http_timeout`
+        unless a timeout is given.
+
+        If `endpoint` is listed in `rate_limits`, the request waits until the quota allows
+        it, behind the waiting requests of a higher priority. A 429 response pauses the
+        endpoint, or the host if no endpoint is given, for the time its Retry-After
+        header asks, and the request is sent again up to `http_max_retries` times.
+        During tick(), a request the quota would hold past the tick deadline raises
+        RateLimitTimeout instead of waiting.
+
+        :param endpoint: Name of the endpoint in `rate_limits` the request counts against.
+        :param priority: RequestPriority.LATEST for the bars of the current tick,
+            RequestPriority.BACKFILL for price history that is not needed right away.
+        """
+        kwargs.setdefault("timeout", self.http_timeout)
+        endpoint = endpoint or urlparse(url).netloc
+        deadline = getattr(_request_deadline, "value", None)
+        for attempt in range(self.http_max_retries + 1):
+            self.rate_limiter.acquire(endpoint, priority, None if deadline is None else deadline - time.monotonic())
+            response = self.http_session.get(url, params=params, headers=headers, **kwargs)
+            if response.status_code != 429 or attempt == self.http_max_retries:
+                return response
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is None:
+                retry_after = 2.0**attempt
+            debugger.warning(f"Rate limited by {endpoint}, retrying in {retry_after:.1f} seconds")
+            self.rate_limiter.pause(endpoint, retry_after)
+        return response
+
     def exit(self) -> None:
         """
         Exit the broker.
         """
+        session = self.__dict__.pop("_http_session", None)
+        self.__dict__.pop("_http_pool_size", None)
+        if session is not None:
+            session.close()
         debugger.debug(f"{type(self).__name__} exited")
 
     @abstractmethod
@@ -370,6 +559,53 @@ class Broker:
         """
         pass
 
+    def fetch_latest_prices(self, symbols: list[str], interval: Interval) -> dict[str, TickerCandle]:
+        """
+        Fetches the latest price of each of the specified assets.
+
+        The default implementation calls fetch_latest_price for each symbol, sending up to
+        `max_fetch_workers` requests at the same time. When called by tick(), the fetches
+        that have not finished by the tick deadline are cancelled and their symbols left
+        out. Brokers whose API returns the bars of several symbols in one request should
+        override this method.
+
+        :param symbols: The stocks/cryptos to get data for. Note options are not supported.
+        :param interval: The interval of the candles.
+        :returns: A dictionary mapping each symbol to its latest candle. Symbols whose
+            candle could not be fetched are left out.
+        """
+
+        deadline = getattr(_request_deadline, "value", None)
+
+        def fetch(symbol: str) -> TickerCandle | None:
+            # Worker threads send their requests within the deadline of the calling thread
+            _request_deadline.value = deadline
+            try:
+                return self.fetch_latest_price(symbol, interval)
+            except Exception as e:
+                debugger.warning(f"Failed to fetch the latest {interval} candle of {symbol}: {e!r}")
+                return None
+            finally:
+                _request_deadline.value = None
+
+        workers = min(self.max_fetch_workers, len(symbols))
+        if workers <= 1:
+            candles = {}
+            for symbol in symbols:
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                candles[symbol] = fetch(symbol)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="broker-fetch")
+            futures = {symbol: executor.submit(fetch, symbol) for symbol in symbols}
+            wait(futures.values(), timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+            # Requests still in flight are left to finish in the background, and their results dropped
+            executor.shutdown(wait=False, cancel_futures=True)
+            candles = {
+                symbol: future.result() for symbol, future in futures.items() if future.done() and not future.cancelled()
+            }
+        return {symbol: candle for symbol, candle in candles.items() if candle is not None}
+
     @abstractmethod
     def fetch_chain_info(self, symbol: str) -> ChainInfo:
         """
@@ -772,7 +1008,8 @@ class Broker:
     def current_timestamp(self) -> dt.datetime:
         return utc_current_time()
 
-    def _exception_handler(self, func: Callable) -> Callable:
+    @staticmethod
+    def _exception_handler(func: Callable) -> Callable:
         """
         Wrapper to handle unexpected errors in the wrapped function.
         Most functions should be wrapped with this to properly handle errors, such as
@@ -9,10 +9,11 @@ from alpaca_trade_api.entity import Bar
 from alpaca_trade_api.rest import REST, URL, TimeFrame
 
 from harvest.broker._base import Broker, StreamBroker
-from harvest.definitions import Account, Interval, Stats
+from harvest.definitions import Account, Stats, TickerCandle
+from harvest.enum import Interval
+from harvest.util.date import convert_input_to_datetime
 from harvest.util.helper import (
     aggregate_df,
-    convert_input_to_datetime,
     debugger,
     expand_interval,
     is_crypto,
@@ -122,6 +123,48 @@ class AlpacaBroker(StreamBroker):
 
         return self._get_data_from_alpaca(symbol, interval, start, end)
 
+    def fetch_latest_price(self, symbol: str, interval: Interval) -> TickerCandle:
+        end = utc_current_time()
+        # Daily bars need a window that reaches back over weekends and holidays
+        start = end - dt.timedelta(days=7 if interval == Interval.DAY_1 else 3)
+        df = self._get_data_from_alpaca(symbol, interval, start, end)
+        if df.empty:
+            raise Exception(f"Failed to fetch the latest price of {symbol}.")
+        row = df[symbol].iloc[-1]
+        return TickerCandle(
+            df.index[-1].to_pydatetime(), symbol, row["open"], row["high"], row["low"], row["close"], row["volume"]
+        )
+
+    def fetch_latest_prices(self, symbols: List[str], interval: Interval) -> Dict[str, TickerCandle]:
+        """
+        The latest minute bars of all stocks are fetched with one multi-symbol request.
+        The latest bars endpoint only serves minute bars, so other intervals and cryptos
+        fall back to one request per symbol.
+        """
+        if interval != Interval.MIN_1:
+            return super().fetch_latest_prices(symbols, interval)
+
+        stocks = [symbol for symbol in symbols if not is_crypto(symbol)]
+        cryptos = [symbol for symbol in symbols if is_crypto(symbol)]
+
+        candles = super().fetch_latest_prices(cryptos, interval) if cryptos else {}
+        if not stocks:
+            return candles
+
+        bars = self.api.get_latest_bars(stocks, feed="iex" if self.basic else "sip")
+        for symbol, bar in bars.items():
+            bar = bar.__dict__["_raw"]
+            candles[symbol] = TickerCandle(
+                pd.Timestamp(bar["t"]).tz_convert(dt.timezone.utc).to_pydatetime(),
+                symbol,
+                bar["o"],
+                bar["h"],
+                bar["l"],
+                bar["c"],
+                bar["v"],
+            )
+        return candles
+
     @Broker._exception_handler
     def fetch_chain_info(self, symbol: str) -> None:
         raise NotImplementedError("Alpaca does not support options.")
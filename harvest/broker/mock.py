@@ -2,7 +2,7 @@ import datetime as dt
 import itertools
 import time
 import uuid
-from typing import Callable, Dict
+from typing import Callable, Dict, List
 from zoneinfo import ZoneInfo
 
 import numpy as np
@@ -75,6 +75,7 @@ class MockBroker(Broker):
 
         # Set a default poll interval in case `setup` is not called.
         self.poll_interval = Interval.MIN_1
+        self.late_symbols: Dict[Interval, List[str]] = {}
 
         self.stats = RuntimeData(broker_timezone=ZoneInfo("UTC"), utc_timestamp=self.current_time)
 
@@ -6,7 +6,7 @@ from pathlib import Path
 from typing import Any, Callable, Dict, List, Union
 
 from harvest.broker._base import Broker
-from harvest.definitions import OPTION_QTY_MULTIPLIER, Account, Stats
+from harvest.definitions import OPTION_QTY_MULTIPLIER, Account, RuntimeData, Stats
 from harvest.enum import DataBrokerType, Interval
 from harvest.storage import Storage
 from harvest.util.factory import load_broker
@@ -140,9 +140,25 @@ class PaperBroker(Broker):
         super().setup(stats, account, trader_main)
         self.backtest = False
 
-    def setup_backtest(self, storage: Storage) -> None:
+    def setup_backtest(self, storage: Storage, stats: RuntimeData | None = None) -> None:
+        """
+        Fills orders at the prices in `storage` as of the simulation clock, stats.utc_timestamp,
+        instead of asking the data broker.
+        """
         self.backtest = True
         self.storage = storage
+        self.price_view = storage.as_of(stats)
+
+    def _backtest_price(self, symbol: str) -> float:
+        """
+        Returns the close of the latest bar of `symbol` that closed by the simulation clock,
+        from the finest interval that has one.
+        """
+        for interval in self.interval_list:
+            df = self.price_view.get_price_history(symbol, interval).df
+            if not df.is_empty():
+                return df["close"][-1]
+        raise ValueError(f"No price history of {symbol} before {self.price_view.now}")
 
     # -------------- Streamer methods -------------- #
 
@@ -181,7 +197,7 @@ class PaperBroker(Broker):
         debugger.debug(f"Backtest: {self.backtest}")
 
         if self.backtest:
-            price = self.storage.load(sym, self.stats.watchlist_cfg[sym]["interval"])[sym]["close"][-1]
+            price = self._backtest_price(sym)
         else:
             price = self.data_broker_ref.fetch_price_history(
                 sym,
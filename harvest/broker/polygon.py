@@ -1,16 +1,17 @@
 import datetime
 import datetime as dt
 import re
-from typing import Any, Dict, Union
+from typing import Any, Dict, List, Union
 from zoneinfo import ZoneInfo
 
 import pandas as pd
-import requests
 
 from harvest.broker._base import Broker
+from harvest.broker.rate_limit import RequestPriority
+from harvest.definitions import TickerCandle
 from harvest.enum import Interval
+from harvest.util.date import convert_input_to_datetime
 from harvest.util.helper import (
-    convert_input_to_datetime,
     debugger,
     expand_interval,
     is_crypto,
@@ -21,7 +22,12 @@ from harvest.util.helper import (
 
 class PolygonBroker(Broker):
     interval_list = [Interval.MIN_1, Interval.MIN_5, Interval.HR_1, Interval.DAY_1]
+    # Paid plans have no request quota. The basic plan allows 5 requests a minute to the whole API.
+    rate_limits = {}
+    basic_rate_limits = {"api": (5, 60.0)}
     req_keys = ["polygon_api_key"]
+    # Number of sessions to step back through when the grouped daily bars of a date are empty
+    grouped_lookback_sessions = 4
 
     def __init__(self, path: str = None, is_basic_account: bool = False) -> None:
         super().__init__(path)
@@ -30,23 +36,26 @@ class PolygonBroker(Broker):
             raise Exception(f"Account credentials not found! Expected file path: {path}")
 
         self.basic = is_basic_account
+        if self.basic:
+            self.rate_limits = self.basic_rate_limits
         self.option_cache = {}
 
     def step(self) -> None:
         df_dict = {}
         combo = self.stats.watchlist_cfg.keys()
         if self.basic and len(combo) > 5:
-            debugger.error(
-                "Basic accounts only allow for 5 API calls per minute, trying to get data for more than 5 assets! Aborting."
+            debugger.warning(
+                "Basic accounts only allow for 5 API calls per minute. The data of some assets will arrive later in the minute."
             )
-            return
 
         for s in combo:
-            df = self.fetch_price_history(
+            df = self._get_data_from_polygon(
                 s,
-                Interval.MIN_1,
+                1,
+                "MIN",
                 utc_current_time() - dt.timedelta(days=3),
                 utc_current_time(),
+                RequestPriority.LATEST,
             ).iloc[[-1]]
             df_dict[s] = df
             debugger.debug(df)
@@ -54,6 +63,7 @@ class PolygonBroker(Broker):
 
     def exit(self) -> None:
         self.option_cache = {}
+        super().exit()
 
     # -------------- Streamer methods -------------- #
 
@@ -61,7 +71,7 @@ class PolygonBroker(Broker):
     def get_current_time(self) -> dt.datetime:
         key = self.config["polygon_api_key"]
         request = f"https://api.polygon.io/v1/marketstatus/now?apiKey={key}"
-        server_time = requests.get(request).json().get("serverTime")
+        server_time = self.http_get(request, endpoint="api").json().get("serverTime")
         return dt.datetime.fromisoformat(server_time)
 
     @Broker._exception_handler
@@ -88,6 +98,66 @@ class PolygonBroker(Broker):
         val, unit = expand_interval(interval)
         return self._get_data_from_polygon(symbol, val, unit, start, end)
 
+    def fetch_latest_price(self, symbol: str, interval: Interval) -> TickerCandle:
+        val, unit = expand_interval(interval)
+        end = utc_current_time()
+        df = self._get_data_from_polygon(symbol, val, unit, end - dt.timedelta(days=3), end, RequestPriority.LATEST)
+        if df.empty:
+            raise Exception(f"Failed to fetch the latest price of {symbol}.")
+        row = df[symbol].iloc[-1]
+        return TickerCandle(
+            df.index[-1].to_pydatetime(), symbol, row["open"], row["high"], row["low"], row["close"], row["volume"]
+        )
+
+    def fetch_latest_prices(self, symbols: List[str], interval: Interval) -> Dict[str, TickerCandle]:
+        """
+        Daily bars are read from the grouped daily aggregates, which return the bars of
+        every ticker in a market with one request per market. Other intervals fall back
+        to one request per symbol.
+        """
+        if interval != Interval.DAY_1:
+            return super().fetch_latest_prices(symbols, interval)
+
+        now = utc_current_time()
+        key = self.config["polygon_api_key"]
+        markets = {}
+        for symbol in symbols:
+            if is_crypto(symbol):
+                markets.setdefault("global/market/crypto", {})["X:" + symbol[1:] + "USD"] = symbol
+            else:
+                markets.setdefault("us/market/stocks", {})[symbol] = symbol
+
+        candles = {}
+        for market, tickers in markets.items():
+            crypto = market == "global/market/crypto"
+            date = _last_session_date(now, crypto)
+            # Market holidays have no bars, so step back to the session before them
+            for _ in range(self.grouped_lookback_sessions):
+                request = (
+                    f"https://api.polygon.io/v2/aggs/grouped/locale/{ market }/{ date.isoformat() }"
+                    f"?adjusted=true&apiKey={ key }"
+                )
+                response = self._handle_request_response(request, RequestPriority.LATEST)
+                if response != []:
+                    break
+                date = _last_session_date(dt.datetime.combine(date, dt.time(), tzinfo=dt.timezone.utc), crypto)
+            if not response:
+                continue
+            for bar in response:
+                symbol = tickers.get(bar["T"])
+                if symbol is None:
+                    continue
+                candles[symbol] = TickerCandle(
+                    dt.datetime.fromtimestamp(bar["t"] / 1000, tz=dt.timezone.utc),
+                    symbol,
+                    bar["o"],
+                    bar["h"],
+                    bar["l"],
+                    bar["c"],
+                    bar["v"],
+                )
+        return candles
+
     @Broker._exception_handler
     def fetch_chain_info(self, symbol: str) -> Dict[str, Any]:
         key = self.config["polygon_api_key"]
@@ -160,7 +230,7 @@ class PolygonBroker(Broker):
         # Polygon does not support getting market hours,
         # so use the free Tradier API instead.
         # See documentation.tradier.com/brokerage-api/markets/get-clock
-        response = requests.get(
+        response = self.http_get(
             "https://api.tradier.com/v1/markets/clock",
             params={"delayed": "false"},
             headers={"Authorization": "123", "Accept": "application/json"},
@@ -248,6 +318,7 @@ class PolygonBroker(Broker):
         timespan: str,
         start: dt.datetime,
         end: dt.datetime,
+        priority: RequestPriority = RequestPriority.BACKFILL,
     ) -> pd.DataFrame:
         if self.basic and start < utc_current_time() - dt.timedelta(days=365 * 2):
             debugger.warning(
@@ -269,7 +340,7 @@ class PolygonBroker(Broker):
             temp_symbol = "X:" + temp_symbol[1:] + "USD"
 
         request = f"https://api.polygon.io/v2/aggs/ticker/{ temp_symbol }/range/{ multiplier }/{ timespan }/{ start_str }/{ end_str }?adjusted=true&sort=asc&apiKey={ key }"
-        response = self._handle_request_response(request)
+        response = self._handle_request_response(request, priority)
 
         if response is None:
             debugger.error("Request error! Returning empty dataframe.")
@@ -300,10 +371,29 @@ class PolygonBroker(Broker):
 
         return df.dropna()
 
-    def _handle_request_response(self, request: str) -> Dict[str, Any]:
-        response = requests.get(request).json()
+    def _handle_request_response(
+        self, request: str, priority: RequestPriority = RequestPriority.DEFAULT
+    ) -> Dict[str, Any]:
+        response = self.http_get(request, endpoint="api", priority=priority).json()
         if response["status"] == "OK":
-            return response["results"]
+            return response.get("results", [])
         message = response["message"]
         debugger.error(f"Request Error!\nRequest: {request}\nResponse: {message}")
         return None
+
+
+def _last_session_date(now: dt.datetime, crypto: bool) -> dt.date:
+    """
+    Returns the date of the most recent daily bar that is complete at `now`.
+    Crypto days end at midnight UTC. Stock sessions run on weekdays and close at 16:00 in New York.
+    Market holidays are not known here.
+    """
+    if crypto:
+        return now.astimezone(dt.timezone.utc).date() - dt.timedelta(days=1)
+    local = now.astimezone(ZoneInfo("America/New_York"))
+    date = local.date()
+    if local.time() < dt.time(16):
+        date -= dt.timedelta(days=1)
+    while date.weekday() >= 5:
+        date -= dt.timedelta(days=1)
+    return date
@@ -0,0 +1,195 @@
+import email.utils
+import heapq
+import itertools
+import threading
+import time
+from enum import IntEnum
+
+"""
+This module provides the rate limiter brokers use to stay within the request quotas
+of their APIs.
+
+A broker declares its quotas in its `rate_limits` class attribute, as a mapping from
+an endpoint name to (requests, seconds). Each endpoint gets a token bucket that holds
+up to `requests` tokens and refills at `requests / seconds` tokens per second, so a
+burst of up to `requests` calls is sent at once and later calls are spread over the
+period. Endpoints that are not declared are not limited.
+
+Requests waiting for the same endpoint are served by priority: the latest bars of a
+tick before ordinary calls, and ordinary calls before backfills of price history.
+Requests of the same priority are served in the order they were made.
+
+When a server answers 429 Too Many Requests, the endpoint is paused for the time the
+Retry-After header asks for, whether or not it has a declared quota.
+
+A request may be given a timeout, such as the time left before the deadline of a tick.
+If the quota does not allow it to be sent in time, it fails with RateLimitTimeout
+instead of waiting past the timeout.
+"""
+
+
+class RequestPriority(IntEnum):
+    """
+    Order in which requests waiting for the same endpoint are sent. Lower goes first.
+    """
+
+    LATEST = 0
+    DEFAULT = 1
+    BACKFILL = 2
+
+
+class RateLimitTimeout(TimeoutError):
+    """
+    Raised when a request could not be sent within its timeout without exceeding the quota.
+    """
+
+
+class TokenBucket:
+    """
+    Token bucket allowing `requests` calls per `seconds`.
+
+    Not thread-safe on its own; RateLimiter calls it under its lock.
+    """
+
+    def __init__(self, requests: int, seconds: float) -> None:
+        self.capacity = float(requests)
+        self.refill_rate = requests / seconds
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """
+        Returns the seconds until a token is available, 0 if one is available now.
+        """
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.refill_rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def drain(self, now: float) -> None:
+        """
+        Empties the bucket, after the server reported that the quota is used up.
+        """
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Returns the seconds a Retry-After header asks to wait, given either as a number of
+    seconds or as an HTTP date. Returns None if the header is missing or malformed.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - time.time())
+
+
+class RateLimiter:
+    """
+    Schedules the requests of a broker within the quotas of its endpoints.
+    Safe to call from several threads.
+    """
+
+    def __init__(self, rate_limits: dict[str, tuple[int, float]]) -> None:
+        """
+        Args:
+            rate_limits: Quota of each endpoint, as (requests, seconds)
+        """
+        self.buckets = {endpoint: TokenBucket(requests, seconds) for endpoint, (requests, seconds) in rate_limits.items()}
+        self._condition = threading.Condition()
+        # Monotonic time until which each endpoint is paused by a 429 response
+        self._paused_until: dict[str, float] = {}
+        # Min-heap of the (priority, order) of the requests waiting for each endpoint
+        self._waiting: dict[str, list[tuple[int, int]]] = {}
+        self._order = itertools.count()
+
+    def _delay(self, endpoint: str, now: float) -> float:
+        delay = self._paused_until.get(endpoint, now) - now
+        bucket = self.buckets.get(endpoint)
+        if bucket is not None:
+            delay = max(delay, bucket.delay(now))
+        return delay
+
+    def acquire(
+        self, endpoint: str, priority: RequestPriority = RequestPriority.DEFAULT, timeout: float | None = None
+    ) -> float:
+        """
+        Blocks until a request to `endpoint` may be sent, and uses up one request of its
+        quota. Requests waiting for the same endpoint are let through by priority.
+
+        Args:
+            endpoint: Name of the endpoint in the quotas, or the host of the request
+            priority: Priority of the request among the ones waiting for the endpoint
+            timeout: Seconds the call may wait. None waits as long as the quota requires.
+
+        Returns:
+            float: Seconds the call waited
+
+        Raises:
+            RateLimitTimeout: If the request could not be sent within `timeout`. The call
+                fails as soon as the quota shows it would have to wait longer.
+        """
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        with self._condition:
+            if endpoint not in self.buckets and endpoint not in self._paused_until:
+                return 0.0
+
+            entry = (int(priority), next(self._order))
+            waiting = self._waiting.setdefault(endpoint, [])
+            heapq.heappush(waiting, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    remaining = None if deadline is None else deadline - now
+                    if waiting[0] != entry:
+                        if remaining is not None and remaining <= 0:
+                            raise RateLimitTimeout(f"Timed out waiting behind other requests to {endpoint}")
+                        self._condition.wait(remaining)
+                        continue
+                    delay = self._delay(endpoint, now)
+                    if delay <= 0:
+                        break
+                    if remaining is not None and delay > remaining:
+                        raise RateLimitTimeout(f"The quota of {endpoint} allows no request for {delay:.1f} seconds")
+                    self._condition.wait(delay)
+
+                bucket = self.buckets.get(endpoint)
+                if bucket is not None:
+                    bucket.take(now)
+                if self._paused_until.get(endpoint, now) <= now:
+                    self._paused_until.pop(endpoint, None)
+            finally:
+                waiting.remove(entry)
+                heapq.heapify(waiting)
+                self._condition.notify_all()
+        return time.monotonic() - started
+
+    def pause(self, endpoint: str, seconds: float) -> None:
+        """
+        Holds back the requests to `endpoint` for `seconds`, and empties its bucket so
+        requests resume at the quota's rate.
+        """
+        with self._condition:
+            now = time.monotonic()
+            self._paused_until[endpoint] = max(self._paused_until.get(endpoint, now), now + seconds)
+            bucket = self.buckets.get(endpoint)
+            if bucket is not None:
+                bucket.drain(now)
+            self._condition.notify_all()
@@ -33,6 +33,8 @@ class RobinhoodBroker(Broker):
     interval_list = [Interval.SEC_15, Interval.MIN_5, Interval.HR_1, Interval.DAY_1]
     exchange = "NASDAQ"
     req_keys = ["robin_username", "robin_password", "robin_mfa"]
+    # robin_stocks keeps its login session in module-level state and is not thread-safe
+    max_fetch_workers = 1
 
     def __init__(self, path=None):
         super().__init__(path)
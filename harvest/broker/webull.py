@@ -14,6 +14,8 @@ class WebullBroker(Broker):
     interval_list = [Interval.MIN_1, Interval.MIN_5, Interval.HR_1, Interval.DAY_1]
     exchange = "NASDAQ"
     req_keys = ["wb_username", "wb_password", "wb_trade_pin"]
+    # The webull client keeps its login session on a single instance and is not thread-safe
+    max_fetch_workers = 1
 
     def __init__(self, path: str = None, paper_trader: bool = False):
         super().__init__(path)
@@ -1,15 +1,14 @@
 import datetime
 import datetime as dt
 import re
-from typing import Any, Callable, Dict, Union
+from typing import Any, Callable, Dict, List, Union
 from zoneinfo import ZoneInfo
 
 import pandas as pd
-import requests
 import yfinance as yf
 
 from harvest.broker._base import Broker
-from harvest.definitions import Account, Stats
+from harvest.definitions import Account, Stats, TickerCandle
 from harvest.enum import Interval
 from harvest.util.date import convert_input_to_datetime, date_to_str, str_to_datetime, utc_current_time, utc_epoch_zero
 from harvest.util.helper import (
@@ -17,6 +16,7 @@ from harvest.util.helper import (
     debugger,
     expand_interval,
     interval_string_to_enum,
+    interval_to_timedelta,
     is_crypto,
 )
 
@@ -66,6 +66,7 @@ class YahooBroker(Broker):
 
     def exit(self) -> None:
         self.option_cache = {}
+        super().exit()
 
     def step(self) -> None:
         df_dict = {}
@@ -182,6 +183,48 @@ class YahooBroker(Broker):
 
         return df
 
+    def fetch_latest_prices(self, symbols: List[str], interval: Interval) -> Dict[str, TickerCandle]:
+        """
+        Downloads the bars of all symbols with a single yf.download call, and returns the
+        last complete bar of each. yfinance also returns the bar that is still forming,
+        which is left out.
+        """
+        tickers = [self.fmt_symbol(symbol) for symbol in symbols]
+        df = yf.download(
+            " ".join(tickers),
+            period="1d",
+            interval=self.fmt_interval(interval),
+            prepost=True,
+            progress=False,
+            group_by="ticker",
+            auto_adjust=False,
+        )
+        debugger.debug(f"From yfinance got: {df}")
+
+        candles = {}
+        if len(df.index) == 0:
+            return candles
+        complete_before = utc_current_time() - interval_to_timedelta(interval)
+        for symbol, ticker in zip(symbols, tickers):
+            if isinstance(df.columns, pd.MultiIndex):
+                if ticker not in df.columns.get_level_values(0):
+                    continue
+                df_tmp = df[ticker]
+            else:
+                df_tmp = df
+            df_tmp = df_tmp.dropna(how="all")
+            if len(df_tmp.index) == 0:
+                continue
+            df_tmp = self._format_df(df_tmp.copy(), symbol)[symbol]
+            df_tmp = df_tmp[df_tmp.index <= complete_before]
+            if len(df_tmp.index) == 0:
+                continue
+            row = df_tmp.iloc[-1]
+            candles[symbol] = TickerCandle(
+                df_tmp.index[-1].to_pydatetime(), symbol, row["open"], row["high"], row["low"], row["close"], row["volume"]
+            )
+        return candles
+
     @Broker._exception_handler
     def fetch_chain_info(self, symbol: str) -> Dict[str, Any]:
         """
@@ -260,7 +303,7 @@ class YahooBroker(Broker):
         if date.date() != utc_current_time().date():
             raise ValueError("Cannot check market hours for a specific date")
 
-        response = requests.get(
+        response = self.http_get(
             "https://api.tradier.com/v1/markets/clock",
             params={"delayed": "false"},
             headers={"Authorization": "123", "Accept": "application/json"},
@@ -1,3 +1,4 @@
+import datetime as dt
 import sys
 from sys import exit
 from typing import Dict, List, Union
@@ -14,12 +15,18 @@ from harvest.definitions import (
     Order,
     Position,
     RuntimeData,
+    TickerCandle,
+    TickerFrame,
 )
 from harvest.enum import BrokerType, DataBrokerType, Interval, StorageType, TradeBrokerType
 from harvest.storage._base import Storage
+from harvest.storage.as_of import AsOfPriceView
+from harvest.trader.trader import BrokerHub
+from harvest.util.date import utc_current_time
 from harvest.util.helper import (
     applicable_intervals_for_time,
     debugger,
+    interval_to_timedelta,
     mark_down,
     mark_up,
     symbol_type,
@@ -44,9 +51,12 @@ class Client:
     stats: RuntimeData
     account: Account | None
     secret_path: str = "./secret.yaml"
+    # Delete transactions the retention engine may run per tick when it has no background thread
+    retention_batches_per_tick: int = 1
 
     _order_queue: List[Order] = []
     _interval_table: dict[Interval, dict[str, dict]] = {}
+    _price_data: dict[Interval, dict[str, TickerFrame]] = {}
 
     def __init__(
         self,
@@ -91,20 +101,45 @@ class Client:
                 interval_table[interval]["algorithms"].append(algorithm)
                 interval_table[interval]["symbols"].update(algorithm.watch_list)
 
+        # Intervals the storage rolls up from 1-minute bars only need 1-minute data from the broker
+        rolled_up = self.storage.rollup.intervals if self.storage.rollup is not None else ()
+        self._rolled_up_intervals: set[Interval] = set()
+
         # Check if the requested intervals are supported by the broker
         for interval, algo_list in interval_table.items():
-            if len(algo_list) and interval not in self.broker.interval_list:
+            if len(algo_list["algorithms"]) and interval not in self.broker.interval_list:
+                if interval in rolled_up and Interval.MIN_1 in self.broker.interval_list:
+                    interval_table[Interval.MIN_1]["symbols"].update(algo_list["symbols"])
+                    self._rolled_up_intervals.add(interval)
+                    continue
                 raise Exception(f"Interval {interval} is not supported by the broker")
 
-        # Remove intervals that are not needed
-        for interval in interval_table.keys():
-            if len(interval_table[interval]["algorithms"]) == 0:
+        # Remove intervals that are not needed. 1-minute bars are kept for the rollup
+        # even when no algorithm runs on them.
+        for interval in list(interval_table.keys()):
+            if len(interval_table[interval]["algorithms"]) == 0 and len(interval_table[interval]["symbols"]) == 0:
                 del interval_table[interval]
 
         self._interval_table = interval_table
+        # Price history read for the algorithms, extended on every tick
+        self._price_data = {}
+        # Set by setup_backtest(), to read the history as of the simulation clock
+        self._price_view: AsOfPriceView | None = None
 
         debugger.debug(f"Interval table: {self._interval_table}")
 
+    @property
+    def watch_dict(self) -> dict[Interval, list[str]]:
+        """
+        Symbols the broker fetches at each interval, in the form Broker.start takes.
+        Intervals the storage rolls up are built from the 1-minute bars instead.
+        """
+        return {
+            interval: sorted(entry["symbols"])
+            for interval, entry in self._interval_table.items()
+            if interval not in self._rolled_up_intervals
+        }
+
     def start(self) -> None:
         """Entry point to start the system."""
         debugger.debug("Setting up Harvest")
@@ -124,7 +159,7 @@ class Client:
             # self.storage.init_performance_data(self.account.equity, self.stats.utc_timestamp)
 
             # Save the historical data
-            # self._storage_init(all_history)
+            self._storage_init()
             self.console.print(f"- [cyan]{self.storage.__class__.__name__}[/cyan] setup complete")
 
             for algorithm in self.algorithm_list:
@@ -280,9 +315,46 @@ class Client:
     #             df = self.data_broker_ref.fetch_price_history(sym, inter, start)
     #             self.storage.store(sym, inter, df)
 
+    def _storage_init(self) -> None:
+        """
+        Loads price history for every symbol and interval in use. Only data newer than
+        what the storage already holds (for example, from a snapshot) is fetched, and
+        series that already hold the most recent closed bar are skipped.
+        """
+        now = utc_current_time()
+        for interval, entry in self._interval_table.items():
+            if interval in self._rolled_up_intervals:
+                # Built by the storage rollup from the 1-minute bars, which are loaded for its symbols too
+                continue
+            for symbol in entry["symbols"]:
+                start = self.storage.get_latest_price_timestamp(symbol, interval)
+                if start is not None:
+                    # Storage holds naive UTC timestamps
+                    start = start.replace(tzinfo=dt.timezone.utc)
+                    # The bar after the stored one has not closed yet
+                    if now < start + 2 * interval_to_timedelta(interval):
+                        continue
+                elif interval in self.storage.price_storage_limit:
+                    start = now - self.storage.price_storage_limit[interval].delta_datetime
+                frame = self.broker.fetch_price_history(symbol, interval, start)
+                if frame is not None and not frame.df.is_empty():
+                    self.storage.bulk_insert_price_history(frame)
+
     # ================== Functions for main routine =====================
 
-    def tick(self, df_dict: Dict[str, pl.DataFrame]) -> None:
+    def setup_backtest(self) -> None:
+        """
+        Runs the algorithms against history already in the storage. Price history is read
+        through an as-of view of the storage (see CentralStorage.as_of), so algorithms and
+        the broker never see bars that had not closed at the simulation clock, stats.utc_timestamp. Each
+        series is read from the storage once; advance the clock and call tick() to step
+        through it.
+        """
+        self._price_view = self.storage.as_of(self.stats)
+        if hasattr(self.broker, "setup_backtest"):
+            self.broker.setup_backtest(self.storage, self.stats)
+
+    def tick(self, df_dict: dict[Interval, dict[str, TickerCandle]]) -> None:
         """
         Main loop of the Trader.
         """
@@ -295,14 +367,8 @@ class Client:
         # self.storage.add_performance_data(self.account.equity, self.stats.timestamp)
         # self.storage.add_calendar_data(self.data_broker_ref.fetch_market_hours(self.stats.timestamp.date()))
 
-        # Save the data locally
-        # for sym in df_dict:
-        #     self.storage.store(sym, self.stats.watchlist_cfg[sym]["interval"], df_dict[sym])
-
-        # Aggregate the data to other intervals
-        # for sym in df_dict:
-        #     for agg in self.stats.watchlist_cfg[sym]["aggregations"]:
-        #         self.storage.aggregate(sym, self.stats.watchlist_cfg[sym]["interval"], agg)
+        # Save the data locally. The storage rollup aggregates the 1-minute bars to other intervals.
+        self._store_price_data(df_dict)
 
         # If an order was processed, fetch the latest position info from the brokerage.
         # Otherwise, calculate current positions locally
@@ -314,10 +380,13 @@ class Client:
 
         # self._print_positions()
         applicable_intervals = applicable_intervals_for_time(self.stats.broker_timestamp)
+        self._prepare_price_data(applicable_intervals)
 
         for interval in applicable_intervals:
-            algorithms = self._interval_table[interval]["algorithms"]
-            for a in algorithms:
+            entry = self._interval_table.get(interval)
+            if entry is None:
+                continue
+            for a in entry["algorithms"]:
                 a.main()
         #     try:
         #         # debugger.info(f"Running algo: {a}")
@@ -335,9 +404,100 @@ class Client:
 
         # self.algo = new_algo
 
+        # Write the rows each algorithm buffered during the tick in one transaction
+        for algorithm in self.algorithm_list:
+            if algorithm.storage is not None:
+                algorithm.storage.flush()
+
+        # Delete expired history after the algorithms have run, off the insert path.
+        # A bounded pass keeps a large backlog from stalling the tick; the rest is deleted on later ticks.
+        if not self.storage.retention.running:
+            self.storage.retention.run_once(max_batches=self.retention_batches_per_tick)
+        self.storage.save_snapshot_if_due()
+
         # self.trade_broker_ref.exit()
         # self.data_broker_ref.exit()
 
+    def _store_price_data(self, df_dict: dict[Interval, dict[str, TickerCandle]]) -> None:
+        """
+        Saves the latest candles the broker fetched on this tick, with one storage write
+        per interval. 1-minute bars also update the storage rollup, which writes the bars
+        of the rolled-up intervals as their buckets close.
+        """
+        for interval, candles in df_dict.items():
+            if not candles:
+                continue
+            frame = pl.DataFrame(
+                [
+                    {
+                        # Storage holds naive UTC timestamps
+                        "timestamp": candle.timestamp.astimezone(dt.timezone.utc).replace(tzinfo=None),
+                        "symbol": candle.symbol,
+                        "interval": str(interval),
+                        "open": candle.open,
+                        "high": candle.high,
+                        "low": candle.low,
+                        "close": candle.close,
+                        "volume": candle.volume,
+                    }
+                    for candle in candles.values()
+                ]
+            )
+            self.storage.bulk_insert_price_history(TickerFrame(frame))
+
+    def _prepare_price_data(self, intervals: List[Interval]) -> None:
+        """
+        Reads the price history that algorithms running at `intervals` use on this tick,
+        with one storage read per interval for all of its symbols. load() serves the
+        algorithms from this data.
+
+        The history read on earlier ticks is kept, and only rows from the last bar seen on
+        (which may have been updated since) are read again, so the read is served by the
+        price cache rather than reaching back into the cold tier on every tick.
+        """
+        for interval in intervals:
+            entry = self._interval_table.get(interval)
+            if entry is None or not entry["algorithms"]:
+                continue
+            if self._price_view is not None:
+                # Slices of the history loaded once, capped at the simulation clock
+                self._price_data[interval] = self._price_view.get_price_history_many(
+                    sorted(entry["symbols"]), interval, as_dict=True
+                )
+                continue
+            previous = self._price_data.get(interval, {})
+            known = sorted(symbol for symbol in entry["symbols"] if symbol in previous)
+            fresh = sorted(entry["symbols"].difference(known))
+
+            frames = {}
+            if fresh:
+                frames |= self.storage.get_price_history_many(fresh, interval, as_dict=True)
+            if known:
+                last_seen = [previous[symbol].df["timestamp"][-1] for symbol in known if len(previous[symbol].df)]
+                start = min(last_seen) if last_seen else None
+                updates = self.storage.get_price_history_many(known, interval, start=start, as_dict=True)
+                for symbol in known:
+                    frames[symbol] = self._append_price_data(interval, previous[symbol], updates[symbol])
+            self._price_data[interval] = frames
+
+    def _append_price_data(self, interval: Interval, frame: TickerFrame, update: TickerFrame) -> TickerFrame:
+        """
+        Replaces the rows of `frame` from the first row of `update` on with `update`, and
+        drops rows the storage no longer keeps.
+        """
+        if update.df.is_empty():
+            return frame
+        if frame.df.is_empty():
+            return update
+        update_df = update.df.cast(frame.df.schema)
+        df = pl.concat([frame.df.filter(pl.col("timestamp") < update_df["timestamp"][0]), update_df])
+
+        limit = self.storage.price_storage_limit.get(interval)
+        if self.storage.cold_storage is None and limit is not None and limit.delta_datetime > dt.timedelta(0):
+            # Without a cold tier, rows past the retention limit are hidden by the storage as well
+            df = df.filter(pl.col("timestamp") > df["timestamp"][-1] - limit.delta_datetime)
+        return TickerFrame(df)
+
     def update_order_queue(self) -> bool:
         """Check to see if outstanding orders have been accepted or rejected
         and update the order queue accordingly.
@@ -447,8 +607,16 @@ class Client:
     def fetch_option_market_data(self, *args, **kwargs):
         return self.data_broker_ref.fetch_option_market_data(*args, **kwargs)
 
-    def load(self, *args, **kwargs):
-        return self.storage.load(*args, **kwargs)
+    def load(self, symbol: str, interval: Interval) -> Dict[str, pl.DataFrame]:
+        """
+        Returns the price history of `symbol` at `interval`, keyed by symbol. Uses the data
+        prepared for the current tick when available.
+        """
+        frame = self._price_data.get(interval, {}).get(symbol)
+        if frame is None:
+            source = self.storage if self._price_view is None else self._price_view
+            frame = source.get_price_history(symbol, interval)
+        return {symbol: frame.df}
 
     def store(self, *args, **kwargs):
         return self.storage.store(*args, **kwargs)
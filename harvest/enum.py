@@ -113,8 +113,7 @@ class BrokerType(EnumList):
 
 class StorageType(EnumList):
     BASE = "base"
-    CSV = "csv"
-    PICKLE = "pickle"
+    FILE = "file"
     DB = "db"
 
 
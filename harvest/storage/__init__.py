@@ -1,5 +1,5 @@
-from harvest.storage._base import Storage, LocalAlgorithmStorage, CentralStorage
+from harvest.storage._base import Storage, LocalAlgorithmStorage, LocalStorageBackend, CentralStorage
+from harvest.storage.async_storage import AsyncCentralStorage, AsyncLocalAlgorithmStorage
+from harvest.storage.file_storage import FileStorage
 # Temporarily commented out due to circular import issues - these need to be updated for new storage architecture
-# from harvest.storage.csv_storage import CSVStorage
-# from harvest.storage.pickle_storage import PickleStorage
 # from harvest.storage.database_storage import DBStorage
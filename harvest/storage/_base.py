@@ -1,14 +1,30 @@
+import atexit
 import datetime as dt
 import sqlite3
+import threading
+import time
+import weakref
+from typing import Sequence
 
 import polars as pl
 import sqlalchemy
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
-from sqlalchemy.schema import UniqueConstraint
+from sqlalchemy.schema import Index, UniqueConstraint
 
 from harvest.definitions import OrderSide, RuntimeData, TickerFrame, TimeDelta, TimeSpan, Transaction, TransactionFrame
 from harvest.enum import Interval
+from harvest.storage.as_of import AsOfPriceView
+from harvest.storage.cold_storage import ParquetColdStorage
+from harvest.storage.downsample import DownsampleCache, lttb
+from harvest.storage.encoding import PriceEncoding
+from harvest.storage.metrics import StorageMetrics, instrumented
+from harvest.storage.price_cache import PriceCache, naive_utc
+from harvest.storage.retention import RetentionEngine
+from harvest.storage.rollup import ROLLUP_SCHEMA, BarRollup
+from harvest.storage.shared_prices import SharedPriceStore
+from harvest.storage.snapshot import ArrowSnapshotStore
 from harvest.util.helper import debugger
 
 """
@@ -86,7 +102,41 @@ class PriceHistory(CentralBase):
     close: Mapped[float]
     volume: Mapped[float]
 
-    __table_args__ = (UniqueConstraint("timestamp", "symbol", "interval"),)
+    # Equality columns lead so range reads on one series walk a contiguous slice of the index
+    __table_args__ = (UniqueConstraint("symbol", "interval", "timestamp"),)
+
+
+PRICE_HISTORY_COLUMNS = ["timestamp", "symbol", "interval", "open", "high", "low", "close", "volume"]
+
+# Driver-level UPSERT used by CentralStorage.bulk_insert_price_history on SQLite
+PRICE_HISTORY_UPSERT_SQL = (
+    f"INSERT INTO {PriceHistory.__tablename__} ({', '.join(PRICE_HISTORY_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in PRICE_HISTORY_COLUMNS)}) "
+    "ON CONFLICT (symbol, interval, timestamp) DO UPDATE SET "
+    "open = excluded.open, high = excluded.high, low = excluded.low, close = excluded.close, volume = excluded.volume"
+)
+
+# INSERT constructs supporting ON CONFLICT DO UPDATE, by dialect name
+_UPSERT = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def _price_history_upsert(dialect_name: str) -> sqlalchemy.Insert:
+    """
+    Returns the price_history UPSERT statement of a database dialect.
+
+    Raises:
+        ValueError: If the dialect has no INSERT ... ON CONFLICT DO UPDATE construct
+    """
+    if dialect_name not in _UPSERT:
+        raise ValueError(f"Price history upserts support {', '.join(_UPSERT)} databases, got {dialect_name}")
+    stmt = _UPSERT[dialect_name](PriceHistory)
+    return stmt.on_conflict_do_update(
+        index_elements=["symbol", "interval", "timestamp"],
+        set_={name: stmt.excluded[name] for name in ("open", "high", "low", "close", "volume")},
+    )
 
 
 class AccountPerformanceHistory(CentralBase):
@@ -113,7 +163,7 @@ class AccountPerformanceHistory(CentralBase):
     return_percentage: Mapped[float]
     return_absolute: Mapped[float]
 
-    __table_args__ = (UniqueConstraint("timestamp", "interval"),)
+    __table_args__ = (UniqueConstraint("interval", "timestamp"),)
 
 
 # Models for LocalAlgorithmStorage (transactions and algorithm performance)
@@ -145,6 +195,8 @@ class TransactionHistory(LocalBase):
     event: Mapped[str]
     algorithm_name: Mapped[str]
 
+    __table_args__ = (Index("ix_transaction_history_algorithm_symbol_timestamp", "algorithm_name", "symbol", "timestamp"),)
+
 
 class AlgorithmPerformanceHistory(LocalBase):
     """
@@ -172,7 +224,226 @@ class AlgorithmPerformanceHistory(LocalBase):
     return_percentage: Mapped[float]
     return_absolute: Mapped[float]
 
-    __table_args__ = (UniqueConstraint("timestamp", "algorithm_name", "interval"),)
+    __table_args__ = (UniqueConstraint("algorithm_name", "interval", "timestamp"),)
+
+
+_POLARS_TYPES = {
+    dt.datetime: pl.Datetime("us"),
+    str: pl.String,
+    float: pl.Float64,
+    int: pl.Int64,
+}
+
+
+def _frame_schema(model: type[LocalBase] | type[CentralBase]) -> dict[str, pl.DataType]:
+    """
+    Returns the Polars schema of `model`'s table, excluding the `id` column.
+    """
+    return {
+        column.name: _POLARS_TYPES[column.type.python_type]
+        for column in model.__table__.columns
+        if column.name != "id"
+    }
+
+
+def _read_frame(
+    db_engine: sqlalchemy.Engine,
+    model: type[LocalBase] | type[CentralBase],
+    filters: list[sqlalchemy.ColumnElement[bool]],
+    order_by: Sequence[sqlalchemy.ColumnElement] = (),
+) -> pl.DataFrame:
+    """
+    Runs a SELECT over every column of `model` except `id` and returns the rows as a
+    Polars DataFrame.
+
+    Filter values are sent as bound parameters, so the compiled statement is cached
+    by SQLAlchemy and the prepared statement is reused by the SQLite driver across calls.
+    The connection is checked out from the engine's pool, which hands back the same
+    underlying DBAPI connection on every call. Column types come from the model, so
+    timestamps arrive as datetime values and no string parsing is needed.
+
+    Args:
+        db_engine: Engine to run the query on
+        model: ORM model whose table is queried
+        filters: WHERE clauses, combined with AND
+        order_by: Optional columns to sort by
+
+    Returns:
+        pl.DataFrame: Query result with one column per model column except `id`
+
+    Raises:
+        sqlalchemy.exc.DatabaseError: If database query fails
+    """
+    columns = [column for column in model.__table__.columns if column.name != "id"]
+    schema = _frame_schema(model)
+
+    query = sqlalchemy.select(*columns).where(*filters)
+    if order_by:
+        query = query.order_by(*order_by)
+
+    with db_engine.connect() as connection:
+        rows = connection.execute(query).fetchall()
+
+    return pl.DataFrame(rows, schema=schema, orient="row")
+
+
+def _flush_pending(
+    db_engine: sqlalchemy.Engine,
+    algorithm_name: str,
+    transactions: list[dict],
+    transaction_cutoffs: dict[str, dt.datetime],
+    performance: dict[tuple[dt.datetime, str], dict],
+    performance_cutoffs: dict[str, dt.datetime],
+) -> int:
+    """
+    Writes the changes buffered by a write-behind LocalAlgorithmStorage in a single
+    transaction and empties the buffers. Deferred retention deletes run before the
+    buffered rows are inserted, which is the order they would have run in without
+    buffering, since buffered rows older than a cutoff are dropped when it is recorded.
+
+    This is a module-level function so that it can be registered as a finalizer
+    without keeping the storage object alive.
+
+    Args:
+        db_engine: Engine of the storage the rows belong to
+        algorithm_name: Name of the algorithm that owns the storage
+        transactions: Buffered transaction_history rows
+        transaction_cutoffs: Deferred retention cutoffs for transaction_history by symbol
+        performance: Buffered algorithm_performance_history rows keyed by (timestamp, interval)
+        performance_cutoffs: Deferred retention cutoffs for algorithm_performance_history by interval
+
+    Returns:
+        int: Number of rows removed by the deferred retention deletes
+
+    Raises:
+        sqlalchemy.exc.DatabaseError: If database operation fails
+    """
+    if not (transactions or transaction_cutoffs or performance or performance_cutoffs):
+        return 0
+
+    deleted = 0
+    with Session(db_engine) as session:
+        for symbol, cutoff in transaction_cutoffs.items():
+            deleted += session.query(TransactionHistory).filter(
+                TransactionHistory.timestamp <= cutoff,
+                TransactionHistory.algorithm_name == algorithm_name,
+                TransactionHistory.symbol == symbol,
+            ).delete()
+        for interval, cutoff in performance_cutoffs.items():
+            deleted += session.query(AlgorithmPerformanceHistory).filter(
+                AlgorithmPerformanceHistory.timestamp <= cutoff,
+                AlgorithmPerformanceHistory.algorithm_name == algorithm_name,
+                AlgorithmPerformanceHistory.interval == interval,
+            ).delete()
+        if transactions:
+            session.execute(insert(TransactionHistory), transactions)
+        if performance:
+            stmt = insert(AlgorithmPerformanceHistory)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["algorithm_name", "interval", "timestamp"],
+                set_={
+                    "equity": stmt.excluded.equity,
+                    "return_percentage": stmt.excluded.return_percentage,
+                    "return_absolute": stmt.excluded.return_absolute,
+                },
+            )
+            session.execute(stmt, list(performance.values()))
+        session.commit()
+
+    transactions.clear()
+    transaction_cutoffs.clear()
+    performance.clear()
+    performance_cutoffs.clear()
+    return deleted
+
+
+class LocalStorageBackend:
+    """
+    A database shared by many LocalAlgorithmStorage instances.
+
+    By default every LocalAlgorithmStorage creates its own engine and database and
+    creates the local tables, which adds up when a Client runs hundreds of algorithms.
+    Storages created with the same backend share one engine instead, and the tables
+    are created once. Every row is partitioned by algorithm_name, which all reads,
+    writes and retention deletes of LocalAlgorithmStorage already filter on, so each
+    storage behaves as if it had a database of its own.
+
+    Only one open storage may use an algorithm name at a time. A storage starts
+    empty, like one with its own in-memory database: rows left under its name by a
+    closed storage are deleted when it attaches.
+
+    Thread Safety:
+    - Attaching and detaching is thread-safe. The storages themselves keep the
+      threading rules of LocalAlgorithmStorage.
+    """
+
+    def __init__(self, db_path: str | None = None) -> None:
+        """
+        Args:
+            db_path: Database connection string. If None, uses an in-memory SQLite database.
+
+        Raises:
+            sqlalchemy.exc.DatabaseError: If database connection fails
+        """
+        if db_path:
+            self.db_engine = sqlalchemy.create_engine(db_path)
+        else:
+            self.db_engine = sqlalchemy.create_engine("sqlite:///:memory:")
+
+        LocalBase.metadata.drop_all(self.db_engine)
+        LocalBase.metadata.create_all(self.db_engine)
+
+        self._attached: set[str] = set()
+        # Names that may have rows, since the tables were created empty
+        self._used: set[str] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def algorithm_names(self) -> set[str]:
+        """
+        Names of the algorithms whose storages are attached.
+        """
+        with self._lock:
+            return set(self._attached)
+
+    def attach(self, algorithm_name: str) -> sqlalchemy.Engine:
+        """
+        Registers a storage for `algorithm_name` and deletes rows left under that name.
+
+        Returns:
+            sqlalchemy.Engine: The shared engine
+
+        Raises:
+            ValueError: If an open storage already uses `algorithm_name`
+        """
+        with self._lock:
+            if algorithm_name in self._attached:
+                raise ValueError(f"A storage for algorithm {algorithm_name} is already attached to this backend")
+            self._attached.add(algorithm_name)
+            if algorithm_name not in self._used:
+                self._used.add(algorithm_name)
+                return self.db_engine
+
+        with Session(self.db_engine) as session:
+            session.query(TransactionHistory).filter(TransactionHistory.algorithm_name == algorithm_name).delete()
+            session.query(AlgorithmPerformanceHistory).filter(
+                AlgorithmPerformanceHistory.algorithm_name == algorithm_name
+            ).delete()
+            session.commit()
+        return self.db_engine
+
+    def detach(self, algorithm_name: str) -> None:
+        """
+        Releases `algorithm_name`. Its rows are kept until a new storage attaches under the name.
+        """
+        with self._lock:
+            self._attached.discard(algorithm_name)
+
+    def close(self) -> None:
+        """
+        Release the database connections. Attached storages can no longer be used.
+        """
+        self.db_engine.dispose()
 
 
 class LocalAlgorithmStorage:
@@ -194,6 +465,24 @@ class LocalAlgorithmStorage:
     - UPSERT operations to handle duplicate timestamps
     - Performance tracking across multiple time intervals
 
+    Write-Behind Mode:
+    - When enabled, inserted rows and retention deletes are buffered in memory instead
+      of being committed one at a time, and written in a single transaction by flush()
+    - Buffers are flushed automatically once they hold `flush_max_rows` rows or the
+      last flush is older than `flush_interval_ms`, and when the storage is closed,
+      garbage collected, or the interpreter exits
+    - Reads combine the buffered rows with the database, so results are the same
+      as with write-behind disabled
+
+    Shared Backend:
+    - By default each instance has its own engine and database. When many algorithms
+      run in one process, pass the same LocalStorageBackend to each of them to share
+      one engine and one set of tables, partitioned by algorithm_name
+
+    Instrumentation:
+    - When enabled, every insert and get method records its call count, row count and
+      latency into `metrics`, along with the number of rows removed by retention
+
     Thread Safety:
     - This class is designed for single-algorithm use and is not thread-safe
     - Each algorithm should have its own instance
@@ -205,6 +494,12 @@ class LocalAlgorithmStorage:
         db_path: str | None = None,
         transaction_storage_limit: TimeDelta | None = None,
         performance_storage_limit: dict[str, TimeDelta] | None = None,
+        write_behind: bool = False,
+        flush_max_rows: int = 1000,
+        flush_interval_ms: int | None = None,
+        backend: LocalStorageBackend | None = None,
+        instrument: bool = False,
+        metrics_log_period: float | None = None,
     ) -> None:
         """
         Initialize local storage for a specific algorithm.
@@ -220,13 +515,37 @@ class LocalAlgorithmStorage:
             performance_storage_limit: Dictionary mapping interval names to TimeDelta
                                      objects for performance history retention limits.
                                      Defaults to predefined limits for different intervals.
+            write_behind: If True, buffer inserted rows in memory and write them in one
+                         transaction per flush() instead of committing every row.
+                         The Client calls flush() at the end of every tick for the
+                         storage of each algorithm (Algorithm.storage).
+            flush_max_rows: In write-behind mode, flush automatically once this many
+                           rows are buffered.
+            flush_interval_ms: In write-behind mode, flush automatically on insert if the
+                              last flush happened more than this many milliseconds ago.
+                              If None, only flush_max_rows triggers automatic flushes.
+            backend: If set, store the data in this shared backend instead of a database
+                    of its own. db_path must then be None.
+            instrument: If True, record call counts, row counts and latency histograms
+                       of the insert and get methods in `metrics`
+                       (see harvest.storage.metrics.StorageMetrics).
+            metrics_log_period: If set along with instrument, log the metrics as a JSON
+                               line every this many seconds.
 
         Raises:
             sqlalchemy.exc.DatabaseError: If database connection fails
+            ValueError: If both db_path and backend are set, or if another open storage
+                        of the backend uses algorithm_name
         """
         self.algorithm_name = algorithm_name
-
-        if db_path:
+        self.backend = backend
+        self.metrics = StorageMetrics(algorithm_name, metrics_log_period) if instrument else None
+
+        if backend is not None:
+            if db_path:
+                raise ValueError("db_path cannot be set when a shared backend is used")
+            self.db_engine = backend.attach(algorithm_name)
+        elif db_path:
             self.db_engine = sqlalchemy.create_engine(db_path)
         else:
             # Use in-memory SQLite for fast local caching
@@ -257,10 +576,73 @@ class LocalAlgorithmStorage:
         self.transaction_history_oldest_timestamp: dict[str, dt.datetime] = {}
         self.algorithm_performance_oldest_timestamp: dict[str, dt.datetime] = {}
 
-        # Create tables
-        LocalBase.metadata.drop_all(self.db_engine)
-        LocalBase.metadata.create_all(self.db_engine)
+        # Create tables. A shared backend has created them already.
+        if backend is None:
+            LocalBase.metadata.drop_all(self.db_engine)
+            LocalBase.metadata.create_all(self.db_engine)
+
+        # Write-behind buffers
+        self.write_behind = write_behind
+        self.flush_max_rows = flush_max_rows
+        self.flush_interval_ms = flush_interval_ms
+        self._pending_transactions: list[dict] = []
+        self._pending_transaction_cutoffs: dict[str, dt.datetime] = {}
+        self._pending_performance: dict[tuple[dt.datetime, str], dict] = {}
+        self._pending_performance_cutoffs: dict[str, dt.datetime] = {}
+        self._last_flush = time.monotonic()
+        self._finalizer = weakref.finalize(self, _flush_pending, *self._pending_state())
+
+        # Downsampled performance series, keyed by interval
+        self._downsampled = DownsampleCache()
+
+    @instrumented()
+    def flush(self) -> None:
+        """
+        Write all rows buffered in write-behind mode to the database in one transaction.
+
+        Does nothing if write-behind mode is disabled or nothing is buffered.
+
+        Raises:
+            sqlalchemy.exc.DatabaseError: If database operation fails
+        """
+        deleted = _flush_pending(*self._pending_state())
+        if deleted and self.metrics is not None:
+            self.metrics.count("retention_deleted_rows", deleted)
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        """
+        Flush any buffered rows and release the database connections. With a shared
+        backend, the algorithm name is released instead and the backend stays open.
+
+        Raises:
+            sqlalchemy.exc.DatabaseError: If database operation fails
+        """
+        self._finalizer()
+        if self.backend is not None:
+            self.backend.detach(self.algorithm_name)
+        else:
+            self.db_engine.dispose()
+
+    def _pending_state(self) -> tuple:
+        return (
+            self.db_engine,
+            self.algorithm_name,
+            self._pending_transactions,
+            self._pending_transaction_cutoffs,
+            self._pending_performance,
+            self._pending_performance_cutoffs,
+        )
 
+    def _maybe_flush(self) -> None:
+        pending = len(self._pending_transactions) + len(self._pending_performance)
+        if pending >= self.flush_max_rows or (
+            self.flush_interval_ms is not None
+            and (time.monotonic() - self._last_flush) * 1000 >= self.flush_interval_ms
+        ):
+            self.flush()
+
+    @instrumented(rows="argument")
     def insert_transaction(self, transaction: Transaction) -> None:
         """
         Insert a transaction record for this algorithm.
@@ -280,16 +662,6 @@ class LocalAlgorithmStorage:
         Raises:
             sqlalchemy.exc.DatabaseError: If database insert fails
         """
-        df = pl.DataFrame({
-            "timestamp": [transaction.timestamp],
-            "symbol": [transaction.symbol],
-            "event": [transaction.event],
-            "algorithm_name": [transaction.algorithm_name],
-            "side": [transaction.side.value],
-            "quantity": [transaction.quantity],
-            "price": [transaction.price],
-        })
-
         symbol = transaction.symbol
         latest_timestamp = transaction.timestamp
 
@@ -298,17 +670,28 @@ class LocalAlgorithmStorage:
             new_oldest_timestamp = latest_timestamp - self.transaction_storage_limit.delta_datetime
             if (symbol in self.transaction_history_oldest_timestamp
                 and latest_timestamp - self.transaction_history_oldest_timestamp[symbol] > self.transaction_storage_limit.delta_datetime):
-                with Session(self.db_engine) as session:
-                    session.query(TransactionHistory).filter(
-                        TransactionHistory.timestamp <= new_oldest_timestamp,
-                        TransactionHistory.symbol == symbol,
-                    ).delete()
-                    session.commit()
+                if self.write_behind:
+                    self._pending_transaction_cutoffs[symbol] = max(
+                        new_oldest_timestamp, self._pending_transaction_cutoffs.get(symbol, new_oldest_timestamp)
+                    )
+                    self._pending_transactions[:] = [
+                        row for row in self._pending_transactions
+                        if row["symbol"] != symbol or row["timestamp"] > new_oldest_timestamp
+                    ]
+                else:
+                    with Session(self.db_engine) as session:
+                        deleted = session.query(TransactionHistory).filter(
+                            TransactionHistory.timestamp <= new_oldest_timestamp,
+                            TransactionHistory.algorithm_name == self.algorithm_name,
+                            TransactionHistory.symbol == symbol,
+                        ).delete()
+                        session.commit()
+                    if self.metrics is not None:
+                        self.metrics.count("retention_deleted_rows", deleted)
 
             self.transaction_history_oldest_timestamp[symbol] = new_oldest_timestamp
 
-        # Insert new transaction using SQLAlchemy directly
-        stmt = insert(TransactionHistory).values([{
+        row = {
             "timestamp": transaction.timestamp,
             "symbol": transaction.symbol,
             "event": transaction.event,
@@ -316,12 +699,21 @@ class LocalAlgorithmStorage:
             "side": transaction.side.value,
             "quantity": transaction.quantity,
             "price": transaction.price,
-        }])
+        }
+
+        if self.write_behind:
+            self._pending_transactions.append(row)
+            self._maybe_flush()
+            return
+
+        # Insert new transaction using SQLAlchemy directly
+        stmt = insert(TransactionHistory).values([row])
 
         with Session(self.db_engine) as session:
             session.execute(stmt)
             session.commit()
 
+    @instrumented()
     def get_transaction_history(
         self,
         symbol: str,
@@ -360,22 +752,26 @@ class LocalAlgorithmStorage:
         if end:
             filters.append(TransactionHistory.timestamp <= end)
 
-        with Session(self.db_engine) as session:
-            assert session.bind is not None
-            db_query = session.query(TransactionHistory).filter(*filters)
-            db_query_str = str(
-                db_query.statement.compile(
-                    dialect=session.bind.dialect,
-                    compile_kwargs={"literal_binds": True},
-                )
-            )
+        if symbol in self._pending_transaction_cutoffs:
+            # Hide rows whose deletion is still buffered
+            filters.append(TransactionHistory.timestamp > self._pending_transaction_cutoffs[symbol])
+
+        frame = _read_frame(self.db_engine, TransactionHistory, filters)
 
-        frame = pl.read_database(query=db_query_str, connection=self.db_engine)
-        frame = frame.with_columns(pl.col("timestamp").str.to_datetime("%Y-%m-%d %H:%M:%S%.f"))
-        frame = frame.drop("id")
+        if self._pending_transactions:
+            pending = pl.DataFrame(self._pending_transactions, schema=frame.schema)
+            pending = pending.filter(
+                pl.col("symbol") == symbol,
+                pl.col("algorithm_name") == self.algorithm_name,
+                pl.col("side") == side.value if side else True,
+                pl.col("timestamp") >= start if start else True,
+                pl.col("timestamp") <= end if end else True,
+            )
+            frame = pl.concat([frame, pending])
 
         return TransactionFrame(frame)
 
+    @instrumented(rows="argument")
     def insert_algorithm_performance(
         self,
         timestamp: dt.datetime,
@@ -411,29 +807,45 @@ class LocalAlgorithmStorage:
             cutoff_time = timestamp - self.performance_storage_limit[interval].delta_datetime
             if (interval in self.algorithm_performance_oldest_timestamp
                 and timestamp - self.algorithm_performance_oldest_timestamp[interval] > self.performance_storage_limit[interval].delta_datetime):
-                with Session(self.db_engine) as session:
-                    session.query(AlgorithmPerformanceHistory).filter(
-                        AlgorithmPerformanceHistory.timestamp <= cutoff_time,
-                        AlgorithmPerformanceHistory.algorithm_name == self.algorithm_name,
-                        AlgorithmPerformanceHistory.interval == interval
-                    ).delete()
-                    session.commit()
+                if self.write_behind:
+                    self._pending_performance_cutoffs[interval] = max(
+                        cutoff_time, self._pending_performance_cutoffs.get(interval, cutoff_time)
+                    )
+                    for key in [key for key in self._pending_performance if key[1] == interval and key[0] <= cutoff_time]:
+                        del self._pending_performance[key]
+                else:
+                    with Session(self.db_engine) as session:
+                        deleted = session.query(AlgorithmPerformanceHistory).filter(
+                            AlgorithmPerformanceHistory.timestamp <= cutoff_time,
+                            AlgorithmPerformanceHistory.algorithm_name == self.algorithm_name,
+                            AlgorithmPerformanceHistory.interval == interval
+                        ).delete()
+                        session.commit()
+                    if self.metrics is not None:
+                        self.metrics.count("retention_deleted_rows", deleted)
 
             self.algorithm_performance_oldest_timestamp[interval] = cutoff_time
 
         # Insert new performance data
-        df = pl.DataFrame({
-            "timestamp": [timestamp],
-            "algorithm_name": [self.algorithm_name],
-            "interval": [interval],
-            "equity": [equity],
-            "return_percentage": [return_percentage],
-            "return_absolute": [return_absolute],
-        })
+        row = {
+            "timestamp": timestamp,
+            "algorithm_name": self.algorithm_name,
+            "interval": interval,
+            "equity": equity,
+            "return_percentage": return_percentage,
+            "return_absolute": return_absolute,
+        }
+
+        if self.write_behind:
+            # Later rows for the same key replace earlier ones, like the UPSERT below
+            self._pending_performance[(timestamp, interval)] = row
+            self._downsampled.invalidate(interval)
+            self._maybe_flush()
+            return
 
-        stmt = insert(AlgorithmPerformanceHistory).values(df.to_dicts())
+        stmt = insert(AlgorithmPerformanceHistory).values([row])
         stmt = stmt.on_conflict_do_update(
-            index_elements=["timestamp", "algorithm_name", "interval"],
+            index_elements=["algorithm_name", "interval", "timestamp"],
             set_={
                 "equity": stmt.excluded.equity,
                 "return_percentage": stmt.excluded.return_percentage,
@@ -443,12 +855,15 @@ class LocalAlgorithmStorage:
         with Session(self.db_engine) as session:
             session.execute(stmt)
             session.commit()
+        self._downsampled.invalidate(interval)
 
+    @instrumented()
     def get_algorithm_performance_history(
         self,
         interval: str,
         start: dt.datetime | None = None,
         end: dt.datetime | None = None,
+        max_points: int | None = None,
     ) -> pl.DataFrame:
         """
         Retrieve performance history for this algorithm at a specific interval.
@@ -460,6 +875,11 @@ class LocalAlgorithmStorage:
             interval: Interval type to retrieve (e.g., '5min_1day', '1hour_1week')
             start: Optional start datetime (inclusive) for filtering
             end: Optional end datetime (inclusive) for filtering
+            max_points: If set, downsample the result to at most this many rows with
+                       Largest-Triangle-Three-Buckets over equity, for charting. The
+                       downsampled full history (no start or end) is kept until the
+                       next insert for this interval, so repeated reads do not scale
+                       with the number of stored rows.
 
         Returns:
             pl.DataFrame: Polars DataFrame with performance data columns:
@@ -470,6 +890,13 @@ class LocalAlgorithmStorage:
         Raises:
             sqlalchemy.exc.DatabaseError: If database query fails
         """
+        cacheable = max_points is not None and start is None and end is None
+        if cacheable:
+            cached = self._downsampled.get(interval, max_points)
+            if cached is not None:
+                return cached
+            version = self._downsampled.version(interval)
+
         filters = [
             AlgorithmPerformanceHistory.algorithm_name == self.algorithm_name,
             AlgorithmPerformanceHistory.interval == interval
@@ -480,19 +907,27 @@ class LocalAlgorithmStorage:
         if end:
             filters.append(AlgorithmPerformanceHistory.timestamp <= end)
 
-        with Session(self.db_engine) as session:
-            assert session.bind is not None
-            db_query = session.query(AlgorithmPerformanceHistory).filter(*filters).order_by(AlgorithmPerformanceHistory.timestamp)
-            db_query_str = str(
-                db_query.statement.compile(
-                    dialect=session.bind.dialect,
-                    compile_kwargs={"literal_binds": True},
-                )
+        if interval in self._pending_performance_cutoffs:
+            # Hide rows whose deletion is still buffered
+            filters.append(AlgorithmPerformanceHistory.timestamp > self._pending_performance_cutoffs[interval])
+
+        frame = _read_frame(self.db_engine, AlgorithmPerformanceHistory, filters, order_by=[AlgorithmPerformanceHistory.timestamp])
+
+        if self._pending_performance:
+            pending = pl.DataFrame(list(self._pending_performance.values()), schema=frame.schema)
+            pending = pending.filter(
+                pl.col("interval") == interval,
+                pl.col("timestamp") >= start if start else True,
+                pl.col("timestamp") <= end if end else True,
             )
+            # Buffered rows replace database rows with the same timestamp
+            frame = frame.join(pending, on="timestamp", how="anti")
+            frame = pl.concat([frame, pending]).sort("timestamp")
 
-        frame = pl.read_database(query=db_query_str, connection=self.db_engine)
-        frame = frame.with_columns(pl.col("timestamp").str.to_datetime("%Y-%m-%d %H:%M:%S%.f"))
-        frame = frame.drop("id")
+        if max_points is not None:
+            frame = lttb(frame, max_points)
+            if cacheable:
+                self._downsampled.put(interval, max_points, frame, version)
 
         return frame
 
@@ -568,6 +1003,7 @@ class LocalAlgorithmStorage:
                 return_absolute=return_abs,
             )
 
+    @instrumented()
     def get_latest_performance(self, interval: str) -> dict | None:
         """
         Get the most recent performance data for this algorithm at a specific interval.
@@ -593,8 +1029,13 @@ class LocalAlgorithmStorage:
                 AlgorithmPerformanceHistory.interval == interval
             ).order_by(AlgorithmPerformanceHistory.timestamp.desc()).first()
 
-            if latest:
-                return {
+            result = None
+            if latest and not (
+                interval in self._pending_performance_cutoffs
+                and latest.timestamp <= self._pending_performance_cutoffs[interval]
+            ):
+                # Every row of this interval is older than a buffered retention delete otherwise
+                result = {
                     "timestamp": latest.timestamp,
                     "algorithm_name": latest.algorithm_name,
                     "interval": latest.interval,
@@ -602,7 +1043,71 @@ class LocalAlgorithmStorage:
                     "return_percentage": latest.return_percentage,
                     "return_absolute": latest.return_absolute,
                 }
-            return None
+
+        pending = [row for (_, row_interval), row in self._pending_performance.items() if row_interval == interval]
+        if pending:
+            latest_pending = max(pending, key=lambda row: row["timestamp"])
+            if result is None or latest_pending["timestamp"] >= result["timestamp"]:
+                result = dict(latest_pending)
+        return result
+
+
+def _create_shared_engines(
+    db_path: str, busy_timeout_ms: int, pool_size: int
+) -> tuple[sqlalchemy.Engine, sqlalchemy.Engine]:
+    """
+    Creates the engines CentralStorage uses in multi-process mode.
+
+    Args:
+        db_path: Database connection string
+        busy_timeout_ms: How long SQLite waits for a lock before failing
+        pool_size: Number of pooled read connections
+
+    Returns:
+        tuple[sqlalchemy.Engine, sqlalchemy.Engine]: The read engine, backed by a pool of
+            connections, and the write engine, backed by a single connection
+    """
+    url = sqlalchemy.make_url(db_path)
+    if url.get_backend_name() != "sqlite":
+        read_engine = sqlalchemy.create_engine(db_path, pool_size=pool_size, pool_pre_ping=True)
+        write_engine = sqlalchemy.create_engine(db_path, pool_size=1, max_overflow=0, pool_pre_ping=True)
+        return read_engine, write_engine
+
+    connect_args = {"timeout": busy_timeout_ms / 1000, "check_same_thread": False}
+    read_engine = sqlalchemy.create_engine(
+        db_path, connect_args=connect_args, poolclass=sqlalchemy.pool.QueuePool, pool_size=pool_size
+    )
+    write_engine = sqlalchemy.create_engine(
+        db_path, connect_args=connect_args, poolclass=sqlalchemy.pool.QueuePool, pool_size=1, max_overflow=0
+    )
+
+    def configure_connection(dbapi_connection, connection_record) -> None:
+        # Let SQLAlchemy emit BEGIN itself instead of the driver's implicit transactions
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        cursor.close()
+
+    def begin_read(connection) -> None:
+        connection.exec_driver_sql("BEGIN")
+
+    def begin_write(connection) -> None:
+        # Take the write lock up front; upgrading a read lock later fails without waiting
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    sqlalchemy.event.listen(read_engine, "connect", configure_connection)
+    sqlalchemy.event.listen(read_engine, "begin", begin_read)
+    sqlalchemy.event.listen(write_engine, "connect", configure_connection)
+    sqlalchemy.event.listen(write_engine, "begin", begin_write)
+    return read_engine, write_engine
+
+
+def _save_snapshot_at_exit(storage_ref: "weakref.ref[CentralStorage]") -> None:
+    storage = storage_ref()
+    if storage is not None:
+        storage.save_snapshot()
 
 
 class CentralStorage:
@@ -631,6 +1136,15 @@ class CentralStorage:
     - Uses connection pooling for database efficiency
     - Optimized queries with proper indexing
 
+    Multi-Process Mode:
+    - Several processes can share one SQLite file when multi_process=True
+    - The database is switched to WAL journaling, so readers do not block the writer
+      and the writer does not block readers
+    - Reads use a pool of connections, while writes go through a single dedicated
+      connection that starts transactions with BEGIN IMMEDIATE, so writers queue on
+      the busy timeout instead of failing on lock upgrades
+    - Tables are created if missing but never dropped
+
     Database Connection Examples:
     - In-memory SQLite: None (default)
     - File-based SQLite: "sqlite:///central_data.db"
@@ -643,6 +1157,20 @@ class CentralStorage:
         db_path: str | None = None,
         price_storage_limit: dict[Interval, TimeDelta] | None = None,
         performance_storage_limit: dict[str, TimeDelta] | None = None,
+        enable_price_cache: bool = True,
+        retention_period: float | None = None,
+        retention_batch_size: int = 10_000,
+        cold_storage_path: str | None = None,
+        snapshot_path: str | None = None,
+        snapshot_period: float | None = None,
+        multi_process: bool = False,
+        busy_timeout_ms: int = 5000,
+        pool_size: int = 5,
+        rollup_intervals: Sequence[Interval] | None = None,
+        shared_memory_name: str | None = None,
+        instrument: bool = False,
+        metrics_log_period: float | None = None,
+        price_encoding: PriceEncoding | None = None,
     ) -> None:
         """
         Initialize central storage with configurable database backend and retention policies.
@@ -659,17 +1187,83 @@ class CentralStorage:
             performance_storage_limit: Dictionary mapping interval names to TimeDelta
                                      objects for performance history retention.
                                      Defaults to predefined limits for different time ranges.
+            enable_price_cache: If True (default), price history is kept in an in-memory
+                              columnar ring buffer per symbol and interval, sized by
+                              price_storage_limit. Reads are served from the buffer and
+                              the database acts as a write-through persistence tier.
+            retention_period: If set, expired rows are deleted by a background thread every
+                            retention_period seconds. Requires a file-backed or server
+                            database. If None, the owner should call retention.run_once()
+                            periodically; the Client runs a bounded pass at the end of
+                            every tick.
+                            Expired rows are hidden from reads either way.
+            retention_batch_size: Maximum number of rows deleted per retention transaction.
+            cold_storage_path: If set, price history that falls out of price_storage_limit
+                             is moved to Parquet files under this directory instead of
+                             being deleted, partitioned by symbol, interval and date.
+                             price_storage_limit then sets how long data stays in the
+                             database, and get_price_history reads both tiers. The files
+                             persist across restarts.
+            snapshot_path: If set, price history is saved as memory-mappable Arrow IPC files
+                         under this directory by save_snapshot(), close() and at interpreter
+                         exit, and restored from them when the storage is created. Restored
+                         series are served from the price cache and only written to the
+                         database when they are first needed there. Use
+                         get_latest_price_timestamp() to fetch only the data missing since
+                         the snapshot.
+            snapshot_period: If set along with snapshot_path, save_snapshot_if_due() saves a
+                           snapshot when the last one is older than this many seconds.
+                           The Client calls it at the end of every tick.
+            multi_process: If True, configure the database to be shared by several processes
+                         (see Multi-Process Mode above). Existing data is kept, and the
+                         price cache is disabled because it would only see this process's
+                         writes. Requires a file-backed or server database.
+            busy_timeout_ms: In multi-process mode, how long SQLite waits for a lock held
+                           by another connection before failing.
+            pool_size: In multi-process mode, number of pooled read connections.
+            rollup_intervals: If set, every 1-minute bar that is inserted also updates a
+                            partial bar of each of these intervals, and bars are written
+                            to price history as their bucket closes. Algorithms can then
+                            use these intervals without fetching them from the broker.
+                            See harvest.storage.rollup.ROLLUP_INTERVALS for the usual set.
+            shared_memory_name: If set, every price insert is also published to a
+                              SharedPriceStore with this name, sized by
+                              price_storage_limit. Algorithms in other processes open
+                              SharedPriceStore(shared_memory_name) to read the bars
+                              without copies. The segments are removed by close().
+            instrument: If True, record call counts, row counts and latency histograms
+                       of the insert and get methods in `metrics`, along with the rows
+                       removed by the retention engine
+                       (see harvest.storage.metrics.StorageMetrics).
+            metrics_log_period: If set along with instrument, log the metrics as a JSON
+                               line every this many seconds.
+            price_encoding: Compact encoding of OHLCV data in the price cache and the
+                           cold tier (see harvest.storage.encoding.PriceEncoding). The
+                           price cache only applies float32 prices. The database and
+                           snapshots keep float64. Reads always return float64 prices.
 
         Raises:
             sqlalchemy.exc.DatabaseError: If database connection fails
-            ValueError: If invalid database URL format is provided
+            ValueError: If invalid database URL format is provided, if retention_period
+                        is set for an in-memory database, if multi_process is set
+                        for an in-memory database, or if a rollup interval cannot be
+                        built from 1-minute bars
         """
 
-        if db_path:
+        self.metrics = StorageMetrics("central", metrics_log_period) if instrument else None
+
+        self.multi_process = multi_process
+        if multi_process:
+            if not db_path or sqlalchemy.make_url(db_path).database in (None, "", ":memory:"):
+                raise ValueError("Multi-process mode requires a file-backed or server database")
+            self.db_engine, self.write_engine = _create_shared_engines(db_path, busy_timeout_ms, pool_size)
+        elif db_path:
             self.db_engine = sqlalchemy.create_engine(db_path)
+            self.write_engine = self.db_engine
         else:
             # Default to in-memory SQLite
             self.db_engine = sqlalchemy.create_engine("sqlite:///:memory:")
+            self.write_engine = self.db_engine
 
         # Price storage limits
         default_price_storage_limit = {
@@ -701,13 +1295,173 @@ class CentralStorage:
         else:
             self.performance_storage_limit = default_performance_storage_limit | performance_storage_limit
 
-        # Tracking oldest timestamps for cleanup
-        self.price_history_oldest_timestamp: dict[str, dict[Interval, dt.datetime]] = {}
-        self.account_performance_oldest_timestamp: dict[str, dt.datetime] = {}
+        # Retention cutoffs and deferred cleanup
+        self.retention = RetentionEngine(self.write_engine, retention_batch_size)
+        self.retention.metrics = self.metrics
+
+        # Parquet tier for price history that aged out of the database
+        self.price_encoding = price_encoding or PriceEncoding()
+        self.cold_storage = (
+            ParquetColdStorage(cold_storage_path, self.price_encoding) if cold_storage_path else None
+        )
+        if self.cold_storage is not None:
+            self.retention.archive[PriceHistory] = self._archive_price_rows
+
+        # In-memory read cache for price history
+        self.price_cache = (
+            PriceCache(self.price_storage_limit, self.price_encoding.numpy_dtype)
+            if enable_price_cache and not multi_process
+            else None
+        )
+
+        # Price history published to worker processes
+        self.shared_prices = (
+            SharedPriceStore(shared_memory_name, create=True, price_storage_limit=self.price_storage_limit)
+            if shared_memory_name
+            else None
+        )
+
+        # Downsampled account performance series, keyed by interval. Other processes'
+        # inserts would not invalidate them, so they are not kept in multi-process mode.
+        self._downsampled = DownsampleCache() if not multi_process else None
+
+        # Higher intervals built from inserted 1-minute bars
+        self.rollup = BarRollup(rollup_intervals) if rollup_intervals else None
+
+        # Create tables. Other processes may already be using a shared database.
+        if not multi_process:
+            CentralBase.metadata.drop_all(self.write_engine)
+        CentralBase.metadata.create_all(self.write_engine)
+
+        # Arrow IPC snapshots for warm starts
+        self.snapshot = ArrowSnapshotStore(snapshot_path) if snapshot_path else None
+        self.snapshot_period = snapshot_period
+        self._snapshot_dirty: set[tuple[str, Interval]] = set()
+        # Held while a snapshot is saved, and while series are marked changed, so a series
+        # changed during a save is either in it or marked for the next one
+        self._snapshot_dirty_lock = threading.RLock()
+        self._snapshot_pending: dict[tuple[str, Interval], pl.DataFrame] = {}
+        self._snapshot_lock = threading.Lock()
+        self._last_snapshot = time.monotonic()
+        if self.snapshot is not None:
+            self._restore_snapshot()
+            atexit.register(_save_snapshot_at_exit, weakref.ref(self))
+
+        if retention_period is not None:
+            self.retention.start(retention_period)
+
+    def _restore_snapshot(self) -> None:
+        """
+        Seeds the price cache with the memory-mapped snapshot frames. Writing a series to
+        the database is deferred until a read misses the cache or rows of the series are
+        inserted (see _load_snapshot_series). Without the price cache the database is the
+        only read tier, so the frames are written to it right away.
+        """
+        assert self.snapshot is not None
+        for symbol, interval, frame in self.snapshot.load():
+            if frame.is_empty():
+                continue
+            interval = Interval.from_str(interval)
+            if self.price_cache is None:
+                self._write_price_rows(frame)
+            else:
+                self.price_cache.insert(symbol, interval, frame)
+                self._snapshot_pending[(symbol, interval)] = frame
+            if self.shared_prices is not None:
+                self.shared_prices.insert(symbol, interval, frame)
+            self._track_price_insert(symbol, interval, frame["timestamp"].min(), frame["timestamp"].max())
+            debugger.debug(f"Restored {len(frame)} rows of {symbol} {interval} from snapshot")
+        # Restored data is already in the snapshot
+        with self._snapshot_dirty_lock:
+            self._snapshot_dirty.clear()
+
+    def _load_snapshot_series(self, symbol: str, interval: Interval | None) -> None:
+        """
+        Writes the restored snapshot of `symbol` and `interval` (every interval if None)
+        to the database, if it was not written yet.
+        """
+        if not self._snapshot_pending:
+            return
+        with self._snapshot_lock:
+            for key in list(self._snapshot_pending):
+                if key[0] == symbol and (interval is None or key[1] == interval):
+                    self._write_price_rows(self._snapshot_pending[key])
+                    # Removed only once written, so concurrent readers wait on the lock until then
+                    del self._snapshot_pending[key]
+
+    def save_snapshot(self) -> int:
+        """
+        Write the price history of every series changed since the last snapshot to
+        the snapshot directory. Only the database tier is written; data in the cold
+        tier is already persistent. Inserts of other threads wait until the snapshot is
+        written before they mark their series as changed.
+
+        Returns:
+            int: Number of series written
 
-        # Create tables
-        CentralBase.metadata.drop_all(self.db_engine)
-        CentralBase.metadata.create_all(self.db_engine)
+        Raises:
+            ValueError: If the storage was created without a snapshot_path
+        """
+        if self.snapshot is None:
+            raise ValueError("Snapshots are not enabled for this storage")
+
+        with self._snapshot_dirty_lock:
+            dirty = list(self._snapshot_dirty)
+            for symbol, interval in dirty:
+                cutoff = self.retention.cutoff(PriceHistory, {"symbol": symbol, "interval": str(interval)})
+                start = None if cutoff is None else cutoff + dt.timedelta(microseconds=1)
+                frame = self.get_price_history(symbol, interval, start=start).df.sort("timestamp")
+                self.snapshot.write(symbol, str(interval), frame)
+            self._snapshot_dirty.difference_update(dirty)
+            self._last_snapshot = time.monotonic()
+        return len(dirty)
+
+    def save_snapshot_if_due(self) -> None:
+        """
+        Save a snapshot if snapshots are enabled and the last one is older than snapshot_period.
+        """
+        if self.snapshot is None or self.snapshot_period is None:
+            return
+        with self._snapshot_dirty_lock:
+            if time.monotonic() - self._last_snapshot >= self.snapshot_period:
+                self.save_snapshot()
+
+    @instrumented()
+    def get_latest_price_timestamp(self, symbol: str, interval: Interval) -> dt.datetime | None:
+        """
+        Get the timestamp of the most recent stored candle for a symbol and interval.
+
+        Args:
+            symbol: Stock or crypto symbol
+            interval: Price data interval
+
+        Returns:
+            dt.datetime | None: Latest stored timestamp, or None if nothing is stored
+        """
+        pending = self._snapshot_pending.get((symbol, interval))
+        if pending is not None:
+            # Rows inserted after the restore would have written the snapshot to the database first
+            return pending["timestamp"].max()
+
+        query = sqlalchemy.select(sqlalchemy.func.max(PriceHistory.timestamp)).where(
+            PriceHistory.symbol == symbol,
+            PriceHistory.interval == str(interval),
+        )
+        with self.db_engine.connect() as connection:
+            return connection.execute(query).scalar()
+
+    def close(self) -> None:
+        """
+        Save a final snapshot if snapshots are enabled, stop background retention,
+        remove the shared price store and release the database connections.
+        """
+        if self.snapshot is not None:
+            self.save_snapshot()
+        if self.shared_prices is not None:
+            self.shared_prices.close()
+        self.retention.stop()
+        self.db_engine.dispose()
+        self.write_engine.dispose()
 
     def setup(self, stats: RuntimeData) -> None:
         """
@@ -723,6 +1477,25 @@ class CentralStorage:
         """
         self.stats = stats
 
+    def as_of(self, stats: RuntimeData | None = None) -> AsOfPriceView:
+        """
+        Returns a read-only view of the price history that never shows bars that had not
+        closed at the simulation clock, for backtests.
+
+        Each series is read from the database once. Reads through the view return
+        zero-copy slices of it, bounded by `stats.utc_timestamp` with a binary search
+        (see harvest.storage.as_of.AsOfPriceView).
+
+        Args:
+            stats: Runtime data holding the simulation clock. Defaults to the one passed
+                   to setup().
+
+        Raises:
+            AttributeError: If stats is None and setup() was not called
+        """
+        return AsOfPriceView(self, stats if stats is not None else self.stats)
+
+    @instrumented(rows="argument")
     def insert_price_history(self, data: TickerFrame) -> None:
         """
         Store stock price data in the central database.
@@ -737,8 +1510,8 @@ class CentralStorage:
 
         Side Effects:
             - Inserts new price records into database
-            - May delete old price records if storage limits are exceeded
-            - Updates internal tracking of oldest timestamps per symbol/interval
+            - Advances the retention cutoff for this symbol and interval, hiding expired
+              records until the retention engine deletes them
 
         Raises:
             sqlalchemy.exc.DatabaseError: If database operations fail
@@ -750,29 +1523,15 @@ class CentralStorage:
         interval = df.head(1)["interval"].item()
         interval = Interval.from_str(interval)
         symbol = df.head(1)["symbol"].item()
+        oldest_timestamp = df.head(1)["timestamp"].item()
         latest_timestamp = df.tail(1)["timestamp"].item()
 
-        if self.price_storage_limit:
-            new_oldest_timestamp = latest_timestamp - self.price_storage_limit[interval].delta_datetime
-            if (
-                symbol in self.price_history_oldest_timestamp
-                and interval in self.price_history_oldest_timestamp[symbol]
-                and latest_timestamp - self.price_history_oldest_timestamp[symbol][interval]
-                > self.price_storage_limit[interval].delta_datetime
-            ):
-                with Session(self.db_engine) as session:
-                    session.query(PriceHistory).filter(
-                        PriceHistory.timestamp <= new_oldest_timestamp, PriceHistory.symbol == symbol
-                    ).delete()
-                    session.commit()
-            elif symbol not in self.price_history_oldest_timestamp:
-                self.price_history_oldest_timestamp[symbol] = {}
-
-            self.price_history_oldest_timestamp[symbol][interval] = new_oldest_timestamp
+        # Snapshot rows go in first, so the new rows win on conflicting timestamps
+        self._load_snapshot_series(symbol, interval)
 
         stmt = insert(PriceHistory).values(df.to_dicts())
         stmt = stmt.on_conflict_do_update(
-            index_elements=["timestamp", "symbol", "interval"],
+            index_elements=["symbol", "interval", "timestamp"],
             set_={
                 "open": stmt.excluded.open,
                 "high": stmt.excluded.high,
@@ -781,10 +1540,177 @@ class CentralStorage:
                 "volume": stmt.excluded.volume,
             },
         )
-        with Session(self.db_engine) as session:
+        with Session(self.write_engine) as session:
             session.execute(stmt)
             session.commit()
 
+        if self.price_cache is not None:
+            self.price_cache.insert(symbol, interval, df)
+        if self.shared_prices is not None:
+            self.shared_prices.insert(symbol, interval, df)
+
+        self._track_price_insert(symbol, interval, oldest_timestamp, latest_timestamp)
+
+        if self.rollup is not None and interval == Interval.MIN_1:
+            self._insert_rollup_bars(df)
+
+    @instrumented()
+    def bulk_insert_price_history(self, data: TickerFrame, batch_size: int = 50_000) -> int:
+        """
+        Store a large amount of price data in the central database.
+
+        This is the ingest path for startup backfills of long histories. Rather than
+        building one multi-VALUES statement out of a Python dict per candle, the frame
+        is streamed to the database in slices of `batch_size` rows, and all slices are
+        written in one transaction. On SQLite each slice is written with a single
+        parameterized UPSERT through the driver's executemany, with timestamps rendered
+        to SQLite's storage format by polars in one vectorized pass. The number of bound
+        variables per statement is constant, so arbitrarily large frames never hit
+        SQLite's variable limit. On PostgreSQL, slices go through SQLAlchemy's
+        executemany of the dialect's UPSERT.
+
+        Unlike insert_price_history, the frame may contain multiple symbols and intervals.
+        Retention limits and the price cache are applied per (symbol, interval) exactly
+        as insert_price_history does.
+
+        Args:
+            data: TickerFrame containing price data with required columns:
+                  [timestamp, symbol, interval, open, high, low, close, volume]
+            batch_size: Number of rows sent to the driver per executemany call
+
+        Returns:
+            int: Number of rows written
+
+        Raises:
+            sqlalchemy.exc.DatabaseError: If database operations fail
+            KeyError: If required columns are missing from the DataFrame
+            ValueError: If the database is neither SQLite nor PostgreSQL
+        """
+        df = data.df.select(PRICE_HISTORY_COLUMNS)
+        if df.is_empty():
+            return 0
+
+        partitions = df.partition_by(["symbol", "interval"], as_dict=True, maintain_order=True)
+
+        # Snapshot rows go in first, so the new rows win on conflicting timestamps
+        for symbol, interval in partitions:
+            self._load_snapshot_series(symbol, Interval.from_str(interval))
+
+        self._write_price_rows(df, batch_size)
+
+        for (symbol, interval), partition in partitions.items():
+            interval = Interval.from_str(interval)
+            if self.price_cache is not None:
+                self.price_cache.insert(symbol, interval, partition)
+            if self.shared_prices is not None:
+                self.shared_prices.insert(symbol, interval, partition)
+            self._track_price_insert(symbol, interval, partition["timestamp"].min(), partition["timestamp"].max())
+
+        if self.rollup is not None:
+            self._insert_rollup_bars(df)
+
+        return len(df)
+
+    def _write_price_rows(self, df: pl.DataFrame, batch_size: int = 50_000) -> None:
+        """
+        Upserts a price_history shaped frame into the database in one transaction,
+        without touching the in-memory tiers or retention cutoffs.
+        """
+        df = df.select(PRICE_HISTORY_COLUMNS)
+        timestamp = df["timestamp"]
+        if timestamp.dtype.time_zone is not None:
+            # Timestamps are stored as the wall-clock value without the offset
+            timestamp = timestamp.dt.replace_time_zone(None)
+
+        dialect_name = self.write_engine.dialect.name
+        if dialect_name != "sqlite":
+            upsert = _price_history_upsert(dialect_name)
+            # A statement may not update the same row twice on PostgreSQL
+            df = df.with_columns(timestamp).unique(
+                subset=["symbol", "interval", "timestamp"], keep="last", maintain_order=True
+            )
+            with self.write_engine.begin() as connection:
+                for batch in df.iter_slices(batch_size):
+                    connection.execute(upsert, batch.to_dicts())
+            return
+
+        # SQLite's executemany runs the statement for every row without leaving C, so it is
+        # given the SQL and row tuples directly, with timestamps rendered the way
+        # SQLAlchemy stores DateTime values in SQLite
+        rendered = df.with_columns(timestamp.dt.strftime("%Y-%m-%d %H:%M:%S.%6f"))
+        with self.write_engine.begin() as connection:
+            for batch in rendered.iter_slices(batch_size):
+                connection.exec_driver_sql(PRICE_HISTORY_UPSERT_SQL, batch.rows())
+
+    def _insert_rollup_bars(self, df: pl.DataFrame) -> None:
+        """
+        Folds the 1-minute bars of `df` into the rollup and writes the bars it finalized.
+        """
+        assert self.rollup is not None
+        bars = self.rollup.update_frame(df)
+        if bars:
+            schema = ROLLUP_SCHEMA | {"timestamp": df.schema["timestamp"]}
+            self.bulk_insert_price_history(TickerFrame(pl.DataFrame(bars, schema=schema, orient="row")))
+
+    @instrumented()
+    def get_partial_bar(self, symbol: str, interval: Interval) -> dict | None:
+        """
+        Get the bar of a rolled-up interval that is still being built from 1-minute bars.
+
+        Finalized bars are stored in price history and returned by get_price_history;
+        the bar of the current bucket is only available here until its bucket closes.
+
+        Args:
+            symbol: Stock or crypto symbol
+            interval: One of the storage's rollup intervals
+
+        Returns:
+            dict | None: Dictionary with keys [timestamp, open, high, low, close, volume],
+                        or None if no 1-minute bar of the current bucket was inserted
+
+        Raises:
+            ValueError: If the storage was created without rollup_intervals
+        """
+        if self.rollup is None:
+            raise ValueError("Rollups are not enabled for this storage")
+        return self.rollup.partial(symbol, interval)
+
+    def _track_price_insert(
+        self,
+        symbol: str,
+        interval: Interval,
+        oldest_timestamp: dt.datetime,
+        latest_timestamp: dt.datetime,
+    ) -> None:
+        """
+        Records the retention cutoff for `symbol` and `interval` after an insert, and
+        marks the series as changed since the last snapshot.
+
+        Expired rows are hidden from reads and dropped from the in-memory tiers right away,
+        and are deleted from the database later by the retention engine.
+
+        Args:
+            symbol: Symbol whose data was inserted
+            interval: Interval of the data that was inserted
+            oldest_timestamp: Oldest timestamp of the data that was inserted
+            latest_timestamp: Most recent timestamp of the data that was inserted
+        """
+        with self._snapshot_dirty_lock:
+            self._snapshot_dirty.add((symbol, interval))
+
+        limit = self.price_storage_limit.get(interval)
+        if limit is None or limit.delta_datetime <= dt.timedelta(0):
+            return
+
+        key = {"symbol": symbol, "interval": str(interval)}
+        self.retention.mark(PriceHistory, key, latest_timestamp - limit.delta_datetime, oldest_timestamp)
+        cutoff = self.retention.cutoff(PriceHistory, key)
+        if self.price_cache is not None:
+            self.price_cache.truncate(symbol, cutoff, interval)
+        if self.shared_prices is not None:
+            self.shared_prices.truncate(symbol, cutoff, interval)
+
+    @instrumented()
     def get_price_history(
         self,
         symbol: str,
@@ -797,6 +1723,11 @@ class CentralStorage:
 
         Queries the price history database with optional filtering by time range.
         This method is thread-safe and can be called concurrently by multiple algorithms.
+        When the price cache is enabled and holds the requested range, the data is
+        served from memory without querying the database, and a range the cache holds
+        from before `start` on is served from it before the cold tier is consulted.
+        When the cold tier is enabled and the range reaches past the hot window,
+        archived rows are read from Parquet and combined with the database rows.
 
         Args:
             symbol: Stock or crypto symbol (e.g., 'AAPL', 'BTC-USD')
@@ -816,6 +1747,9 @@ class CentralStorage:
             sqlalchemy.exc.DatabaseError: If database query fails
             ValueError: If symbol is empty or invalid interval is provided
         """
+        # Every tier compares against naive UTC timestamps
+        start = None if start is None else naive_utc(start)
+        end = None if end is None else naive_utc(end)
         filters = [
             PriceHistory.symbol == symbol,
             PriceHistory.interval == str(interval),
@@ -825,22 +1759,153 @@ class CentralStorage:
         if end:
             filters.append(PriceHistory.timestamp <= end)
 
-        with Session(self.db_engine) as session:
-            assert session.bind is not None
-            db_query = session.query(PriceHistory).filter(*filters)
-            db_query_str = str(
-                db_query.statement.compile(
-                    dialect=session.bind.dialect,
-                    compile_kwargs={"literal_binds": True},
-                )
+        if self.price_cache is not None and interval is not None and start is not None:
+            # A range the cache holds from before its start is served before any other tier is consulted
+            cached = self.price_cache.get(symbol, interval, start, end, holds_start=True)
+            if cached is not None:
+                return TickerFrame(cached)
+
+        cutoff = self.retention.cutoff(PriceHistory, {"symbol": symbol, "interval": str(interval)})
+        if interval is not None and self._reads_cold_tier(symbol, interval, start, cutoff):
+            # The range reaches past the hot window. Rows that expired but were not archived
+            # yet are still in the database, so read it unmasked and let the hot copy win.
+            self._load_snapshot_series(symbol, interval)
+            hot = _read_frame(self.db_engine, PriceHistory, filters)
+            cold = self.cold_storage.read(symbol, str(interval), start, end)
+            frame = pl.concat([cold, hot]).unique(subset="timestamp", keep="last").sort("timestamp")
+            return TickerFrame(frame)
+
+        if self.price_cache is not None and interval is not None:
+            cached = self.price_cache.get(symbol, interval, start, end)
+            if cached is not None:
+                return TickerFrame(cached)
+
+        if cutoff is not None:
+            filters.append(PriceHistory.timestamp > cutoff)
+
+        self._load_snapshot_series(symbol, interval)
+        frame = _read_frame(self.db_engine, PriceHistory, filters)
+
+        return TickerFrame(frame)
+
+    def _reads_cold_tier(
+        self,
+        symbol: str,
+        interval: Interval,
+        start: dt.datetime | None,
+        cutoff: dt.datetime | None,
+    ) -> bool:
+        """
+        Returns True if a read of `symbol` and `interval` from `start` reaches past the
+        hot window into the cold tier.
+        """
+        return (
+            self.cold_storage is not None
+            and (cutoff is not None or self.cold_storage.has(symbol, str(interval)))
+            and (start is None or cutoff is None or start <= cutoff)
+        )
+
+    @instrumented()
+    def get_price_history_many(
+        self,
+        symbols: Sequence[str],
+        interval: Interval,
+        start: dt.datetime | None = None,
+        end: dt.datetime | None = None,
+        as_dict: bool = False,
+    ) -> TickerFrame | dict[str, TickerFrame]:
+        """
+        Retrieve price history of several symbols at one interval in a single read.
+
+        Returns the same rows as calling get_price_history once per symbol. Symbols served
+        by the price cache are read from memory, and all other symbols are read with one
+        query, rather than one query, connection checkout and frame per symbol. Symbols
+        whose range reaches into the cold tier are read as get_price_history does.
+
+        Args:
+            symbols: Stock or crypto symbols. Duplicates are ignored.
+            interval: Price data interval
+            start: Start datetime (inclusive) for time-based filtering
+            end: End datetime (inclusive) for time-based filtering
+            as_dict: If True, return one TickerFrame per symbol instead of one long frame.
+                     Frames read from the database are zero-copy slices of one result,
+                     and frames read from the cache are the cached frames.
+
+        Returns:
+            TickerFrame | dict[str, TickerFrame]: Price data with columns
+                [timestamp, symbol, interval, open, high, low, close, volume], sorted by
+                symbol and timestamp. With as_dict, a dictionary keyed by every requested
+                symbol, holding an empty frame for symbols without data.
+
+        Raises:
+            sqlalchemy.exc.DatabaseError: If database query fails
+        """
+        symbols = list(dict.fromkeys(symbols))
+        start = None if start is None else naive_utc(start)
+        end = None if end is None else naive_utc(end)
+        frames: dict[str, pl.DataFrame] = {}
+        cutoffs = {}
+        query_symbols = []
+        for symbol in symbols:
+            if self.price_cache is not None and start is not None:
+                cached = self.price_cache.get(symbol, interval, start, end, holds_start=True)
+                if cached is not None:
+                    frames[symbol] = cached
+                    continue
+            cutoff = self.retention.cutoff(PriceHistory, {"symbol": symbol, "interval": str(interval)})
+            if self._reads_cold_tier(symbol, interval, start, cutoff):
+                frames[symbol] = self.get_price_history(symbol, interval, start, end).df
+                continue
+            if self.price_cache is not None:
+                cached = self.price_cache.get(symbol, interval, start, end)
+                if cached is not None:
+                    frames[symbol] = cached
+                    continue
+            self._load_snapshot_series(symbol, interval)
+            query_symbols.append(symbol)
+            if cutoff is not None:
+                cutoffs[symbol] = cutoff
+
+        schema = _frame_schema(PriceHistory)
+        if query_symbols:
+            filters = [
+                PriceHistory.symbol.in_(query_symbols),
+                PriceHistory.interval == str(interval),
+            ]
+            if start:
+                filters.append(PriceHistory.timestamp >= start)
+            if end:
+                filters.append(PriceHistory.timestamp <= end)
+            queried = _read_frame(
+                self.db_engine, PriceHistory, filters, order_by=[PriceHistory.symbol, PriceHistory.timestamp]
             )
+            if cutoffs:
+                # Retention cutoffs differ per symbol, so they are applied after the single read
+                cutoff = pl.col("symbol").replace_strict(cutoffs, default=None, return_dtype=pl.Datetime("us"))
+                queried = queried.filter(cutoff.is_null() | (pl.col("timestamp") > cutoff))
 
-        frame = pl.read_database(query=db_query_str, connection=self.db_engine)
-        frame = frame.with_columns(pl.col("timestamp").str.to_datetime("%Y-%m-%d %H:%M:%S%.f"))
-        frame = frame.drop("id")
+            # Rows are sorted by symbol, so each symbol is a zero-copy slice of the result
+            offset = 0
+            for symbol, length in queried.group_by("symbol", maintain_order=True).len().iter_rows():
+                frames[symbol] = queried.slice(offset, length)
+                offset += length
 
-        return TickerFrame(frame)
+        if as_dict:
+            return {symbol: TickerFrame(frames.get(symbol, pl.DataFrame(schema=schema))) for symbol in symbols}
+
+        # Cached frames keep the timestamp type they were inserted with
+        parts = [frames[symbol].select(PRICE_HISTORY_COLUMNS).cast(schema) for symbol in sorted(frames)]
+        return TickerFrame(pl.concat(parts) if parts else pl.DataFrame(schema=schema))
+
+    def _archive_price_rows(self, rows: Sequence[sqlalchemy.Row]) -> None:
+        """
+        Writes price history rows that aged out of the database to the cold tier.
+        """
+        assert self.cold_storage is not None
+        frame = pl.DataFrame([row[1:] for row in rows], schema=_frame_schema(PriceHistory), orient="row")
+        self.cold_storage.write(frame)
 
+    @instrumented(rows="argument")
     def insert_account_performance(
         self,
         timestamp: dt.datetime,
@@ -865,26 +1930,18 @@ class CentralStorage:
 
         Side Effects:
             - Inserts or updates account performance record in database
-            - May delete old performance records if storage limit is exceeded
-            - Updates internal tracking of oldest timestamps
+            - Advances the retention cutoff for this interval, hiding expired records
+              until the retention engine deletes them
 
         Raises:
             sqlalchemy.exc.DatabaseError: If database operation fails
             ValueError: If timestamp is invalid or equity is negative
         """
 
-        # Clean up old data if storage limit is set
+        # Record the retention cutoff; expired rows are deleted by the retention engine
         if interval in self.performance_storage_limit and self.performance_storage_limit[interval].delta_datetime.days != -1:
             cutoff_time = timestamp - self.performance_storage_limit[interval].delta_datetime
-            if interval in self.account_performance_oldest_timestamp and timestamp - self.account_performance_oldest_timestamp[interval] > self.performance_storage_limit[interval].delta_datetime:
-                with Session(self.db_engine) as session:
-                    session.query(AccountPerformanceHistory).filter(
-                        AccountPerformanceHistory.timestamp <= cutoff_time,
-                        AccountPerformanceHistory.interval == interval
-                    ).delete()
-                    session.commit()
-
-            self.account_performance_oldest_timestamp[interval] = cutoff_time
+            self.retention.mark(AccountPerformanceHistory, {"interval": interval}, cutoff_time, timestamp)
 
         # Insert new performance data
         df = pl.DataFrame({
@@ -897,22 +1954,26 @@ class CentralStorage:
 
         stmt = insert(AccountPerformanceHistory).values(df.to_dicts())
         stmt = stmt.on_conflict_do_update(
-            index_elements=["timestamp", "interval"],
+            index_elements=["interval", "timestamp"],
             set_={
                 "equity": stmt.excluded.equity,
                 "return_percentage": stmt.excluded.return_percentage,
                 "return_absolute": stmt.excluded.return_absolute,
             },
         )
-        with Session(self.db_engine) as session:
+        with Session(self.write_engine) as session:
             session.execute(stmt)
             session.commit()
+        if self._downsampled is not None:
+            self._downsampled.invalidate(interval)
 
+    @instrumented()
     def get_account_performance_history(
         self,
         interval: str,
         start: dt.datetime | None = None,
         end: dt.datetime | None = None,
+        max_points: int | None = None,
     ) -> pl.DataFrame:
         """
         Retrieve account performance history from the central database.
@@ -924,6 +1985,11 @@ class CentralStorage:
             interval: Interval type to retrieve (e.g., '5min_1day', '1hour_1week')
             start: Optional start datetime (inclusive) for filtering
             end: Optional end datetime (inclusive) for filtering
+            max_points: If set, downsample the result to at most this many rows with
+                       Largest-Triangle-Three-Buckets over equity, for charting. The
+                       downsampled full history (no start or end) is kept until the
+                       next insert for this interval, so repeated reads do not scale
+                       with the number of stored rows.
 
         Returns:
             pl.DataFrame: Polars DataFrame with account performance data:
@@ -934,6 +2000,13 @@ class CentralStorage:
             sqlalchemy.exc.DatabaseError: If database query fails
             ValueError: If interval is invalid or empty
         """
+        cacheable = max_points is not None and start is None and end is None and self._downsampled is not None
+        if cacheable:
+            cached = self._downsampled.get(interval, max_points)
+            if cached is not None:
+                return cached
+            version = self._downsampled.version(interval)
+
         filters = [AccountPerformanceHistory.interval == interval]
 
         if start:
@@ -941,19 +2014,16 @@ class CentralStorage:
         if end:
             filters.append(AccountPerformanceHistory.timestamp <= end)
 
-        with Session(self.db_engine) as session:
-            assert session.bind is not None
-            db_query = session.query(AccountPerformanceHistory).filter(*filters).order_by(AccountPerformanceHistory.timestamp)
-            db_query_str = str(
-                db_query.statement.compile(
-                    dialect=session.bind.dialect,
-                    compile_kwargs={"literal_binds": True},
-                )
-            )
+        cutoff = self.retention.cutoff(AccountPerformanceHistory, {"interval": interval})
+        if cutoff is not None:
+            filters.append(AccountPerformanceHistory.timestamp > cutoff)
+
+        frame = _read_frame(self.db_engine, AccountPerformanceHistory, filters, order_by=[AccountPerformanceHistory.timestamp])
 
-        frame = pl.read_database(query=db_query_str, connection=self.db_engine)
-        frame = frame.with_columns(pl.col("timestamp").str.to_datetime("%Y-%m-%d %H:%M:%S%.f"))
-        frame = frame.drop("id")
+        if max_points is not None:
+            frame = lttb(frame, max_points)
+            if cacheable:
+                self._downsampled.put(interval, max_points, frame, version)
 
         return frame
 
@@ -1030,6 +2100,7 @@ class CentralStorage:
                 return_absolute=account_return_abs,
             )
 
+    @instrumented()
     def get_latest_account_performance(self, interval: str) -> dict | None:
         """
         Get the most recent account performance data for a specific interval.
@@ -1048,9 +2119,14 @@ class CentralStorage:
         Raises:
             sqlalchemy.exc.DatabaseError: If database query fails
         """
+        filters = [AccountPerformanceHistory.interval == interval]
+        cutoff = self.retention.cutoff(AccountPerformanceHistory, {"interval": interval})
+        if cutoff is not None:
+            filters.append(AccountPerformanceHistory.timestamp > cutoff)
+
         with Session(self.db_engine) as session:
             latest = session.query(AccountPerformanceHistory).filter(
-                AccountPerformanceHistory.interval == interval
+                *filters
             ).order_by(AccountPerformanceHistory.timestamp.desc()).first()
 
             if latest:
@@ -1063,6 +2139,7 @@ class CentralStorage:
                 }
             return None
 
+    @instrumented()
     def get_available_performance_intervals(self) -> list[str]:
         """
         Get all available performance tracking intervals configured for this storage.
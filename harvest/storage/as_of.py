@@ -0,0 +1,169 @@
+import datetime as dt
+import threading
+from typing import TYPE_CHECKING, Sequence
+
+import numpy as np
+import polars as pl
+
+from harvest.definitions import RuntimeData, TickerFrame
+from harvest.enum import Interval
+from harvest.storage.price_cache import datetime_to_micros, naive_utc
+from harvest.util.helper import interval_to_timedelta
+
+if TYPE_CHECKING:
+    from harvest.storage._base import CentralStorage
+
+"""
+This module provides the as-of view of CentralStorage used by backtests.
+
+An AsOfPriceView reads each (symbol, interval) series from the storage once and keeps
+the full frame in memory, along with its timestamps as int64 microseconds. Bars are
+labelled by their start time, so the latest bar that has closed at the simulation clock,
+RuntimeData.utc_timestamp, is the one labelled one interval before it. Every read is
+capped at that bar by a binary search over the timestamps, and returns a zero-copy slice
+of the stored frame. Algorithms reading through the view can never see a bar that had
+not closed at the current simulated time, and each read costs O(log n) regardless of how
+much history is loaded.
+"""
+
+
+class _Series:
+    """
+    Frame of one series, sorted by timestamp, and its timestamps in microseconds.
+    """
+
+    __slots__ = ("frame", "timestamp")
+
+    def __init__(self, frame: pl.DataFrame) -> None:
+        self.frame = frame
+        self.timestamp = frame["timestamp"].dt.epoch("us").to_numpy()
+
+    def slice(self, start: dt.datetime | None, end: dt.datetime) -> pl.DataFrame:
+        timestamp = self.timestamp
+        lo = 0 if start is None else int(np.searchsorted(timestamp, datetime_to_micros(start), side="left"))
+        hi = int(np.searchsorted(timestamp, datetime_to_micros(end), side="right"))
+        return self.frame.slice(lo, max(hi - lo, 0))
+
+
+class AsOfPriceView:
+    """
+    Read-only view of a CentralStorage's price history as of the simulation clock.
+
+    get_price_history and get_price_history_many have the same signatures as their
+    CentralStorage counterparts, but only return bars that have closed at
+    `stats.utc_timestamp`: those with a timestamp at most one interval before it.
+    The clock is read on every call, so advancing the RuntimeData moves the view
+    forward without any copying.
+
+    A series is read from the storage the first time it is queried. Rows inserted
+    into the storage afterwards are not seen until reload() is called.
+
+    Attributes:
+        storage: Storage the history is read from
+        stats: Runtime data holding the simulation clock
+    """
+
+    def __init__(self, storage: "CentralStorage", stats: RuntimeData) -> None:
+        self.storage = storage
+        self.stats = stats
+        self._series: dict[tuple[str, Interval], _Series] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def now(self) -> dt.datetime:
+        """
+        The simulation clock as a naive UTC datetime, as timestamps are stored.
+        """
+        return naive_utc(self.stats.utc_timestamp)
+
+    def _get_series(self, symbol: str, interval: Interval) -> _Series:
+        key = (symbol, interval)
+        with self._lock:
+            series = self._series.get(key)
+        if series is None:
+            series = _Series(self.storage.get_price_history(symbol, interval).df)
+            with self._lock:
+                series = self._series.setdefault(key, series)
+        return series
+
+    def load(self, symbols: Sequence[str], interval: Interval) -> None:
+        """
+        Reads the full history of `symbols` at `interval` ahead of the first query,
+        with one storage read.
+        """
+        frames = self.storage.get_price_history_many(symbols, interval, as_dict=True)
+        with self._lock:
+            for symbol, frame in frames.items():
+                self._series[(symbol, interval)] = _Series(frame.df)
+
+    def reload(self) -> None:
+        """
+        Drops the loaded series, so the next reads see rows inserted since they were loaded.
+        """
+        with self._lock:
+            self._series.clear()
+
+    def get_price_history(
+        self,
+        symbol: str,
+        interval: Interval,
+        start: dt.datetime | None = None,
+        end: dt.datetime | None = None,
+    ) -> TickerFrame:
+        """
+        Retrieve price history as of the simulation clock.
+
+        Args:
+            symbol: Stock or crypto symbol
+            interval: Price data interval
+            start: Start datetime (inclusive). If None, starts at the oldest stored row.
+            end: End datetime (inclusive). Capped at the last bar that closed by the
+                 simulation clock, which is also the default.
+            Aware datetimes are converted to UTC; naive ones are taken to be in UTC.
+
+        Returns:
+            TickerFrame: Zero-copy slice of the stored history with columns
+                        [timestamp, symbol, interval, open, high, low, close, volume],
+                        sorted by timestamp
+        """
+        # The bar labelled `now` is still open
+        latest = self.now - interval_to_timedelta(interval)
+        end = latest if end is None else min(naive_utc(end), latest)
+        start = None if start is None else naive_utc(start)
+        return TickerFrame(self._get_series(symbol, interval).slice(start, end))
+
+    def get_price_history_many(
+        self,
+        symbols: Sequence[str],
+        interval: Interval,
+        start: dt.datetime | None = None,
+        end: dt.datetime | None = None,
+        as_dict: bool = False,
+    ) -> TickerFrame | dict[str, TickerFrame]:
+        """
+        Retrieve price history of several symbols as of the simulation clock.
+
+        Args:
+            symbols: Stock or crypto symbols. Duplicates are ignored.
+            interval: Price data interval
+            start: Start datetime (inclusive)
+            end: End datetime (inclusive), capped at the last bar that closed by the simulation clock
+            as_dict: If True, return one TickerFrame per symbol instead of one long frame
+
+        Returns:
+            TickerFrame | dict[str, TickerFrame]: Price data as returned by
+                CentralStorage.get_price_history_many
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            # An empty frame with the storage's schema
+            return self.storage.get_price_history_many(symbols, interval, as_dict=as_dict)
+
+        missing = [symbol for symbol in symbols if (symbol, interval) not in self._series]
+        if missing:
+            self.load(missing, interval)
+
+        frames = {symbol: self.get_price_history(symbol, interval, start, end) for symbol in symbols}
+        if as_dict:
+            return frames
+        return TickerFrame(pl.concat([frames[symbol].df for symbol in sorted(frames)]))
@@ -0,0 +1,266 @@
+import asyncio
+import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Sequence
+
+import polars as pl
+
+from harvest.definitions import OrderSide, RuntimeData, TickerFrame, Transaction, TransactionFrame
+from harvest.enum import Interval
+from harvest.storage._base import CentralStorage, LocalAlgorithmStorage
+from harvest.storage.retention import RetentionReport
+from harvest.util.helper import debugger
+
+"""
+This module provides asyncio facades over CentralStorage and LocalAlgorithmStorage.
+
+Each facade owns a storage and a dedicated single-thread executor, and runs every
+storage call on that thread, so a slow disk or a remote database never blocks the
+event loop. The storage is also created on that thread, since SQLAlchemy gives each
+thread its own in-memory SQLite database.
+
+Every method schedules its call immediately and returns an asyncio.Future. Reads are
+awaited for their result. Writes may be awaited to wait until they are stored, or
+left alone to run in the background; failures of writes are logged either way. Calls
+run in the order they were made, so a read sees every write scheduled before it.
+"""
+
+
+def _log_write_failure(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        debugger.error(f"Background storage write failed: {future.exception()!r}")
+
+
+class _AsyncStorage:
+    def __init__(self, factory: Callable[[], Any], thread_name: str) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=thread_name)
+        self.storage = self._executor.submit(factory).result()
+
+    def _submit(self, function: Callable, *args, **kwargs) -> asyncio.Future:
+        return asyncio.wrap_future(
+            self._executor.submit(function, *args, **kwargs), loop=asyncio.get_running_loop()
+        )
+
+    def _write(self, function: Callable, *args, **kwargs) -> asyncio.Future:
+        future = self._submit(function, *args, **kwargs)
+        future.add_done_callback(_log_write_failure)
+        return future
+
+    async def drain(self) -> None:
+        """
+        Waits until every call scheduled so far has finished.
+        """
+        await self._submit(lambda: None)
+
+    async def close(self) -> None:
+        """
+        Waits for the scheduled calls, closes the storage and stops the executor.
+        """
+        try:
+            await self._submit(self.storage.close)
+        finally:
+            self._executor.shutdown(wait=True)
+
+
+class AsyncCentralStorage(_AsyncStorage):
+    """
+    Asyncio facade over a CentralStorage.
+
+    Attributes:
+        storage: The wrapped CentralStorage. Call it only through the facade, or from
+                 inside a call made through it, if the database is in memory.
+    """
+
+    def __init__(self, **kwargs) -> None:
+        """
+        Args:
+            **kwargs: Arguments of CentralStorage
+        """
+        super().__init__(lambda: CentralStorage(**kwargs), "central-storage")
+
+    def setup(self, stats: RuntimeData) -> asyncio.Future[None]:
+        """
+        Schedules CentralStorage.setup.
+        """
+        return self._write(self.storage.setup, stats)
+
+    def insert_price_history(self, data: TickerFrame) -> asyncio.Future[None]:
+        """
+        Schedules CentralStorage.insert_price_history.
+        """
+        return self._write(self.storage.insert_price_history, data)
+
+    def bulk_insert_price_history(self, data: TickerFrame, batch_size: int = 50_000) -> asyncio.Future[int]:
+        """
+        Schedules CentralStorage.bulk_insert_price_history.
+        """
+        return self._write(self.storage.bulk_insert_price_history, data, batch_size)
+
+    def insert_account_performance(
+        self,
+        timestamp: dt.datetime,
+        interval: str,
+        equity: float,
+        return_percentage: float = 0.0,
+        return_absolute: float = 0.0,
+    ) -> asyncio.Future[None]:
+        """
+        Schedules CentralStorage.insert_account_performance.
+        """
+        return self._write(
+            self.storage.insert_account_performance, timestamp, interval, equity, return_percentage, return_absolute
+        )
+
+    def update_account_performance_data(
+        self,
+        timestamp: dt.datetime,
+        account_equity: float,
+        previous_account_equity: float | None = None,
+    ) -> asyncio.Future[None]:
+        """
+        Schedules CentralStorage.update_account_performance_data.
+        """
+        return self._write(
+            self.storage.update_account_performance_data, timestamp, account_equity, previous_account_equity
+        )
+
+    def run_retention(self) -> asyncio.Future[RetentionReport]:
+        """
+        Schedules a retention pass (RetentionEngine.run_once).
+        """
+        return self._write(self.storage.retention.run_once)
+
+    def get_latest_price_timestamp(self, symbol: str, interval: Interval) -> asyncio.Future[dt.datetime | None]:
+        """
+        Schedules CentralStorage.get_latest_price_timestamp.
+        """
+        return self._submit(self.storage.get_latest_price_timestamp, symbol, interval)
+
+    def get_price_history(
+        self,
+        symbol: str,
+        interval: Interval | None = None,
+        start: dt.datetime | None = None,
+        end: dt.datetime | None = None,
+    ) -> asyncio.Future[TickerFrame]:
+        """
+        Schedules CentralStorage.get_price_history.
+        """
+        return self._submit(self.storage.get_price_history, symbol, interval, start, end)
+
+    def get_price_history_many(
+        self,
+        symbols: Sequence[str],
+        interval: Interval,
+        start: dt.datetime | None = None,
+        end: dt.datetime | None = None,
+        as_dict: bool = False,
+    ) -> asyncio.Future[TickerFrame | dict[str, TickerFrame]]:
+        """
+        Schedules CentralStorage.get_price_history_many.
+        """
+        return self._submit(self.storage.get_price_history_many, symbols, interval, start, end, as_dict)
+
+    def get_account_performance_history(
+        self,
+        interval: str,
+        start: dt.datetime | None = None,
+        end: dt.datetime | None = None,
+        max_points: int | None = None,
+    ) -> asyncio.Future[pl.DataFrame]:
+        """
+        Schedules CentralStorage.get_account_performance_history.
+        """
+        return self._submit(self.storage.get_account_performance_history, interval, start, end, max_points)
+
+    def get_latest_account_performance(self, interval: str) -> asyncio.Future[dict | None]:
+        """
+        Schedules CentralStorage.get_latest_account_performance.
+        """
+        return self._submit(self.storage.get_latest_account_performance, interval)
+
+
+class AsyncLocalAlgorithmStorage(_AsyncStorage):
+    """
+    Asyncio facade over a LocalAlgorithmStorage.
+
+    Attributes:
+        storage: The wrapped LocalAlgorithmStorage. Call it only through the facade, or
+                 from inside a call made through it, if the database is in memory.
+    """
+
+    def __init__(self, algorithm_name: str, **kwargs) -> None:
+        """
+        Args:
+            algorithm_name: Name of the algorithm
+            **kwargs: Other arguments of LocalAlgorithmStorage
+        """
+        super().__init__(lambda: LocalAlgorithmStorage(algorithm_name, **kwargs), f"storage-{algorithm_name}")
+
+    def insert_transaction(self, transaction: Transaction) -> asyncio.Future[None]:
+        """
+        Schedules LocalAlgorithmStorage.insert_transaction.
+        """
+        return self._write(self.storage.insert_transaction, transaction)
+
+    def insert_algorithm_performance(
+        self,
+        timestamp: dt.datetime,
+        interval: str,
+        equity: float,
+        return_percentage: float = 0.0,
+        return_absolute: float = 0.0,
+    ) -> asyncio.Future[None]:
+        """
+        Schedules LocalAlgorithmStorage.insert_algorithm_performance.
+        """
+        return self._write(
+            self.storage.insert_algorithm_performance, timestamp, interval, equity, return_percentage, return_absolute
+        )
+
+    def update_performance_data(
+        self,
+        timestamp: dt.datetime,
+        equity: float,
+        previous_equity: float | None = None,
+    ) -> asyncio.Future[None]:
+        """
+        Schedules LocalAlgorithmStorage.update_performance_data.
+        """
+        return self._write(self.storage.update_performance_data, timestamp, equity, previous_equity)
+
+    def flush(self) -> asyncio.Future[None]:
+        """
+        Schedules LocalAlgorithmStorage.flush.
+        """
+        return self._write(self.storage.flush)
+
+    def get_transaction_history(
+        self,
+        symbol: str,
+        side: OrderSide | None = None,
+        start: dt.datetime | None = None,
+        end: dt.datetime | None = None,
+    ) -> asyncio.Future[TransactionFrame]:
+        """
+        Schedules LocalAlgorithmStorage.get_transaction_history.
+        """
+        return self._submit(self.storage.get_transaction_history, symbol, side, start, end)
+
+    def get_algorithm_performance_history(
+        self,
+        interval: str,
+        start: dt.datetime | None = None,
+        end: dt.datetime | None = None,
+        max_points: int | None = None,
+    ) -> asyncio.Future[pl.DataFrame]:
+        """
+        Schedules LocalAlgorithmStorage.get_algorithm_performance_history.
+        """
+        return self._submit(self.storage.get_algorithm_performance_history, interval, start, end, max_points)
+
+    def get_latest_performance(self, interval: str) -> asyncio.Future[dict | None]:
+        """
+        Schedules LocalAlgorithmStorage.get_latest_performance.
+        """
+        return self._submit(self.storage.get_latest_performance, interval)
@@ -0,0 +1,143 @@
+import datetime as dt
+import os
+import threading
+import uuid
+
+import polars as pl
+
+from harvest.storage.encoding import PriceEncoding
+from harvest.util.helper import path_to_symbol, symbol_to_path
+
+"""
+This module provides the Parquet cold tier used by CentralStorage.
+
+Price history that ages out of the database is appended to Parquet files laid out as
+hive partitions:
+
+    <root>/symbol=<symbol>/interval=<interval>/date=<YYYY-MM-DD>/data.parquet
+
+Reads scan a single symbol/interval directory and filter on the `date` partition
+column and the timestamp, so polars only opens the files of the days a query
+touches. Each file holds the timestamp and OHLCV columns; symbol and interval come
+from the path. Symbols are percent-encoded in the path (see symbol_to_path), so a
+symbol such as BRK/B stays a single directory. Files are written with the storage's
+PriceEncoding, which must stay the same for the life of a directory.
+"""
+
+COLD_COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+COLD_SCHEMA = {"timestamp": pl.Datetime("us"), **{name: pl.Float64 for name in COLD_COLUMNS[1:]}}
+
+_FILE_NAME = "data.parquet"
+
+
+class ParquetColdStorage:
+    """
+    Append-only Parquet store for price history, partitioned by symbol, interval and date.
+
+    Attributes:
+        root: Directory holding the partitions
+        encoding: Encoding of the OHLCV columns in the files
+    """
+
+    def __init__(self, root: str, encoding: PriceEncoding | None = None) -> None:
+        self.root = root
+        self.encoding = encoding or PriceEncoding()
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        # (symbol, interval) pairs with at least one partition, including ones written by earlier runs
+        self._keys: set[tuple[str, str]] = set()
+        for symbol_dir in os.listdir(root):
+            symbol_path = os.path.join(root, symbol_dir)
+            if not symbol_dir.startswith("symbol=") or not os.path.isdir(symbol_path):
+                continue
+            for interval_dir in os.listdir(symbol_path):
+                if interval_dir.startswith("interval="):
+                    self._keys.add(
+                        (path_to_symbol(symbol_dir.removeprefix("symbol=")), interval_dir.removeprefix("interval="))
+                    )
+
+    def _series_path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, f"symbol={symbol_to_path(symbol)}", f"interval={interval}")
+
+    def has(self, symbol: str, interval: str) -> bool:
+        """
+        Returns True if any data is stored for `symbol` and `interval`.
+        """
+        return (symbol, interval) in self._keys
+
+    def write(self, df: pl.DataFrame) -> None:
+        """
+        Appends price_history shaped rows to their partitions.
+
+        Rows whose timestamp already exists in a partition replace the stored row.
+        Each partition file is rewritten through a temporary file and renamed into
+        place, so readers never see a partially written file.
+
+        Args:
+            df: Rows with columns [timestamp, symbol, interval, open, high, low, close, volume]
+        """
+        if df.is_empty():
+            return
+
+        df = df.with_columns(pl.col("timestamp").dt.date().alias("date"))
+        with self._lock:
+            for (symbol, interval, date), partition in df.partition_by(
+                ["symbol", "interval", "date"], as_dict=True
+            ).items():
+                directory = os.path.join(self._series_path(symbol, interval), f"date={date.isoformat()}")
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, _FILE_NAME)
+
+                partition = partition.select(COLD_COLUMNS).cast(COLD_SCHEMA)
+                if os.path.exists(path):
+                    partition = pl.concat([self.encoding.decode(pl.read_parquet(path)), partition])
+                partition = partition.unique(subset="timestamp", keep="last").sort("timestamp")
+
+                temp_path = os.path.join(directory, f".{uuid.uuid4().hex}.tmp")
+                self.encoding.encode(partition).write_parquet(temp_path)
+                os.replace(temp_path, path)
+                self._keys.add((symbol, interval))
+
+    def read(
+        self,
+        symbol: str,
+        interval: str,
+        start: dt.datetime | None = None,
+        end: dt.datetime | None = None,
+    ) -> pl.DataFrame:
+        """
+        Returns the stored rows of `symbol` and `interval` between `start` and `end`, inclusive.
+
+        Returns:
+            pl.DataFrame: Rows with columns [timestamp, symbol, interval, open, high, low, close, volume],
+                          sorted by timestamp
+        """
+        if not self.has(symbol, interval):
+            frame = pl.DataFrame(schema=COLD_SCHEMA)
+        else:
+            # An explicit schema avoids opening a file just to infer it
+            scan = pl.scan_parquet(
+                os.path.join(self._series_path(symbol, interval), "**", _FILE_NAME),
+                schema=self.encoding.schema(COLD_SCHEMA),
+                hive_partitioning=True,
+                hive_schema={"symbol": pl.String, "interval": pl.String, "date": pl.Date},
+            )
+            # Filters on the partition column prune whole files before any data is read
+            if start is not None:
+                scan = scan.filter(pl.col("date") >= start.date())
+            if end is not None:
+                scan = scan.filter(pl.col("date") <= end.date())
+            # Each file is encoded on its own, so delta timestamps restart on every date
+            scan = self.encoding.decode(scan, partition_by="date")
+            if start is not None:
+                scan = scan.filter(pl.col("timestamp") >= start)
+            if end is not None:
+                scan = scan.filter(pl.col("timestamp") <= end)
+            frame = scan.select(COLD_COLUMNS).sort("timestamp").collect()
+
+        return frame.select(
+            "timestamp",
+            pl.lit(symbol, dtype=pl.String).alias("symbol"),
+            pl.lit(interval, dtype=pl.String).alias("interval"),
+            *COLD_COLUMNS[1:],
+        )
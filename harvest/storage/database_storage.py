@@ -2,6 +2,7 @@ import datetime as dt
 
 import polars as pl
 from sqlalchemy import Column, DateTime, Float, String, create_engine, select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from harvest.storage import Storage
@@ -34,9 +35,24 @@ class Asset(Base):
         open: {self.open_} \t high: {self.high} \t low: {self.low} \t close: {self.close} \t volume: {self.volume}"""
 
 
+ASSET_PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+ASSET_SCHEMA = {"timestamp": pl.Datetime("us"), **{name: pl.Float64 for name in ASSET_PRICE_COLUMNS}}
+
+# INSERT constructs supporting ON CONFLICT DO UPDATE, by dialect name
+_UPSERT = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
 class DBStorage(Storage):
     """
     An extension of the basic storage that saves data in SQL tables.
+
+    Writes are set-based: each batch of candles is sent as one INSERT ... ON CONFLICT
+    DO UPDATE statement executed for many rows, so storing a frame costs one round
+    trip per batch instead of a SELECT and an INSERT or UPDATE per candle. SQLite and
+    PostgreSQL are supported.
     """
 
     def __init__(self, db: str = "sqlite:///data.db") -> None:
@@ -45,36 +61,74 @@ class DBStorage(Storage):
         directory.
         """
         engine = create_engine(db)
+        if engine.dialect.name not in _UPSERT:
+            raise ValueError(f"DBStorage supports {', '.join(_UPSERT)} databases, got {engine.dialect.name}")
         Base.metadata.create_all(engine)
+        self.engine = engine
         self.Session = sessionmaker(engine)
 
+        table = Asset.__table__
+        stmt = _UPSERT[engine.dialect.name](table)
+        self._upsert = stmt.on_conflict_do_update(
+            index_elements=[table.c.symbol, table.c.interval, table.c.timestamp],
+            set_={name: stmt.excluded[name] for name in ASSET_PRICE_COLUMNS},
+        )
+        # SQLite's executemany runs the statement for every row without leaving C, so it
+        # is given the compiled SQL and row tuples directly. Elsewhere SQLAlchemy batches
+        # the rows into multi-row VALUES statements.
+        if engine.dialect.name == "sqlite":
+            compiled = self._upsert.compile(dialect=engine.dialect)
+            self._upsert_sql = str(compiled)
+            self._upsert_columns = list(compiled.positiontup)
+
     def store(
         self,
         symbol: str,
         interval: str,
         data: pl.DataFrame,
         remove_duplicate: bool = True,
-    ) -> None:
+        batch_size: int = 10_000,
+    ) -> int:
         """
         Stores the stock data in the storage dictionary in SQL tables.
         :symbol: a stock or crypto
         :interval: the interval between each data point, must be atleast
              1 minute
-        :data: a polars dataframe that has stock data and has a datetime
-            index
-        """
+        :data: a polars dataframe with a timestamp column and the open, high, low,
+            close and volume columns. Symbol and interval columns, if any, are
+            replaced by the arguments. Rows already stored for a timestamp are
+            updated.
+        :batch_size: the number of rows sent to the database per statement
 
-        if not data.is_empty():
-            data.columns = [column[1] for column in data.columns]
-            data.rename(columns={"open": "open_"}, inplace=True)
-            data["timestamp"] = data.index
-            data["symbol"] = symbol
-            data["interval"] = interval
-            data = data.to_dict("records")
+        :returns: the number of rows written
+        """
 
-            with self.Session.begin() as session:
-                [session.merge(Asset(**d)) for d in data]
-                session.commit()
+        if data.is_empty():
+            return 0
+
+        # A statement may not update the same row twice on PostgreSQL
+        data = data.unique(subset="timestamp", keep="last", maintain_order=True).select(
+            "timestamp",
+            pl.lit(symbol, dtype=pl.String).alias("symbol"),
+            pl.lit(str(interval), dtype=pl.String).alias("interval"),
+            *ASSET_PRICE_COLUMNS,
+        )
+
+        with self.engine.begin() as connection:
+            if self.engine.dialect.name == "sqlite":
+                timestamp = data["timestamp"]
+                if timestamp.dtype.time_zone is not None:
+                    # SQLite stores the wall-clock value without the offset
+                    timestamp = timestamp.dt.replace_time_zone(None)
+                # Rendered the way SQLAlchemy stores DateTime values in SQLite
+                data = data.with_columns(timestamp.dt.strftime("%Y-%m-%d %H:%M:%S.%6f"))
+                for batch in data.select(self._upsert_columns).iter_slices(batch_size):
+                    connection.exec_driver_sql(self._upsert_sql, batch.rows())
+            else:
+                for batch in data.iter_slices(batch_size):
+                    connection.execute(self._upsert, batch.to_dicts())
+
+        return len(data)
 
     def aggregate(self, symbol: str, base: str, target: str, remove_duplicate: bool = True) -> None:
         """
@@ -91,8 +145,7 @@ class DBStorage(Storage):
         """
 
         with self.Session.begin() as session:
-            session.execute(Asset.__table__.delete().where(Asset.symbol == symbol and Asset.interval == interval))
-            session.commit()
+            session.execute(Asset.__table__.delete().where(Asset.symbol == symbol, Asset.interval == str(interval)))
 
     def load(
         self,
@@ -103,46 +156,38 @@ class DBStorage(Storage):
     ) -> pl.DataFrame:
         """
         Loads the stock data given the symbol and interval. May return only
-        a subset of the data if start and end are given and there is a gap
-        between the last data point and the given end datetime.
-
-        If the specified interval does not exist, it will attempt to generate it by
-        aggregating data.
+        a subset of the data if start and end are given.
         :symbol: a stock or crypto
         :interval: the interval between each data point, must be at least
              1 minute
         :start: a datetime object
+        :end: a datetime object
+
+        :returns: a polars dataframe with columns [timestamp, symbol, interval, open,
+            high, low, close, volume] sorted by timestamp, or None if nothing is stored
         """
 
-        with self.Session.begin() as session:
-            data = session.execute(
-                select(
-                    Asset.timestamp,
-                    Asset.open_,
-                    Asset.close,
-                    Asset.high,
-                    Asset.low,
-                    Asset.volume,
-                ).where(Asset.symbol == symbol and Asset.interval == interval)
-            )
-            data = pl.DataFrame(data, columns=["timestamp", "open_", "close", "high", "low", "volume"])
-
-            if data.empty:
-                return None
-
-            data.set_index("timestamp", inplace=True)
-            data.index = data.index.tz_localize(tz="UTC")
-            data.rename(columns={"open_": "open"}, inplace=True)
-            data.columns = pd.MultiIndex.from_product([[symbol], data.columns])
-
-        # If the start and end are not defined, then set them to the
-        # beginning and end of the data.
-        if start is None:
-            start = data.index[0]
-        if end is None:
-            end = data.index[-1]
-
-        return data.loc[(data.index >= start) & (data.index <= end)]
+        filters = [Asset.symbol == symbol, Asset.interval == str(interval)]
+        if start is not None:
+            filters.append(Asset.timestamp >= start)
+        if end is not None:
+            filters.append(Asset.timestamp <= end)
+
+        table = Asset.__table__
+        query = select(table.c.timestamp, *(table.c[name] for name in ASSET_PRICE_COLUMNS)).where(*filters)
+        with self.engine.connect() as connection:
+            rows = connection.execute(query.order_by(table.c.timestamp)).fetchall()
+
+        if not rows:
+            return None
+
+        data = pl.DataFrame(rows, schema=ASSET_SCHEMA, orient="row")
+        return data.select(
+            "timestamp",
+            pl.lit(symbol, dtype=pl.String).alias("symbol"),
+            pl.lit(str(interval), dtype=pl.String).alias("interval"),
+            *ASSET_PRICE_COLUMNS,
+        )
 
     def data_range(self, symbol: str, interval: str) -> tuple[dt.datetime]:
         return super().data_range(symbol, interval)
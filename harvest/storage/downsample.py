@@ -0,0 +1,115 @@
+import threading
+from typing import Hashable
+
+import numpy as np
+import polars as pl
+
+"""
+This module provides the downsampling used to serve performance history to charts.
+
+lttb() implements Largest-Triangle-Three-Buckets: the series is split into equal
+buckets, and from each bucket the row forming the largest triangle with the row kept
+from the previous bucket and the average of the next bucket is kept. Peaks and
+troughs survive, unlike with plain decimation, and the result is made of real rows.
+
+DownsampleCache holds downsampled series so that repeated reads of an unchanged
+series cost O(max_points) regardless of how many rows are stored. Owners invalidate
+a key whenever they write to its series.
+"""
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Returns the indices of the points LTTB keeps from the series (x, y).
+
+    Args:
+        x: Sorted x values
+        y: y values
+        max_points: Maximum number of points to keep. Values below 3 keep the first
+                    and last points only.
+
+    Returns:
+        np.ndarray: Sorted indices into x and y, including the first and last point
+    """
+    n = len(x)
+    if n <= max(max_points, 2):
+        return np.arange(n)
+    if max_points < 3:
+        return np.array([0, n - 1])
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    every = (n - 2) / (max_points - 2)
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0] = 0
+    a = 0
+    for i in range(max_points - 2):
+        # Average of the next bucket; the last bucket is followed by the last point
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        average_x = x[next_start:next_end].mean()
+        average_y = y[next_start:next_end].mean()
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        area = np.abs((x[a] - average_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (average_y - y[a]))
+        a = start + int(area.argmax())
+        indices[i + 1] = a
+    indices[-1] = n - 1
+    return indices
+
+
+def lttb(df: pl.DataFrame, max_points: int, x: str = "timestamp", y: str = "equity") -> pl.DataFrame:
+    """
+    Downsamples the rows of `df` with LTTB over columns `x` and `y`.
+
+    Args:
+        df: Frame sorted by `x`
+        max_points: Maximum number of rows to return
+        x: Column used as the x axis. Datetime columns are compared as microseconds.
+        y: Column used as the y axis
+
+    Returns:
+        pl.DataFrame: At most max_points rows of `df`, in their original order
+    """
+    if len(df) <= max_points:
+        return df
+    indices = lttb_indices(df[x].to_physical().to_numpy(), df[y].to_numpy(), max_points)
+    return df[indices]
+
+
+class DownsampleCache:
+    """
+    Downsampled series keyed by (series key, max_points).
+
+    Each series key has a version that invalidate() bumps. Readers take the version
+    before reading the series and pass it to put(), so a result computed from data
+    that changed during the read is never stored.
+    """
+
+    def __init__(self) -> None:
+        self._frames: dict[tuple[Hashable, int], pl.DataFrame] = {}
+        self._versions: dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, max_points: int) -> pl.DataFrame | None:
+        with self._lock:
+            return self._frames.get((key, max_points))
+
+    def version(self, key: Hashable) -> int:
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    def put(self, key: Hashable, max_points: int, df: pl.DataFrame, version: int) -> None:
+        with self._lock:
+            if self._versions.get(key, 0) == version:
+                self._frames[(key, max_points)] = df
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Drops every downsampled version of the series `key`.
+        """
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            for entry in [entry for entry in self._frames if entry[0] == key]:
+                del self._frames[entry]
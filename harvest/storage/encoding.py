@@ -0,0 +1,126 @@
+from dataclasses import dataclass
+
+import numpy as np
+import polars as pl
+
+"""
+This module provides the compact encodings of stored OHLCV data.
+
+By default every price tier keeps open, high, low and close as float64, symbol and
+interval as strings, and timestamps as absolute int64 microseconds. A PriceEncoding
+trades some of that for space:
+
+- prices="float32" halves the size of the price columns, at about 7 significant digits
+- prices="scaled" stores prices as integers in units of 1 / price_scale, which is exact
+  for prices quoted to that precision and compresses better on disk
+- categorical=True dictionary-encodes symbol and interval
+- delta_timestamps=True stores each timestamp as the difference from the previous one,
+  which is nearly constant for bar data and compresses to almost nothing on disk
+
+Frames are encoded when written to a tier and decoded when read, so readers always see
+the regular price_history layout. Volume is left as float64.
+
+The in-memory price cache keeps timestamps absolute, since reads binary-search them,
+and supports float32 prices only: scaled integers would need int64 to hold any price
+and save nothing there.
+"""
+
+PRICE_COLUMNS = ("open", "high", "low", "close")
+
+_PRICE_DTYPES = ("float64", "float32", "scaled")
+
+
+@dataclass(frozen=True)
+class PriceEncoding:
+    """
+    How OHLCV data is encoded in a storage tier.
+
+    Attributes:
+        prices: "float64", "float32" or "scaled"
+        price_scale: Number of units per 1.0 of price when prices is "scaled"
+        categorical: Store symbol and interval as polars Categorical
+        delta_timestamps: Store timestamps as int64 microsecond differences from the
+                          previous row. Frames must be sorted by timestamp.
+    """
+
+    prices: str = "float64"
+    price_scale: int = 10_000
+    categorical: bool = False
+    delta_timestamps: bool = False
+
+    def __post_init__(self) -> None:
+        if self.prices not in _PRICE_DTYPES:
+            raise ValueError(f"prices must be one of {', '.join(_PRICE_DTYPES)}, got {self.prices}")
+        if self.price_scale <= 0:
+            raise ValueError(f"price_scale must be positive, got {self.price_scale}")
+
+    @property
+    def numpy_dtype(self) -> type[np.floating]:
+        """
+        Dtype of the price arrays of the in-memory price cache.
+        """
+        return np.float32 if self.prices == "float32" else np.float64
+
+    def encode(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Encodes the columns of a price_history shaped frame. Columns the encoding does
+        not cover, and columns missing from the frame, are left as they are.
+        """
+        names = df.columns
+        columns = []
+        for name in PRICE_COLUMNS:
+            if name not in names or self.prices == "float64":
+                continue
+            if self.prices == "float32":
+                columns.append(pl.col(name).cast(pl.Float32))
+            else:
+                columns.append((pl.col(name) * self.price_scale).round().cast(pl.Int64))
+        if self.categorical:
+            columns.extend(pl.col(name).cast(pl.Categorical()) for name in ("symbol", "interval") if name in names)
+        if self.delta_timestamps:
+            timestamp = pl.col("timestamp").dt.epoch("us")
+            columns.append(timestamp.diff().fill_null(timestamp.first()).alias("timestamp"))
+        return df.with_columns(columns) if columns else df
+
+    def decode(self, df: pl.DataFrame | pl.LazyFrame, partition_by: str | None = None) -> pl.DataFrame | pl.LazyFrame:
+        """
+        Restores a frame written with encode() to the price_history layout.
+
+        Args:
+            df: Encoded frame
+            partition_by: Column identifying the frames that were encoded separately
+                          and concatenated, so delta timestamps restart on each of them
+        """
+        names = df.collect_schema().names()
+        columns = []
+        for name in PRICE_COLUMNS:
+            if name not in names or self.prices == "float64":
+                continue
+            if self.prices == "float32":
+                columns.append(pl.col(name).cast(pl.Float64))
+            else:
+                columns.append(pl.col(name) / self.price_scale)
+        if self.categorical:
+            columns.extend(pl.col(name).cast(pl.String) for name in ("symbol", "interval") if name in names)
+        if self.delta_timestamps:
+            timestamp = pl.col("timestamp").cum_sum()
+            if partition_by is not None:
+                timestamp = timestamp.over(partition_by)
+            columns.append(timestamp.cast(pl.Datetime("us")))
+        return df.with_columns(columns) if columns else df
+
+    def schema(self, schema: dict[str, pl.DataType]) -> dict[str, pl.DataType]:
+        """
+        Returns the schema of encoded frames, given the schema of decoded ones.
+        """
+        encoded = dict(schema)
+        for name in PRICE_COLUMNS:
+            if name in encoded and self.prices != "float64":
+                encoded[name] = pl.Float32 if self.prices == "float32" else pl.Int64
+        if self.categorical:
+            for name in ("symbol", "interval"):
+                if name in encoded:
+                    encoded[name] = pl.Categorical()
+        if self.delta_timestamps and "timestamp" in encoded:
+            encoded["timestamp"] = pl.Int64
+        return encoded
@@ -0,0 +1,281 @@
+import datetime as dt
+import os
+import threading
+import uuid
+
+import polars as pl
+
+from harvest.definitions import TickerFrame
+from harvest.enum import Interval
+from harvest.storage.cold_storage import COLD_COLUMNS, COLD_SCHEMA
+from harvest.storage.encoding import PriceEncoding
+from harvest.util.helper import debugger, interval_string_to_enum
+
+"""
+This module provides a polars-native file storage for price history.
+
+Each (symbol, interval) series is a directory of append-only Arrow IPC segments:
+
+    <save_dir>/<symbol>/<interval>/<sequence>.arrow
+
+Every insert writes only the new bars, as a new segment with the next sequence
+number, instead of rewriting the whole series. When a series has more than
+`max_segments` segments they are compacted into one: the merged segment is written
+through a temporary file and renamed over the newest segment, then the older ones
+are removed. Segments are read in sequence order and the last row of a timestamp
+wins, so a crash at any point of a compaction leaves the same data readable.
+
+Opening a FileStorage only lists the directories. The segments of a series are read
+the first time the series is queried, and the merged frame is kept in memory for the
+reads that follow. Segments are written with the storage's PriceEncoding, which must
+stay the same for the life of a directory.
+
+Files written by the CSVStorage and PickleStorage of earlier versions,
+<save_dir>/<symbol>@<interval>.csv and .pickle, are still read. Their rows come
+before the segments of the series, and new rows are only ever written as segments.
+"""
+
+_SUFFIX = ".arrow"
+_LEGACY_SUFFIXES = (".csv", ".pickle")
+
+# Number of segments a series may have before inserts compact it
+DEFAULT_MAX_SEGMENTS = 32
+
+
+def _read_legacy_file(path: str) -> pl.DataFrame:
+    """
+    Reads a CSV or pickle file written by the CSVStorage or PickleStorage of earlier
+    versions into a frame with the COLD_SCHEMA columns.
+    """
+    import pandas as pd
+
+    if path.endswith(".csv"):
+        data = pd.read_csv(path, index_col=0, parse_dates=True)
+    else:
+        data = pd.read_pickle(path)
+    if isinstance(data.columns, pd.MultiIndex):
+        # The pandas storages kept the (symbol, column) column layout
+        data = data.droplevel(0, axis=1)
+
+    # Naive timestamps were written in UTC
+    timestamp = pd.to_datetime(data.index, utc=True).tz_convert(None)
+    frame = pl.DataFrame(
+        {
+            "timestamp": timestamp.to_numpy().astype("datetime64[us]"),
+            **{name: data[name].to_numpy(dtype="float64") for name in COLD_COLUMNS[1:]},
+        }
+    )
+    return frame.cast(COLD_SCHEMA)
+
+
+class FileStorage:
+    """
+    Append-only Arrow IPC file storage for price history.
+
+    Attributes:
+        save_dir: Directory holding the series
+        max_segments: Number of segments a series may have before it is compacted
+        encoding: Encoding of the OHLCV columns in the segments
+    """
+
+    def __init__(
+        self,
+        save_dir: str = "data",
+        max_segments: int = DEFAULT_MAX_SEGMENTS,
+        encoding: PriceEncoding | None = None,
+    ) -> None:
+        """
+        Args:
+            save_dir: Directory to save data to. Created if it does not exist. Series
+                      written by earlier runs, including the CSV and pickle files of
+                      earlier versions, are picked up, but not read until queried.
+            max_segments: Number of segments a series may have before an insert compacts
+                          it into one
+            encoding: Encoding of the OHLCV columns in the segments. Defaults to float64
+                      prices and absolute timestamps.
+        """
+        self.save_dir = save_dir
+        self.max_segments = max_segments
+        self.encoding = encoding or PriceEncoding()
+        os.makedirs(save_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Sequence numbers of the segments of each (symbol, interval) series, ascending
+        self._segments: dict[tuple[str, str], list[int]] = {}
+        # Merged frames of the series that were read
+        self._frames: dict[tuple[str, str], pl.DataFrame] = {}
+        # CSV and pickle files of earlier versions, read before the segments of their series
+        self._legacy: dict[tuple[str, str], str] = {}
+
+        for symbol in os.listdir(save_dir):
+            symbol_path = os.path.join(save_dir, symbol)
+            if os.path.isfile(symbol_path) and symbol_path.endswith(_LEGACY_SUFFIXES):
+                self._add_legacy_file(symbol_path)
+                continue
+            if not os.path.isdir(symbol_path):
+                continue
+            for interval in os.listdir(symbol_path):
+                interval_path = os.path.join(symbol_path, interval)
+                if not os.path.isdir(interval_path):
+                    continue
+                sequences = sorted(
+                    int(file_name.removesuffix(_SUFFIX))
+                    for file_name in os.listdir(interval_path)
+                    if file_name.endswith(_SUFFIX)
+                )
+                if sequences:
+                    self._segments[(symbol, interval)] = sequences
+
+    def _add_legacy_file(self, path: str) -> None:
+        name = os.path.splitext(os.path.basename(path))[0]
+        symbol, _, interval = name.rpartition("@")
+        try:
+            interval = str(interval_string_to_enum(interval))
+        except ValueError:
+            symbol = ""
+        if not symbol:
+            debugger.warning(f"Ignoring {path}, which is not named <symbol>@<interval>")
+            return
+        self._legacy[(symbol, interval)] = path
+
+    def _segment_path(self, symbol: str, interval: str, sequence: int) -> str:
+        return os.path.join(self.save_dir, symbol, interval, f"{sequence:010d}{_SUFFIX}")
+
+    def _write_segment(self, path: str, encoded: pl.DataFrame) -> None:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        temp_path = os.path.join(directory, f".{uuid.uuid4().hex}.tmp")
+        encoded.write_ipc(temp_path, compression="uncompressed")
+        os.replace(temp_path, path)
+
+    def _read_segments(self, symbol: str, interval: str) -> pl.DataFrame:
+        parts = []
+        legacy_path = self._legacy.get((symbol, interval))
+        if legacy_path is not None:
+            parts.append(_read_legacy_file(legacy_path))
+        for sequence in self._segments.get((symbol, interval), []):
+            parts.append(self.encoding.decode(pl.read_ipc(self._segment_path(symbol, interval, sequence))))
+        if not parts:
+            return pl.DataFrame(schema=COLD_SCHEMA)
+        frame = pl.concat(parts)
+        return frame.unique(subset="timestamp", keep="last", maintain_order=True).sort("timestamp")
+
+    def _load(self, symbol: str, interval: str) -> pl.DataFrame:
+        key = (symbol, interval)
+        frame = self._frames.get(key)
+        if frame is None:
+            frame = self._frames[key] = self._read_segments(symbol, interval)
+        return frame
+
+    def symbols(self) -> list[tuple[str, str]]:
+        """
+        Returns the (symbol, interval) pairs that have stored data.
+        """
+        with self._lock:
+            return sorted(self._segments.keys() | self._legacy.keys())
+
+    def insert_price_history(self, data: TickerFrame) -> None:
+        """
+        Appends price data to its series.
+
+        Only the new rows are written, as one segment per (symbol, interval) in the
+        frame. Rows whose timestamp is already stored replace the stored row.
+
+        Args:
+            data: TickerFrame containing price data with columns:
+                  [timestamp, symbol, interval, open, high, low, close, volume]
+        """
+        df = data.df
+        if df.is_empty():
+            return
+
+        with self._lock:
+            for (symbol, interval), series in df.partition_by(["symbol", "interval"], as_dict=True).items():
+                encoded = self.encoding.encode(series.select(COLD_COLUMNS).cast(COLD_SCHEMA))
+                key = (symbol, interval)
+                sequences = self._segments.setdefault(key, [])
+                sequence = sequences[-1] + 1 if sequences else 0
+                self._write_segment(self._segment_path(symbol, interval, sequence), encoded)
+                sequences.append(sequence)
+
+                if key in self._frames:
+                    # The decoded rows, so reads match what a restarted storage would return
+                    self._frames[key] = (
+                        pl.concat([self._frames[key], self.encoding.decode(encoded)])
+                        .unique(subset="timestamp", keep="last", maintain_order=True)
+                        .sort("timestamp")
+                    )
+                if len(sequences) > self.max_segments:
+                    self._compact(symbol, interval)
+
+    def get_price_history(
+        self,
+        symbol: str,
+        interval: Interval,
+        start: dt.datetime | None = None,
+        end: dt.datetime | None = None,
+    ) -> TickerFrame:
+        """
+        Returns the stored rows of `symbol` and `interval` between `start` and `end`, inclusive.
+
+        Returns:
+            TickerFrame: Rows with columns [timestamp, symbol, interval, open, high, low, close, volume],
+                         sorted by timestamp
+        """
+        interval = str(interval)
+        with self._lock:
+            frame = self._load(symbol, interval)
+
+        if start is not None:
+            frame = frame.filter(pl.col("timestamp") >= start)
+        if end is not None:
+            frame = frame.filter(pl.col("timestamp") <= end)
+
+        return TickerFrame(
+            frame.select(
+                "timestamp",
+                pl.lit(symbol, dtype=pl.String).alias("symbol"),
+                pl.lit(interval, dtype=pl.String).alias("interval"),
+                *COLD_COLUMNS[1:],
+            )
+        )
+
+    def compact(self, symbol: str | None = None, interval: Interval | None = None) -> None:
+        """
+        Merges the segments of each series into one.
+
+        Args:
+            symbol: If set, only compact the series of this symbol
+            interval: If set, only compact the series of this interval
+        """
+        with self._lock:
+            for key_symbol, key_interval in list(self._segments):
+                if symbol is not None and key_symbol != symbol:
+                    continue
+                if interval is not None and key_interval != str(interval):
+                    continue
+                self._compact(key_symbol, key_interval)
+
+    def _compact(self, symbol: str, interval: str) -> None:
+        sequences = self._segments[(symbol, interval)]
+        if len(sequences) < 2:
+            return
+        frame = self._load(symbol, interval)
+        # The merged segment replaces the newest one, so it is read last until the older ones are gone
+        self._write_segment(self._segment_path(symbol, interval, sequences[-1]), self.encoding.encode(frame))
+        for sequence in sequences[:-1]:
+            os.remove(self._segment_path(symbol, interval, sequence))
+        del sequences[:-1]
+
+    def reset(self, symbol: str, interval: Interval) -> None:
+        """
+        Removes all stored data of `symbol` and `interval`.
+        """
+        interval = str(interval)
+        with self._lock:
+            for sequence in self._segments.pop((symbol, interval), []):
+                os.remove(self._segment_path(symbol, interval, sequence))
+            legacy_path = self._legacy.pop((symbol, interval), None)
+            if legacy_path is not None:
+                os.remove(legacy_path)
+            self._frames.pop((symbol, interval), None)
@@ -0,0 +1,346 @@
+import datetime as dt
+import threading
+
+import numpy as np
+import polars as pl
+
+from harvest.definitions import TimeDelta
+from harvest.enum import Interval
+from harvest.util.helper import interval_to_timedelta
+
+"""
+This module provides the in-memory price cache used by CentralStorage.
+
+Each (symbol, interval) pair gets its own PriceRingBuffer: a set of NumPy column
+arrays holding the most recent candles in timestamp order. Reads are answered with
+a binary search over the timestamp column and never touch the database, while the
+database remains the write-through persistence tier behind the cache.
+
+Timestamps are stored as naive UTC wall-clock values in int64 microseconds, the same
+representation SQLite ends up storing, so frames served from the cache are identical
+to frames read back from the database.
+"""
+
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+# Capacity used when an interval has no (or an unlimited) retention limit configured
+DEFAULT_BUFFER_CAPACITY = 10_000
+
+_EPOCH = dt.datetime(1970, 1, 1)
+_MICROSECOND = dt.timedelta(microseconds=1)
+
+
+def naive_utc(value: dt.datetime) -> dt.datetime:
+    """
+    Converts an aware datetime to UTC and drops the offset, as timestamps are stored.
+    Naive datetimes are taken to be in UTC already.
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(dt.timezone.utc)
+    return value.replace(tzinfo=None)
+
+
+def datetime_to_micros(timestamp: dt.datetime) -> int:
+    """
+    Converts a datetime to microseconds since the epoch. Aware datetimes are converted
+    to UTC first, see naive_utc.
+    """
+    return (naive_utc(timestamp) - _EPOCH) // _MICROSECOND
+
+
+def buffer_capacity(interval: Interval, storage_limit: TimeDelta | None) -> int:
+    """
+    Returns the number of candles needed to hold `storage_limit` worth of `interval` data.
+    """
+    if storage_limit is None:
+        return DEFAULT_BUFFER_CAPACITY
+    limit = storage_limit.delta_datetime
+    if limit <= dt.timedelta(0):
+        return DEFAULT_BUFFER_CAPACITY
+    return limit // interval_to_timedelta(interval) + 1
+
+
+def frame_to_arrays(df: pl.DataFrame) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    Converts a price_history shaped frame to sorted, unique int64 microsecond timestamps
+    and aligned float64 OHLCV arrays. Of rows sharing a timestamp, the last one is kept.
+    """
+    timestamp_col = df["timestamp"]
+    if isinstance(timestamp_col.dtype, pl.Datetime) and timestamp_col.dtype.time_zone is not None:
+        timestamp_col = timestamp_col.dt.replace_time_zone(None)
+    timestamp = timestamp_col.cast(pl.Datetime("us")).cast(pl.Int64).to_numpy()
+    columns = {name: df[name].cast(pl.Float64).to_numpy() for name in PRICE_COLUMNS}
+
+    if len(timestamp) > 1 and not np.all(timestamp[1:] > timestamp[:-1]):
+        # Sort and keep the last occurrence of duplicated timestamps
+        reversed_timestamp = timestamp[::-1]
+        _, index = np.unique(reversed_timestamp, return_index=True)
+        index = len(timestamp) - 1 - index
+        timestamp = timestamp[index]
+        columns = {name: values[index] for name, values in columns.items()}
+
+    return timestamp, columns
+
+
+def arrays_to_frame(
+    symbol: str,
+    interval: Interval,
+    timestamp: np.ndarray,
+    columns: dict[str, np.ndarray],
+) -> pl.DataFrame:
+    """
+    Builds a frame in the layout of the price_history table,
+    [timestamp, symbol, interval, open, high, low, close, volume], from column arrays.
+    """
+    count = len(timestamp)
+    return pl.DataFrame(
+        [
+            pl.Series("timestamp", timestamp.view("datetime64[us]")),
+            pl.repeat(symbol, count, dtype=pl.String, eager=True).alias("symbol"),
+            pl.repeat(str(interval), count, dtype=pl.String, eager=True).alias("interval"),
+            # Prices kept as float32 are widened, so every tier returns the same schema
+            *(pl.Series(name, columns[name]).cast(pl.Float64) for name in PRICE_COLUMNS),
+        ]
+    )
+
+
+class PriceRingBuffer:
+    """
+    Columnar buffer of the most recent candles for a single (symbol, interval) pair.
+
+    The buffer allocates twice its capacity and appends at the write cursor. When the
+    cursor reaches the end of the allocation, the live rows are copied into a fresh
+    allocation, so appends are amortized O(1) and the live rows are always contiguous.
+    Rows that have been written are never modified in place (upserts and compaction
+    build new arrays), which makes the views returned by `slice_arrays` safe to hand
+    out without copying.
+
+    Attributes:
+        symbol: Symbol this buffer holds
+        interval: Interval this buffer holds
+        capacity: Maximum number of candles kept in memory
+        price_dtype: Dtype of the open, high, low and close arrays. Volume is always float64.
+        evicted_until: Timestamp (in microseconds) of the newest candle that was dropped
+                       because the buffer was full, or None if nothing was evicted.
+                       Ranges reaching back to or before this point must be read from
+                       the persistence tier.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        interval: Interval,
+        capacity: int,
+        price_dtype: type[np.floating] = np.float64,
+    ) -> None:
+        self.symbol = symbol
+        self.interval = interval
+        self.capacity = max(capacity, 1)
+        self.price_dtype = price_dtype
+        self.evicted_until: int | None = None
+
+        self._start = 0
+        self._end = 0
+        self._allocate(2 * self.capacity)
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def _allocate(self, size: int) -> None:
+        self._timestamp = np.empty(size, dtype=np.int64)
+        self._columns = {
+            name: np.empty(size, dtype=np.float64 if name == "volume" else self.price_dtype) for name in PRICE_COLUMNS
+        }
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamp[self._start : self._end]
+
+    def _replace(self, timestamp: np.ndarray, columns: dict[str, np.ndarray]) -> None:
+        """
+        Swaps in a new set of live rows, evicting the oldest rows beyond capacity.
+        """
+        overflow = len(timestamp) - self.capacity
+        if overflow > 0:
+            self.evicted_until = int(timestamp[overflow - 1])
+            timestamp = timestamp[overflow:]
+            columns = {name: values[overflow:] for name, values in columns.items()}
+
+        count = len(timestamp)
+        self._allocate(2 * self.capacity)
+        self._timestamp[:count] = timestamp
+        for name in PRICE_COLUMNS:
+            self._columns[name][:count] = columns[name]
+        self._start = 0
+        self._end = count
+
+    def append(self, timestamp: np.ndarray, columns: dict[str, np.ndarray]) -> None:
+        """
+        Adds candles to the buffer. Candles whose timestamps already exist in the
+        buffer replace the existing values, mirroring the UPSERT in the database.
+
+        Args:
+            timestamp: Sorted, unique int64 microsecond timestamps
+            columns: Float64 arrays for each of the OHLCV columns, aligned with `timestamp`
+        """
+        count = len(timestamp)
+        if count == 0:
+            return
+
+        if len(self) and timestamp[0] <= self._timestamp[self._end - 1]:
+            # Slow path: new data overlaps or precedes the cached data, so merge
+            live = self.timestamps
+            keep = ~np.isin(live, timestamp)
+            merged_timestamp = np.concatenate([live[keep], timestamp])
+            order = np.argsort(merged_timestamp, kind="stable")
+            merged_columns = {
+                name: np.concatenate([self._columns[name][self._start : self._end][keep], columns[name]])[order]
+                for name in PRICE_COLUMNS
+            }
+            self._replace(merged_timestamp[order], merged_columns)
+            return
+
+        if count >= self.capacity:
+            if len(self):
+                self.evicted_until = int(self._timestamp[self._end - 1])
+            self._replace(timestamp, columns)
+            return
+
+        # Fast path: evict from the head, then write into the unused tail of the allocation
+        overflow = len(self) + count - self.capacity
+        if overflow > 0:
+            self.evicted_until = int(self._timestamp[self._start + overflow - 1])
+            self._start += overflow
+
+        if self._end + count > len(self._timestamp):
+            # The old allocation stays alive until the copy completes, so views are safe here
+            self._replace(
+                self.timestamps,
+                {name: self._columns[name][self._start : self._end] for name in PRICE_COLUMNS},
+            )
+
+        self._timestamp[self._end : self._end + count] = timestamp
+        for name in PRICE_COLUMNS:
+            self._columns[name][self._end : self._end + count] = columns[name]
+        self._end += count
+
+    def truncate(self, cutoff: int) -> None:
+        """
+        Drops all candles with a timestamp less than or equal to `cutoff`.
+        """
+        self._start += int(np.searchsorted(self.timestamps, cutoff, side="right"))
+        if self.evicted_until is not None and self.evicted_until <= cutoff:
+            # Everything that was evicted has now expired from the persistence tier as well
+            self.evicted_until = None
+
+    def covers(self, start: int | None) -> bool:
+        """
+        Returns True if every persisted candle at or after `start` is held in memory.
+        """
+        if self.evicted_until is None:
+            return True
+        return start is not None and start > self.evicted_until
+
+    def slice_arrays(self, start: int | None, end: int | None) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """
+        Returns zero-copy views of the candles between `start` and `end`, inclusive.
+        """
+        live = self.timestamps
+        lo = 0 if start is None else int(np.searchsorted(live, start, side="left"))
+        hi = len(live) if end is None else int(np.searchsorted(live, end, side="right"))
+        lo += self._start
+        hi = max(hi + self._start, lo)
+        return self._timestamp[lo:hi], {name: self._columns[name][lo:hi] for name in PRICE_COLUMNS}
+
+    def to_frame(self, start: int | None = None, end: int | None = None) -> pl.DataFrame:
+        """
+        Returns the candles between `start` and `end` in the same layout as the
+        price_history table: [timestamp, symbol, interval, open, high, low, close, volume]
+        """
+        timestamp, columns = self.slice_arrays(start, end)
+        return arrays_to_frame(self.symbol, self.interval, timestamp, columns)
+
+
+class PriceCache:
+    """
+    Collection of PriceRingBuffers keyed by (symbol, interval).
+
+    A key is only present once data for it has been inserted through the cache. Since
+    CentralStorage starts from an empty database, a present key means the buffer has
+    seen every row written for that key and can answer reads on its own, except for
+    ranges that reach into rows evicted for capacity reasons.
+
+    With a float32 `price_dtype` the open, high, low and close columns take half the
+    memory, and reads return them widened back to float64.
+    """
+
+    def __init__(
+        self,
+        price_storage_limit: dict[Interval, TimeDelta],
+        price_dtype: type[np.floating] = np.float64,
+    ) -> None:
+        self.price_storage_limit = price_storage_limit
+        self.price_dtype = price_dtype
+        self.buffers: dict[tuple[str, Interval], PriceRingBuffer] = {}
+        self._lock = threading.Lock()
+
+    def _get_buffer(self, symbol: str, interval: Interval) -> PriceRingBuffer:
+        key = (symbol, interval)
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            capacity = buffer_capacity(interval, self.price_storage_limit.get(interval))
+            buffer = PriceRingBuffer(symbol, interval, capacity, self.price_dtype)
+            self.buffers[key] = buffer
+        return buffer
+
+    def insert(self, symbol: str, interval: Interval, df: pl.DataFrame) -> None:
+        """
+        Appends a price_history shaped frame for a single symbol and interval.
+        """
+        timestamp, columns = frame_to_arrays(df)
+        with self._lock:
+            self._get_buffer(symbol, interval).append(timestamp, columns)
+
+    def truncate(self, symbol: str, cutoff: dt.datetime, interval: Interval | None = None) -> None:
+        """
+        Drops cached candles with a timestamp less than or equal to `cutoff`.
+        If `interval` is None, all intervals of `symbol` are truncated.
+        """
+        cutoff_micros = datetime_to_micros(cutoff)
+        with self._lock:
+            for (buffer_symbol, buffer_interval), buffer in self.buffers.items():
+                if buffer_symbol == symbol and (interval is None or buffer_interval == interval):
+                    buffer.truncate(cutoff_micros)
+
+    def get(
+        self,
+        symbol: str,
+        interval: Interval,
+        start: dt.datetime | None = None,
+        end: dt.datetime | None = None,
+        holds_start: bool = False,
+    ) -> pl.DataFrame | None:
+        """
+        Returns the cached candles between `start` and `end`, inclusive.
+
+        Args:
+            holds_start: If True, also return None unless a cached candle is at or before
+                         `start`, so that no older tier can hold candles of the range
+
+        Returns:
+            pl.DataFrame | None: The candles, or None if the cache cannot answer the
+                                 query and the caller must read from the database.
+        """
+        start_micros = None if start is None else datetime_to_micros(start)
+        end_micros = None if end is None else datetime_to_micros(end)
+        with self._lock:
+            buffer = self.buffers.get((symbol, interval))
+            if buffer is None or not buffer.covers(start_micros):
+                return None
+            if holds_start and (start_micros is None or not len(buffer) or buffer.timestamps[0] > start_micros):
+                return None
+            return buffer.to_frame(start_micros, end_micros)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.buffers.clear()
@@ -0,0 +1,234 @@
+import datetime as dt
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Sequence
+
+import sqlalchemy
+from sqlalchemy.orm import DeclarativeBase
+
+from harvest.storage.metrics import StorageMetrics
+from harvest.util.helper import debugger
+
+"""
+This module provides the retention engine used by CentralStorage.
+
+Inserts only record a retention cutoff for the (table, key) they wrote to, which is
+a dictionary update and does not depend on how much history has accumulated. Rows at
+or before a cutoff are hidden from reads immediately, and are physically deleted later
+by RetentionEngine.run_once(), in batches of bounded size so that no single transaction
+holds the database for long. run_once() can be called periodically by the owner, or
+run on a schedule by a background thread with start().
+
+Tables with an archive callback are moved rather than deleted: each batch of expired
+rows is passed to the callback before it is deleted, in the same transaction, so a
+failing callback leaves the rows in place for the next run.
+"""
+
+
+@dataclass
+class RetentionReport:
+    """
+    Result of a RetentionEngine.run_once() call.
+
+    Attributes:
+        rows: Number of rows deleted, keyed by (table name, *key values)
+        complete: False if the batch budget ran out before all pending deletes finished
+    """
+
+    rows: dict[tuple[str, ...], int] = field(default_factory=dict)
+    complete: bool = True
+
+    @property
+    def total(self) -> int:
+        return sum(self.rows.values())
+
+
+class RetentionEngine:
+    """
+    Tracks retention cutoffs per (table, key) and deletes expired rows in bounded batches.
+
+    A key is a set of column values identifying one series in a table, such as
+    {"symbol": "AAPL", "interval": "MIN_1"} for price_history. The tables must have
+    an `id` primary key and a `timestamp` column.
+
+    Attributes:
+        db_engine: Engine the rows are deleted from
+        batch_size: Maximum number of rows deleted per transaction
+        total_reclaimed: Number of rows deleted since the engine was created
+        archive: Callbacks receiving expired rows (including `id`) of a table before
+                 they are deleted, keyed by ORM model
+        metrics: If set, every run_once() call is recorded here as "retention_run", and
+                 deleted rows are counted as "retention_deleted_rows"
+    """
+
+    def __init__(self, db_engine: sqlalchemy.Engine, batch_size: int = 10_000) -> None:
+        self.db_engine = db_engine
+        self.batch_size = batch_size
+        self.total_reclaimed = 0
+        self.archive: dict[type[DeclarativeBase], Callable[[Sequence[sqlalchemy.Row]], None]] = {}
+        self.metrics: StorageMetrics | None = None
+
+        self._cutoffs: dict[tuple, dt.datetime] = {}
+        self._dirty: set[tuple] = set()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def _key(model: type[DeclarativeBase], key: dict[str, str]) -> tuple:
+        return (model, *key.items())
+
+    def mark(
+        self,
+        model: type[DeclarativeBase],
+        key: dict[str, str],
+        cutoff: dt.datetime,
+        oldest_inserted: dt.datetime | None = None,
+    ) -> None:
+        """
+        Records that rows of `key` at or before `cutoff` have expired.
+
+        Cutoffs only move forward. The key is scheduled for compaction if the cutoff
+        advanced, or if `oldest_inserted` shows that expired rows were just written.
+
+        Args:
+            model: ORM model of the table
+            key: Column values identifying the series
+            cutoff: Rows with a timestamp less than or equal to this are expired
+            oldest_inserted: Oldest timestamp written by the insert that triggered this call
+        """
+        cutoff = cutoff.replace(tzinfo=None)
+        entry = self._key(model, key)
+        with self._lock:
+            current = self._cutoffs.get(entry)
+            if current is None or cutoff > current:
+                self._cutoffs[entry] = cutoff
+                self._dirty.add(entry)
+            elif oldest_inserted is not None and oldest_inserted.replace(tzinfo=None) <= current:
+                self._dirty.add(entry)
+
+    def cutoff(self, model: type[DeclarativeBase], key: dict[str, str]) -> dt.datetime | None:
+        """
+        Returns the current cutoff of `key`, or None if nothing has expired.
+        Reads should exclude rows with a timestamp less than or equal to this value.
+        """
+        with self._lock:
+            return self._cutoffs.get(self._key(model, key))
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of keys with deletes that have not run yet.
+        """
+        with self._lock:
+            return len(self._dirty)
+
+    @property
+    def running(self) -> bool:
+        """
+        True if the background thread started by start() is running.
+        """
+        return self._thread is not None
+
+    def run_once(self, max_batches: int | None = None) -> RetentionReport:
+        """
+        Deletes expired rows for every key marked since the last run.
+
+        Args:
+            max_batches: Maximum number of delete transactions to run. If None, runs
+                         until all pending deletes are done. Keys that could not be
+                         finished stay pending for the next call.
+
+        Returns:
+            RetentionReport: Rows deleted per key
+
+        Raises:
+            sqlalchemy.exc.DatabaseError: If database operation fails
+        """
+        begin = time.perf_counter_ns()
+        with self._lock:
+            work = [(entry, self._cutoffs[entry]) for entry in self._dirty]
+
+        report = RetentionReport()
+        batches = 0
+        for entry, cutoff in work:
+            model, *key = entry
+            table = model.__table__
+            conditions = [table.c.timestamp <= cutoff, *(table.c[name] == value for name, value in key)]
+            archive = self.archive.get(model)
+            expired = sqlalchemy.select(table.c.id).where(*conditions).limit(self.batch_size)
+            stmt = sqlalchemy.delete(table).where(table.c.id.in_(expired.scalar_subquery()))
+            archive_query = sqlalchemy.select(table).where(*conditions).limit(self.batch_size)
+
+            deleted = 0
+            finished = False
+            while max_batches is None or batches < max_batches:
+                with self.db_engine.begin() as connection:
+                    if archive is None:
+                        count = connection.execute(stmt).rowcount
+                    else:
+                        rows = connection.execute(archive_query).fetchall()
+                        if rows:
+                            archive(rows)
+                            ids = [row.id for row in rows]
+                            connection.execute(sqlalchemy.delete(table).where(table.c.id.in_(ids)))
+                        count = len(rows)
+                batches += 1
+                deleted += count
+                if count < self.batch_size:
+                    finished = True
+                    break
+
+            if deleted:
+                report.rows[(table.name, *(value for _, value in key))] = deleted
+            if finished:
+                with self._lock:
+                    if self._cutoffs[entry] == cutoff:
+                        self._dirty.discard(entry)
+            else:
+                report.complete = False
+                break
+
+        with self._lock:
+            self.total_reclaimed += report.total
+        if self.metrics is not None:
+            self.metrics.count("retention_deleted_rows", report.total)
+            self.metrics.record("retention_run", time.perf_counter_ns() - begin, report.total)
+        if report.total:
+            debugger.debug(f"Retention reclaimed {report.total} rows: {report.rows}")
+        return report
+
+    def start(self, period: float) -> None:
+        """
+        Runs run_once() every `period` seconds in a daemon thread.
+
+        Raises:
+            ValueError: If the database is an in-memory SQLite database. Each thread gets
+                        its own connection, and with it its own empty in-memory database.
+        """
+        if self.db_engine.dialect.name == "sqlite" and self.db_engine.url.database in (None, "", ":memory:"):
+            raise ValueError("Background retention requires a file-backed or server database")
+        if self._thread is not None:
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(period,), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the background thread started by start(), if any.
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self, period: float) -> None:
+        while not self._stop_event.wait(period):
+            try:
+                self.run_once()
+            except sqlalchemy.exc.SQLAlchemyError as e:
+                debugger.error(f"Retention run failed: {e}")
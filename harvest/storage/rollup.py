@@ -0,0 +1,198 @@
+import datetime as dt
+import threading
+from typing import Sequence
+
+import polars as pl
+
+from harvest.enum import Interval, IntervalUnit
+
+"""
+This module provides the incremental bar rollup used by CentralStorage.
+
+Every 1-minute bar inserted into storage is folded into one partial bar per higher
+interval, which is O(1) per interval: the partial keeps the running open, high, low
+and volume of the bars it has absorbed, plus the newest bar on its own. Keeping the
+newest bar separate lets brokers revise the current candle (the same timestamp
+inserted again with new values) without counting it twice.
+
+A partial bar is finalized when a 1-minute bar from a later bucket arrives. The first
+bucket seen for a symbol is only finalized if its first minute was seen too, so that
+starting mid-bucket (after a restart, or a backfill that begins mid-day) never
+produces a truncated bar.
+"""
+
+ROLLUP_INTERVALS = (Interval.MIN_5, Interval.MIN_15, Interval.MIN_30, Interval.HR_1, Interval.DAY_1)
+
+ROLLUP_SCHEMA = {
+    "timestamp": pl.Datetime("us"),
+    "symbol": pl.String,
+    "interval": pl.String,
+    "open": pl.Float64,
+    "high": pl.Float64,
+    "low": pl.Float64,
+    "close": pl.Float64,
+    "volume": pl.Float64,
+}
+
+
+def bucket_start(timestamp: dt.datetime, interval: Interval) -> dt.datetime:
+    """
+    Returns the start of the `interval` bar that `timestamp` falls in.
+
+    Raises:
+        ValueError: If `interval` is not a whole number of minutes
+    """
+    value = interval.interval_value
+    match interval.unit:
+        case IntervalUnit.MIN:
+            return timestamp.replace(minute=timestamp.minute - timestamp.minute % value, second=0, microsecond=0)
+        case IntervalUnit.HR:
+            return timestamp.replace(hour=timestamp.hour - timestamp.hour % value, minute=0, second=0, microsecond=0)
+        case IntervalUnit.DAY:
+            return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Interval {interval} cannot be built from 1-minute bars")
+
+
+class _PartialBar:
+    """
+    Running aggregate of the 1-minute bars of one bucket.
+
+    `last` is the newest bar, stored as (timestamp, open, high, low, close, volume).
+    The other fields aggregate every other bar of the bucket.
+    """
+
+    __slots__ = ("start", "complete", "open_timestamp", "open", "high", "low", "volume", "last")
+
+    def __init__(self, start: dt.datetime, complete: bool, bar: tuple) -> None:
+        self.start = start
+        self.complete = complete
+        self.open_timestamp: dt.datetime | None = None
+        self.open = 0.0
+        self.high: float | None = None
+        self.low: float | None = None
+        self.volume = 0.0
+        self.last = bar
+
+    def _fold(self, bar: tuple) -> None:
+        timestamp, open, high, low, _, volume = bar
+        if self.open_timestamp is None or timestamp < self.open_timestamp:
+            self.open_timestamp, self.open = timestamp, open
+        self.high = high if self.high is None else max(self.high, high)
+        self.low = low if self.low is None else min(self.low, low)
+        self.volume += volume
+
+    def add(self, bar: tuple) -> None:
+        if bar[0] == self.last[0]:
+            # Revision of the newest bar replaces it
+            self.last = bar
+        elif bar[0] > self.last[0]:
+            self._fold(self.last)
+            self.last = bar
+        else:
+            # A late bar from the middle of the bucket
+            self._fold(bar)
+
+    def bar(self) -> tuple:
+        timestamp, open, high, low, close, volume = self.last
+        if self.open_timestamp is not None and self.open_timestamp < timestamp:
+            open = self.open
+        if self.high is not None:
+            high = max(self.high, high)
+            low = min(self.low, low)
+        return (self.start, open, high, low, close, self.volume + volume)
+
+
+class BarRollup:
+    """
+    Builds higher-interval bars from 1-minute bars as they are inserted.
+
+    Attributes:
+        intervals: Intervals that are built, in ascending order
+    """
+
+    def __init__(self, intervals: Sequence[Interval] = ROLLUP_INTERVALS) -> None:
+        """
+        Args:
+            intervals: Intervals to build. Each must be a whole number of minutes greater than one.
+
+        Raises:
+            ValueError: If an interval cannot be built from 1-minute bars
+        """
+        for interval in intervals:
+            if interval.unit == IntervalUnit.SEC or interval == Interval.MIN_1:
+                raise ValueError(f"Interval {interval} cannot be built from 1-minute bars")
+        self.intervals = tuple(sorted(set(intervals)))
+        self._partials: dict[tuple[str, Interval], _PartialBar] = {}
+        self._lock = threading.Lock()
+
+    def update(
+        self,
+        symbol: str,
+        timestamp: dt.datetime,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float,
+    ) -> list[tuple[Interval, tuple]]:
+        """
+        Folds one 1-minute bar into the partial bar of every interval.
+
+        Bars that belong to a bucket that was already finalized are ignored.
+
+        Returns:
+            list[tuple[Interval, tuple]]: Bars finalized by this update, as
+                (interval, (timestamp, open, high, low, close, volume))
+        """
+        bar = (timestamp, open, high, low, close, volume)
+        finished = []
+        with self._lock:
+            for interval in self.intervals:
+                start = bucket_start(timestamp, interval)
+                key = (symbol, interval)
+                partial = self._partials.get(key)
+                if partial is None or start > partial.start:
+                    if partial is not None and partial.complete:
+                        finished.append((interval, partial.bar()))
+                    # A bucket that directly follows a tracked one is complete from its first bar
+                    self._partials[key] = _PartialBar(start, partial is not None or timestamp == start, bar)
+                elif start == partial.start:
+                    partial.add(bar)
+        return finished
+
+    def update_frame(self, df: pl.DataFrame) -> list[tuple]:
+        """
+        Folds the 1-minute bars of a price_history shaped frame into the partial bars.
+
+        Rows of other intervals are skipped.
+
+        Args:
+            df: Rows with columns [timestamp, symbol, interval, open, high, low, close, volume]
+
+        Returns:
+            list[tuple]: Finalized bars as rows with the same columns, with interval set
+                         to the built interval. Use ROLLUP_SCHEMA to build a frame.
+        """
+        minute = str(Interval.MIN_1)
+        # Frames are small on the live insert path, so plain rows beat polars' per-call overhead
+        rows = [row for row in df.select(ROLLUP_SCHEMA.keys()).iter_rows() if row[2] == minute]
+        rows.sort(key=lambda row: row[0])
+
+        finished = []
+        for timestamp, symbol, _, open, high, low, close, volume in rows:
+            for interval, bar in self.update(symbol, timestamp, open, high, low, close, volume):
+                finished.append((bar[0], symbol, str(interval), *bar[1:]))
+        return finished
+
+    def partial(self, symbol: str, interval: Interval) -> dict | None:
+        """
+        Returns the bar of `interval` that is still being built for `symbol`, or None.
+
+        Returns:
+            dict | None: Dictionary with keys [timestamp, open, high, low, close, volume]
+        """
+        with self._lock:
+            partial = self._partials.get((symbol, interval))
+            if partial is None:
+                return None
+            return dict(zip(("timestamp", "open", "high", "low", "close", "volume"), partial.bar()))
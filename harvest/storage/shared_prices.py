@@ -0,0 +1,441 @@
+import datetime as dt
+import hashlib
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import polars as pl
+
+from harvest.definitions import TickerFrame, TimeDelta
+from harvest.enum import Interval
+from harvest.storage.price_cache import (
+    PRICE_COLUMNS,
+    arrays_to_frame,
+    buffer_capacity,
+    datetime_to_micros,
+    frame_to_arrays,
+)
+from harvest.util.helper import debugger
+
+"""
+This module provides a price store in shared memory, so that algorithms running in
+worker processes can read the bars published by the Client without a database round
+trip or a copy.
+
+Every (symbol, interval) series has two kinds of POSIX shared memory segments:
+
+- A header holding [seq, generation, start, end, capacity] as int64 values.
+- Data segments, one per generation, holding a timestamp column followed by the
+  OHLCV columns. Like PriceRingBuffer, a generation allocates twice the capacity.
+
+There is a single writer. New bars are written into the unused tail of the current
+generation, and only then are start/end published. Anything that would modify rows
+that were already published (revisions of existing bars, compaction when the tail
+runs out) writes a new generation segment instead, publishes it, and unlinks the old
+one. Published rows are therefore never modified, which lets both the writer and
+the readers wrap them in NumPy views and hand them to polars without copying.
+
+The header is published with a seqlock: the writer makes `seq` odd while it updates
+the header and even again afterwards. Readers take views of the rows the header
+points to while they hold an even `seq`, and retry if `seq` changed by the time the
+views are taken. Only the header has to be read consistently: the rows it points to
+never change, and the generation a view points into stays mapped as long as the view
+is alive, even after the writer has replaced it.
+"""
+
+# Header layout, in int64 fields
+_SEQ = 0
+_GENERATION = 1
+_START = 2
+_END = 3
+_CAPACITY = 4
+_HEADER_FIELDS = 5
+
+_ITEM_SIZE = 8
+
+
+def series_name(name: str, symbol: str, interval: Interval) -> str:
+    """
+    Returns the name of the header segment of a series. Symbols are hashed since they
+    may contain characters that are not allowed in segment names.
+    """
+    digest = hashlib.blake2b(f"{symbol}|{interval}".encode(), digest_size=6).hexdigest()
+    return f"{name}_{digest}"
+
+
+def _data_name(header_name: str, generation: int) -> str:
+    return f"{header_name}.{generation}"
+
+
+def _column_views(shm: SharedMemory, capacity: int) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    Returns the timestamp and OHLCV columns of a data segment, each 2 * capacity rows long.
+    """
+    # np.frombuffer holds a buffer export, so the mapping cannot be closed under a live view
+    size = 2 * capacity
+    timestamp = np.frombuffer(shm.buf, dtype=np.int64, count=size)
+    columns = {
+        name: np.frombuffer(shm.buf, dtype=np.float64, count=size, offset=(i + 1) * size * _ITEM_SIZE)
+        for i, name in enumerate(PRICE_COLUMNS)
+    }
+    return timestamp, columns
+
+
+class _Segment(SharedMemory):
+    """
+    SharedMemory that tolerates being collected while frames still view it. The mapping
+    is then released together with the last view instead of being closed here.
+    """
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except (BufferError, OSError):
+            pass
+
+
+def _create(name: str, size: int) -> _Segment:
+    """
+    Creates a segment. A segment of the same name left behind by a writer that crashed
+    is unlinked and created again.
+    """
+    try:
+        return _Segment(name, create=True, size=size)
+    except FileExistsError:
+        debugger.warning(f"Replacing shared memory segment {name} left behind by an earlier run")
+        # Attaching registers the segment with the resource tracker, and unlinking unregisters it
+        stale = SharedMemory(name)
+        stale.close()
+        stale.unlink()
+        return _Segment(name, create=True, size=size)
+
+
+def _attach(name: str) -> _Segment:
+    """
+    Attaches to an existing segment without registering it with the resource tracker,
+    which would otherwise unlink it when a reader process exits.
+    """
+    if sys.version_info >= (3, 13):
+        return _Segment(name, track=False)
+    shm = _Segment(name)
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def _close_retired(retired: list[SharedMemory]) -> list[SharedMemory]:
+    """
+    Closes the mappings that are no longer referenced and returns the others. Frames
+    handed out earlier may still view a mapping, and closing it would invalidate them.
+    """
+    remaining = []
+    for shm in retired:
+        try:
+            shm.close()
+        except BufferError:
+            remaining.append(shm)
+    return remaining
+
+
+class _SeriesWriter:
+    """
+    Writer side of a single series. Mirrors PriceRingBuffer, except that the arrays
+    live in shared memory and every state change is published through the header.
+    """
+
+    def __init__(self, header_name: str, capacity: int) -> None:
+        self.header_name = header_name
+        self.capacity = max(capacity, 1)
+        self._header_shm = _create(header_name, _HEADER_FIELDS * _ITEM_SIZE)
+        self._header = np.frombuffer(self._header_shm.buf, dtype=np.int64, count=_HEADER_FIELDS)
+        self._header[:] = 0
+        self._header[_GENERATION] = -1
+        self._header[_CAPACITY] = self.capacity
+
+        self._generation = -1
+        self._data_shm: SharedMemory | None = None
+        self._retired: list[SharedMemory] = []
+        self._start = 0
+        self._end = 0
+        self._replace(np.empty(0, dtype=np.int64), {name: np.empty(0) for name in PRICE_COLUMNS})
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def _publish(self) -> None:
+        header = self._header
+        header[_SEQ] += 1
+        header[_GENERATION] = self._generation
+        header[_START] = self._start
+        header[_END] = self._end
+        header[_SEQ] += 1
+
+    def arrays(self) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """
+        Returns zero-copy views of the live rows.
+        """
+        return self._timestamp[self._start : self._end], {
+            name: self._columns[name][self._start : self._end] for name in PRICE_COLUMNS
+        }
+
+    def _replace(self, timestamp: np.ndarray, columns: dict[str, np.ndarray]) -> None:
+        """
+        Writes the live rows into a new generation segment and retires the current one.
+        """
+        overflow = len(timestamp) - self.capacity
+        if overflow > 0:
+            timestamp = timestamp[overflow:]
+            columns = {name: values[overflow:] for name, values in columns.items()}
+
+        count = len(timestamp)
+        generation = self._generation + 1
+        data_shm = _create(
+            _data_name(self.header_name, generation),
+            2 * self.capacity * (len(PRICE_COLUMNS) + 1) * _ITEM_SIZE,
+        )
+        new_timestamp, new_columns = _column_views(data_shm, self.capacity)
+        new_timestamp[:count] = timestamp
+        for name in PRICE_COLUMNS:
+            new_columns[name][:count] = columns[name]
+
+        old_shm = self._data_shm
+        self._data_shm, self._generation = data_shm, generation
+        self._timestamp, self._columns = new_timestamp, new_columns
+        self._start, self._end = 0, count
+        self._publish()
+        if old_shm is not None:
+            # Processes that still map the old generation keep it alive until they drop it
+            old_shm.unlink()
+            self._retired = _close_retired([*self._retired, old_shm])
+
+    def append(self, timestamp: np.ndarray, columns: dict[str, np.ndarray]) -> None:
+        """
+        Adds sorted, unique candles. Existing timestamps are replaced, mirroring the
+        UPSERT in the database.
+        """
+        count = len(timestamp)
+        if count == 0:
+            return
+
+        if len(self) and timestamp[0] <= self._timestamp[self._end - 1]:
+            live, live_columns = self.arrays()
+            keep = ~np.isin(live, timestamp)
+            merged_timestamp = np.concatenate([live[keep], timestamp])
+            order = np.argsort(merged_timestamp, kind="stable")
+            merged_columns = {
+                name: np.concatenate([live_columns[name][keep], columns[name]])[order] for name in PRICE_COLUMNS
+            }
+            self._replace(merged_timestamp[order], merged_columns)
+            return
+
+        if count >= self.capacity:
+            self._replace(timestamp, columns)
+            return
+
+        start = self._start + max(len(self) + count - self.capacity, 0)
+        if self._end + count > len(self._timestamp):
+            live, live_columns = self.arrays()
+            merged_timestamp = np.concatenate([live, timestamp])
+            merged_columns = {name: np.concatenate([live_columns[name], columns[name]]) for name in PRICE_COLUMNS}
+            self._replace(merged_timestamp, merged_columns)
+            return
+
+        # Fast path: write the unpublished tail, then publish the new range
+        self._timestamp[self._end : self._end + count] = timestamp
+        for name in PRICE_COLUMNS:
+            self._columns[name][self._end : self._end + count] = columns[name]
+        self._start, self._end = start, self._end + count
+        self._publish()
+
+    def truncate(self, cutoff: int) -> None:
+        self._start += int(np.searchsorted(self._timestamp[self._start : self._end], cutoff, side="right"))
+        self._publish()
+
+    def close(self) -> None:
+        self._data_shm.unlink()
+        self._header_shm.unlink()
+        # Frames handed out by the writer itself may still reference the mappings
+        self._retired = _close_retired([*self._retired, self._data_shm, self._header_shm])
+
+
+class _SeriesReader:
+    """
+    Reader side of a single series.
+    """
+
+    def __init__(self, header_name: str) -> None:
+        self.header_name = header_name
+        self._header_shm = _attach(header_name)
+        self._header = np.frombuffer(self._header_shm.buf, dtype=np.int64, count=_HEADER_FIELDS)
+        self._generation = -1
+        self._data_shm: SharedMemory | None = None
+        self._retired: list[SharedMemory] = []
+
+    def _map(self, generation: int, capacity: int) -> bool:
+        try:
+            data_shm = _attach(_data_name(self.header_name, generation))
+        except FileNotFoundError:
+            # The writer has already moved past this generation
+            return False
+        if self._data_shm is not None:
+            self._retired.append(self._data_shm)
+        self._data_shm, self._generation = data_shm, generation
+        self._timestamp, self._columns = _column_views(data_shm, capacity)
+        return True
+
+    def arrays(self) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """
+        Returns zero-copy views of the published rows, as pointed to by a header that was
+        read while no header update was in progress.
+        """
+        header = self._header
+        while True:
+            seq = int(header[_SEQ])
+            if seq & 1:
+                time.sleep(0)
+                continue
+            generation, start, end, capacity = (int(value) for value in header[_GENERATION : _CAPACITY + 1])
+            if generation != self._generation:
+                if int(header[_SEQ]) != seq or generation < 0 or not self._map(generation, capacity):
+                    continue
+                self._retired = _close_retired(self._retired)
+            timestamp = self._timestamp[start:end]
+            columns = {name: self._columns[name][start:end] for name in PRICE_COLUMNS}
+            if int(header[_SEQ]) == seq:
+                return timestamp, columns
+
+    def close(self) -> None:
+        mapped = [self._header_shm] if self._data_shm is None else [self._data_shm, self._header_shm]
+        self._retired = _close_retired([*self._retired, *mapped])
+
+
+class SharedPriceStore:
+    """
+    Price history kept in shared memory, written by one process and read by any number
+    of processes.
+
+    The process that creates the store (usually through CentralStorage) is the writer;
+    other processes open the store by name and can only read. Readers see the most
+    recent candles of each series, up to the same capacity the price cache uses, and
+    get_price_history has the same signature as CentralStorage.get_price_history.
+
+    Frames returned by readers and by the writer are zero-copy views of the shared
+    memory. They stay valid after the writer moves on, since published rows are never
+    modified and a retired generation is only freed once nothing maps it anymore.
+
+    Attributes:
+        name: Prefix of every segment name of the store
+        create: True if this process is the writer
+    """
+
+    def __init__(
+        self,
+        name: str,
+        create: bool = False,
+        price_storage_limit: dict[Interval, TimeDelta] | None = None,
+    ) -> None:
+        """
+        Args:
+            name: Prefix of the segment names. Keep it short, as some platforms limit
+                  segment names to 31 characters.
+            create: If True, this process becomes the writer of the store.
+            price_storage_limit: Retention per interval, used to size each series. Only
+                                 used by the writer.
+        """
+        self.name = name
+        self.create = create
+        self.price_storage_limit = price_storage_limit or {}
+        self._writers: dict[tuple[str, Interval], _SeriesWriter] = {}
+        self._readers: dict[tuple[str, Interval], _SeriesReader] = {}
+        self._lock = threading.Lock()
+
+    def insert(self, symbol: str, interval: Interval, df: pl.DataFrame) -> None:
+        """
+        Publishes a price_history shaped frame for a single symbol and interval.
+
+        Raises:
+            PermissionError: If the store was not created by this process
+        """
+        if not self.create:
+            raise PermissionError("Only the process that created the shared price store can write to it")
+        timestamp, columns = frame_to_arrays(df)
+        key = (symbol, interval)
+        with self._lock:
+            writer = self._writers.get(key)
+            if writer is None:
+                capacity = buffer_capacity(interval, self.price_storage_limit.get(interval))
+                writer = _SeriesWriter(series_name(self.name, symbol, interval), capacity)
+                self._writers[key] = writer
+            writer.append(timestamp, columns)
+
+    def truncate(self, symbol: str, cutoff: dt.datetime, interval: Interval | None = None) -> None:
+        """
+        Drops candles with a timestamp less than or equal to `cutoff`.
+        If `interval` is None, all intervals of `symbol` are truncated.
+        """
+        cutoff_micros = datetime_to_micros(cutoff)
+        with self._lock:
+            for (writer_symbol, writer_interval), writer in self._writers.items():
+                if writer_symbol == symbol and (interval is None or writer_interval == interval):
+                    writer.truncate(cutoff_micros)
+
+    def _series(self, symbol: str, interval: Interval) -> _SeriesWriter | _SeriesReader | None:
+        key = (symbol, interval)
+        if self.create:
+            return self._writers.get(key)
+        reader = self._readers.get(key)
+        if reader is None:
+            try:
+                reader = _SeriesReader(series_name(self.name, symbol, interval))
+            except FileNotFoundError:
+                # Nothing has been published for this series yet
+                return None
+            self._readers[key] = reader
+        return reader
+
+    def get_price_history(
+        self,
+        symbol: str,
+        interval: Interval | None = None,
+        start: dt.datetime | None = None,
+        end: dt.datetime | None = None,
+    ) -> TickerFrame:
+        """
+        Gets the price history of a symbol between `start` and `end`, inclusive.
+
+        Args:
+            symbol: Symbol to get the price history of
+            interval: Interval of the price history. If None, an empty frame is returned.
+            start: Start of the range. If None, the oldest candle in memory is the start.
+            end: End of the range. If None, the newest candle is the end.
+
+        Returns:
+            TickerFrame: Candles in the layout of the price_history table
+        """
+        with self._lock:
+            series = None if interval is None else self._series(symbol, interval)
+            if series is None:
+                timestamp, columns = np.empty(0, dtype=np.int64), {name: np.empty(0) for name in PRICE_COLUMNS}
+            else:
+                timestamp, columns = series.arrays()
+
+        lo = 0 if start is None else int(np.searchsorted(timestamp, datetime_to_micros(start), side="left"))
+        hi = len(timestamp) if end is None else int(np.searchsorted(timestamp, datetime_to_micros(end), side="right"))
+        hi = max(hi, lo)
+        columns = {name: values[lo:hi] for name, values in columns.items()}
+        return TickerFrame(arrays_to_frame(symbol, interval, timestamp[lo:hi], columns))
+
+    def close(self) -> None:
+        """
+        Closes the store. The writer also unlinks every segment, after which readers
+        can no longer open series they have not opened before.
+        """
+        with self._lock:
+            for writer in self._writers.values():
+                writer.close()
+            for reader in self._readers.values():
+                reader.close()
+            self._writers.clear()
+            self._readers.clear()
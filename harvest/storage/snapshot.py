@@ -0,0 +1,66 @@
+import os
+import uuid
+from typing import Iterator
+
+import polars as pl
+
+from harvest.util.helper import path_to_symbol, symbol_to_path
+
+"""
+This module provides the Arrow IPC snapshot store used by CentralStorage warm starts.
+
+Each (symbol, interval) series is written to its own uncompressed Arrow IPC file:
+
+    <root>/<symbol>/<interval>.arrow
+
+Symbols are percent-encoded in the path (see symbol_to_path), so a symbol such as
+BRK/B stays a single directory.
+
+Uncompressed IPC files share Arrow's in-memory layout, so on startup polars can
+memory-map them instead of running a deserialization pass. Files are written
+through a temporary file and renamed into place, so a crash during a snapshot leaves
+the previous snapshot of that series intact.
+"""
+
+_SUFFIX = ".arrow"
+
+
+class ArrowSnapshotStore:
+    """
+    Directory of Arrow IPC files holding one price history series each.
+
+    Attributes:
+        root: Directory holding the snapshot files
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, symbol_to_path(symbol), interval + _SUFFIX)
+
+    def write(self, symbol: str, interval: str, df: pl.DataFrame) -> None:
+        """
+        Replaces the snapshot of `symbol` and `interval` with `df`.
+        """
+        path = self._path(symbol, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = os.path.join(os.path.dirname(path), f".{uuid.uuid4().hex}.tmp")
+        # Compression would prevent memory mapping on load
+        df.write_ipc(temp_path, compression="uncompressed")
+        os.replace(temp_path, path)
+
+    def load(self) -> Iterator[tuple[str, str, pl.DataFrame]]:
+        """
+        Yields (symbol, interval, frame) for every stored series. polars memory-maps the
+        uncompressed files where it can.
+        """
+        for symbol_dir in sorted(os.listdir(self.root)):
+            symbol_path = os.path.join(self.root, symbol_dir)
+            if not os.path.isdir(symbol_path):
+                continue
+            for file_name in sorted(os.listdir(symbol_path)):
+                if file_name.endswith(_SUFFIX):
+                    frame = pl.read_ipc(os.path.join(symbol_path, file_name))
+                    yield path_to_symbol(symbol_dir), file_name.removesuffix(_SUFFIX), frame
@@ -11,14 +11,10 @@ def load_storage(storage_type: StorageType) -> BaseStorage:
         from harvest.storage.base_storage import BaseStorage
 
         return BaseStorage
-    elif storage_type.value == StorageType.CSV.value:
-        from harvest.storage.csv_storage import CSVStorage
+    elif storage_type.value == StorageType.FILE.value:
+        from harvest.storage.file_storage import FileStorage
 
-        return CSVStorage
-    elif storage_type.value == StorageType.PICKLE.value:
-        from harvest.storage.pickle_storage import PickleStorage
-
-        return PickleStorage
+        return FileStorage
     elif storage_type.value == StorageType.DB.value:
         from harvest.storage.database_storage import DBStorage
 
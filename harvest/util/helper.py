@@ -3,9 +3,12 @@ import logging
 import random
 import re
 import sys
+import warnings
 from datetime import timezone as tz
 from typing import List, Union
+from urllib.parse import quote, unquote
 
+import pandas as pd
 import polars as pl
 
 from harvest.definitions import TickerFrame
@@ -264,10 +267,16 @@ def str_to_storage_type(name: str) -> StorageType:
     """
     if name == "base":
         return StorageType.BASE
-    elif name == "csv":
-        return StorageType.CSV
-    elif name == "pickle":
-        return StorageType.PICKLE
+    elif name == "file":
+        return StorageType.FILE
+    elif name in ("csv", "pickle"):
+        warnings.warn(
+            f'StorageType "{name}" is deprecated and now selects the file storage, which still reads '
+            f"the {name} files of earlier versions but writes Arrow IPC files. Use \"file\" instead.",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        return StorageType.FILE
     elif name == "db":
         return StorageType.DB
     else:
@@ -376,6 +385,22 @@ def is_crypto(symbol: str) -> bool:
     return symbol_type(symbol) == "CRYPTO"
 
 
+def symbol_to_path(symbol: str) -> str:
+    """
+    Returns `symbol` as a single file or directory name. Characters that would split or
+    escape the path, such as the "/" of "BRK/B", are percent-encoded. Crypto symbols
+    keep their "@".
+    """
+    return quote(symbol, safe="@")
+
+
+def path_to_symbol(name: str) -> str:
+    """
+    Reverses symbol_to_path.
+    """
+    return unquote(name)
+
+
 ############ Functions used for testing #################
 
 
@@ -0,0 +1,124 @@
+import argparse
+import datetime as dt
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from harvest.broker._base import Broker
+from harvest.definitions import RuntimeData, TickerCandle
+from harvest.enum import Interval
+
+"""
+Measures how long Broker.tick takes to fetch the latest candle of every watched symbol.
+
+Usage:
+    python tests/benchmark/bench_broker_tick.py --symbols 50 --latency 0.1
+
+Starts a local HTTP server standing in for a broker API. Every request sleeps for
+`--latency` seconds before returning the latest 1-minute candle of each requested
+symbol. The benchmark broker fetches candles from it through its pooled HTTP
+session, as the real brokers do, and one tick over all symbols is timed for each
+`max_fetch_workers`, then with a fetch_latest_prices override that requests all
+symbols at once.
+"""
+
+NOW = dt.datetime(2024, 1, 2, 15, 0, tzinfo=dt.timezone.utc)
+
+
+def make_handler(latency: float) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        # Keep connections open between requests
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately, which Nagle's algorithm would delay on a kept-alive connection
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            time.sleep(latency)
+            symbols = parse_qs(urlparse(self.path).query)["symbols"][0].split(",")
+            timestamp = (NOW - dt.timedelta(minutes=1)).isoformat()
+            body = json.dumps(
+                [{"t": timestamp, "s": symbol, "o": 1, "h": 1, "l": 1, "c": 1, "v": 1} for symbol in symbols]
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+    return Handler
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections once more workers than that connect at once
+    request_queue_size = 128
+
+
+class HTTPBroker(Broker):
+    def __init__(self, url: str, workers: int) -> None:
+        super().__init__()
+        self.url = url
+        self.max_fetch_workers = workers
+        self.stats = RuntimeData(broker_timezone=dt.timezone.utc, utc_timestamp=NOW)
+
+    def fetch_latest_price(self, symbol: str, interval: Interval) -> TickerCandle:
+        return self._get_bars([symbol])[symbol]
+
+    def _get_bars(self, symbols: list[str]) -> dict[str, TickerCandle]:
+        bars = self.http_get(self.url, params={"symbols": ",".join(symbols)}).json()
+        return {
+            bar["s"]: TickerCandle(
+                dt.datetime.fromisoformat(bar["t"]), bar["s"], bar["o"], bar["h"], bar["l"], bar["c"], bar["v"]
+            )
+            for bar in bars
+        }
+
+
+class BatchHTTPBroker(HTTPBroker):
+    def fetch_latest_prices(self, symbols: list[str], interval: Interval) -> dict[str, TickerCandle]:
+        return self._get_bars(symbols)
+
+
+def run(broker: Broker, symbols: list[str]) -> float:
+    received = []
+    broker.watch_dict = {Interval.MIN_1: symbols}
+    broker.step_callback = received.append
+
+    begin = time.perf_counter()
+    broker.tick()
+    elapsed = time.perf_counter() - begin
+    assert len(received[0][Interval.MIN_1]) == len(symbols)
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    server = Server(("127.0.0.1", 0), make_handler(args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/bars/latest"
+
+    symbols = [f"S{index:03d}" for index in range(args.symbols)]
+    print(f"{args.symbols} symbols, {args.latency * 1e3:.0f} ms latency")
+    print(f"{'workers':>8} {'tick s':>8} {'symbols/s':>10}")
+    try:
+        for workers in args.workers:
+            elapsed = run(HTTPBroker(url, workers), symbols)
+            print(f"{workers:>8} {elapsed:>8.2f} {args.symbols / elapsed:>10,.0f}")
+        elapsed = run(BatchHTTPBroker(url, 1), symbols)
+        print(f"{'batched':>8} {elapsed:>8.2f} {args.symbols / elapsed:>10,.0f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
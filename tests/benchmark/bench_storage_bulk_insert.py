@@ -0,0 +1,80 @@
+import argparse
+import datetime as dt
+import time
+
+import numpy as np
+import polars as pl
+
+from harvest.definitions import TickerFrame, TimeDelta, TimeSpan
+from harvest.enum import Interval
+from harvest.storage._base import CentralStorage
+
+"""
+Benchmarks CentralStorage.bulk_insert_price_history against insert_price_history.
+
+Usage:
+    python tests/benchmark/bench_storage_bulk_insert.py --rows 10000 1000000 10000000
+
+The regular insert path builds one statement per call, so it is fed in chunks of
+--chunk rows and is skipped for row counts above --max-regular-rows.
+"""
+
+
+def make_frame(rows: int) -> TickerFrame:
+    rng = np.random.default_rng(0)
+    start = dt.datetime(2000, 1, 1)
+    timestamp = pl.datetime_range(
+        start, start + dt.timedelta(minutes=rows - 1), interval="1m", time_unit="us", eager=True
+    )
+    df = pl.DataFrame(
+        {
+            "timestamp": timestamp,
+            "symbol": pl.repeat("A", rows, dtype=pl.String, eager=True),
+            "interval": pl.repeat("MIN_1", rows, dtype=pl.String, eager=True),
+            **{name: rng.random(rows) for name in ("open", "high", "low", "close", "volume")},
+        }
+    )
+    return TickerFrame(df)
+
+
+def make_storage(rows: int) -> CentralStorage:
+    # Keep every row so both paths write the same amount of data
+    return CentralStorage(price_storage_limit={Interval.MIN_1: TimeDelta(TimeSpan.DAY, rows // 1440 + 2)})
+
+
+def bench_bulk(frame: TickerFrame, batch_size: int) -> float:
+    storage = make_storage(len(frame.df))
+    begin = time.perf_counter()
+    storage.bulk_insert_price_history(frame, batch_size=batch_size)
+    return time.perf_counter() - begin
+
+
+def bench_regular(frame: TickerFrame, chunk: int) -> float:
+    storage = make_storage(len(frame.df))
+    begin = time.perf_counter()
+    for part in frame.df.iter_slices(chunk):
+        storage.insert_price_history(TickerFrame(part))
+    return time.perf_counter() - begin
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--chunk", type=int, default=5_000)
+    parser.add_argument("--max-regular-rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'bulk rows/s':>14} {'regular rows/s':>16} {'speedup':>8}")
+    for rows in args.rows:
+        frame = make_frame(rows)
+        bulk = rows / bench_bulk(frame, args.batch_size)
+        if rows <= args.max_regular_rows:
+            regular = rows / bench_regular(frame, args.chunk)
+            print(f"{rows:>12} {bulk:>14,.0f} {regular:>16,.0f} {bulk / regular:>7.1f}x")
+        else:
+            print(f"{rows:>12} {bulk:>14,.0f} {'skipped':>16} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
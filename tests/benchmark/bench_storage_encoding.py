@@ -0,0 +1,103 @@
+import argparse
+import datetime as dt
+import os
+import tempfile
+import time
+
+import numpy as np
+import polars as pl
+
+from harvest.storage.encoding import PriceEncoding
+
+"""
+Compares the memory footprint, Parquet size and scan speed of the price encodings.
+
+Usage:
+    python tests/benchmark/bench_storage_encoding.py --symbols 500 --years 5
+
+Builds regular-hours 1-minute bars (390 a day, 252 days a year) for every symbol, with
+prices quoted to cents, as one long price_history shaped frame. For each encoding it
+reports the in-memory size of the encoded frame, the size of the frame written to
+Parquet, and the time to decode and scan it: filter one year and compute the mean
+close and total volume of every symbol.
+
+The full 500 symbol, 5 year set is about 245 million rows and needs tens of GiB of
+memory. All numbers scale linearly with the row count.
+"""
+
+ENCODINGS = {
+    "float64": PriceEncoding(),
+    "float32+cat": PriceEncoding(prices="float32", categorical=True),
+    "scaled+cat": PriceEncoding(prices="scaled", price_scale=100, categorical=True),
+    "scaled+cat+delta": PriceEncoding(prices="scaled", price_scale=100, categorical=True, delta_timestamps=True),
+}
+
+
+def make_frame(symbols: int, years: int) -> pl.DataFrame:
+    rng = np.random.default_rng(0)
+    days = pl.date_range(dt.date(2015, 1, 1), dt.date(2015 + years + 1, 1, 1), eager=True)
+    days = days.filter(days.dt.weekday() <= 5).head(252 * years)
+    minutes = pl.datetime_range(
+        dt.datetime(1970, 1, 1, 14, 30), dt.datetime(1970, 1, 1, 20, 59), interval="1m", time_unit="us", eager=True
+    )
+    offsets = (minutes - dt.datetime(1970, 1, 1)).to_numpy()
+    timestamp = (days.cast(pl.Datetime("us")).to_numpy()[:, None] + offsets[None, :]).ravel()
+    bars = len(timestamp)
+
+    frames = []
+    for index in range(symbols):
+        close = np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.0005, bars))), 2)
+        frames.append(
+            pl.DataFrame(
+                {
+                    "timestamp": timestamp,
+                    "symbol": pl.repeat(f"S{index:03d}", bars, dtype=pl.String, eager=True),
+                    "interval": pl.repeat("MIN_1", bars, dtype=pl.String, eager=True),
+                    "open": close,
+                    "high": close + 0.01,
+                    "low": close - 0.01,
+                    "close": close,
+                    "volume": rng.integers(100, 10_000, bars).astype(np.float64),
+                }
+            )
+        )
+    return pl.concat(frames)
+
+
+def scan(encoding: PriceEncoding, encoded: pl.DataFrame, start: dt.datetime, end: dt.datetime) -> float:
+    begin = time.perf_counter()
+    (
+        encoding.decode(encoded.lazy())
+        .filter(pl.col("timestamp").is_between(start, end))
+        .group_by("symbol")
+        .agg(pl.col("close").mean(), pl.col("volume").sum())
+        .collect()
+    )
+    return time.perf_counter() - begin
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--years", type=int, default=5)
+    args = parser.parse_args()
+
+    frame = make_frame(args.symbols, args.years)
+    start = frame["timestamp"].min()
+    end = start + dt.timedelta(days=365)
+    print(f"{len(frame):,} rows, {args.symbols} symbols, {args.years} years")
+    print(f"{'encoding':>18} {'memory MiB':>11} {'parquet MiB':>12} {'scan ms':>8}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, encoding in ENCODINGS.items():
+            encoded = encoding.encode(frame)
+            memory = encoded.estimated_size("mb")
+            path = os.path.join(directory, f"{name}.parquet")
+            encoded.write_parquet(path)
+            disk = os.path.getsize(path) / 2**20
+            elapsed = min(scan(encoding, encoded, start, end) for _ in range(3))
+            print(f"{name:>18} {memory:>11,.1f} {disk:>12,.1f} {elapsed * 1e3:>8,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import datetime as dt
+import gc
+import multiprocessing
+import resource
+import time
+
+from harvest.definitions import OrderEvent, OrderSide, Transaction
+from harvest.storage._base import LocalAlgorithmStorage, LocalStorageBackend
+
+"""
+Compares creating LocalAlgorithmStorage instances with a database each against
+sharing one LocalStorageBackend, by startup time and memory.
+
+Usage:
+    python tests/benchmark/bench_storage_local_backend.py --algorithms 1 50 500
+
+Every configuration runs in a fresh process. Memory is the growth of the resident set
+size while the storages are created and each inserts and reads one transaction, so it
+includes SQLite's own allocations. Linux only, since it reads /proc.
+"""
+
+
+def rss_kib() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize() // 1024
+
+
+def measure(algorithms: int, shared: bool, results) -> None:
+    gc.collect()
+    before = rss_kib()
+    begin = time.perf_counter()
+    backend = LocalStorageBackend() if shared else None
+    storages = [LocalAlgorithmStorage(f"algorithm_{i}", backend=backend) for i in range(algorithms)]
+    startup = time.perf_counter() - begin
+
+    for storage in storages:
+        storage.insert_transaction(
+            Transaction(dt.datetime(2024, 1, 1), "AAPL", OrderSide.BUY, 1.0, 100.0, OrderEvent.FILL, storage.algorithm_name)
+        )
+        storage.get_transaction_history("AAPL")
+    results.put((startup, rss_kib() - before))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--algorithms", type=int, nargs="+", default=[1, 50, 500])
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    print(f"{'algorithms':>10} {'backend':>8} {'startup ms':>11} {'memory MiB':>11}")
+    for algorithms in args.algorithms:
+        for shared in (False, True):
+            results = context.Queue()
+            process = context.Process(target=measure, args=(algorithms, shared, results))
+            process.start()
+            startup, memory = results.get(timeout=600)
+            process.join()
+            label = "shared" if shared else "own"
+            print(f"{algorithms:>10} {label:>8} {startup * 1e3:>11,.1f} {memory / 1024:>11,.1f}")
+
+
+if __name__ == "__main__":
+    main()
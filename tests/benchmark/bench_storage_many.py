@@ -0,0 +1,63 @@
+import argparse
+import datetime as dt
+import time
+
+import polars as pl
+
+from harvest.definitions import TickerFrame
+from harvest.enum import Interval
+from harvest.storage._base import CentralStorage
+from harvest.util.helper import generate_ticker_frame
+
+"""
+Compares reading the price history of many symbols with one get_price_history call per
+symbol against a single get_price_history_many call.
+
+Usage:
+    python tests/benchmark/bench_storage_many.py --symbols 100 --rows 390 --calls 20
+
+Both the database path (price cache disabled) and the cached path are measured.
+"""
+
+
+def per_call_ms(func, calls: int) -> float:
+    func()
+    begin = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - begin) / calls * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=390)
+    parser.add_argument("--calls", type=int, default=20)
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    frame = pl.concat(
+        [generate_ticker_frame(symbol, Interval.MIN_1, args.rows, start=dt.datetime(2024, 1, 1)).df for symbol in symbols]
+    )
+
+    print(f"{'path':>8} {'per symbol ms':>14} {'many ms':>8}")
+    for label, enable_price_cache in (("database", False), ("cache", True)):
+        storage = CentralStorage(enable_price_cache=enable_price_cache)
+        storage.bulk_insert_price_history(TickerFrame(frame))
+
+        def loop():
+            return {symbol: storage.get_price_history(symbol, Interval.MIN_1) for symbol in symbols}
+
+        def many():
+            return storage.get_price_history_many(symbols, Interval.MIN_1, as_dict=True)
+
+        expected, actual = loop(), many()
+        assert all(actual[symbol].df.equals(expected[symbol].df) for symbol in symbols)
+
+        before = per_call_ms(loop, args.calls)
+        after = per_call_ms(many, args.calls)
+        print(f"{label:>8} {before:>14,.2f} {after:>8,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import datetime as dt
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from harvest.enum import Interval
+from harvest.storage._base import CentralStorage
+from harvest.util.helper import generate_ticker_frame
+
+"""
+Stress test for CentralStorage in multi-process mode: one writer process inserts
+1-minute bars for a set of symbols while N reader processes query the last hour
+of a random symbol.
+
+Usage:
+    python tests/benchmark/bench_storage_multiprocess.py --readers 4 --seconds 10 --symbols 20
+"""
+
+
+def writer(db_path: str, symbols: list[str], seconds: float, results) -> None:
+    storage = CentralStorage(db_path=db_path, multi_process=True)
+    start = dt.datetime(2024, 1, 1)
+    deadline = time.monotonic() + seconds
+    bars = errors = 0
+    minute = 0
+    while time.monotonic() < deadline:
+        timestamp = start + dt.timedelta(minutes=minute)
+        for symbol in symbols:
+            try:
+                storage.insert_price_history(generate_ticker_frame(symbol, Interval.MIN_1, 1, start=timestamp))
+                bars += 1
+            except Exception:
+                errors += 1
+        minute += 1
+    storage.close()
+    results.put(("writer", bars, errors, seconds))
+
+
+def reader(db_path: str, symbols: list[str], seconds: float, results) -> None:
+    storage = CentralStorage(db_path=db_path, multi_process=True)
+    deadline = time.monotonic() + seconds
+    queries = errors = 0
+    latencies = []
+    while time.monotonic() < deadline:
+        symbol = random.choice(symbols)
+        begin = time.perf_counter()
+        try:
+            latest = storage.get_latest_price_timestamp(symbol, Interval.MIN_1)
+            if latest is not None:
+                storage.get_price_history(symbol, Interval.MIN_1, start=latest - dt.timedelta(hours=1))
+            queries += 1
+            latencies.append(time.perf_counter() - begin)
+        except Exception:
+            errors += 1
+    storage.close()
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0.0
+    results.put(("reader", queries, errors, p99))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--symbols", type=int, default=20)
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = f"sqlite:///{os.path.join(temp_dir, 'central.db')}"
+        CentralStorage(db_path=db_path, multi_process=True).close()
+
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        processes = [context.Process(target=writer, args=(db_path, symbols, args.seconds, results))]
+        processes += [
+            context.Process(target=reader, args=(db_path, symbols, args.seconds, results)) for _ in range(args.readers)
+        ]
+        for process in processes:
+            process.start()
+        reports = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    for role, count, errors, extra in sorted(reports):
+        if role == "writer":
+            print(f"writer: {count / args.seconds:,.0f} bars/s, {errors} errors")
+        else:
+            print(f"reader: {count / args.seconds:,.0f} queries/s, p99 {extra * 1e3:.1f} ms, {errors} errors")
+
+
+if __name__ == "__main__":
+    main()
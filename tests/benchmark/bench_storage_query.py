@@ -0,0 +1,68 @@
+import argparse
+import datetime as dt
+import time
+
+import polars as pl
+from sqlalchemy.orm import Session
+
+from harvest.enum import Interval
+from harvest.storage._base import CentralStorage, PriceHistory
+from harvest.util.helper import generate_ticker_frame
+
+"""
+Measures per-call latency of CentralStorage.get_price_history database reads.
+
+Usage:
+    python tests/benchmark/bench_storage_query.py --rows 1440 --calls 500
+
+The "literal" column reproduces the previous read path, which compiled each query
+with literal_binds, read it with pl.read_database and parsed timestamps from strings.
+The price cache is disabled so every call goes to the database.
+"""
+
+
+def literal_read(storage: CentralStorage, symbol: str, interval: Interval, start: dt.datetime | None) -> pl.DataFrame:
+    filters = [PriceHistory.symbol == symbol, PriceHistory.interval == str(interval)]
+    if start:
+        filters.append(PriceHistory.timestamp >= start)
+    with Session(storage.db_engine) as session:
+        db_query = session.query(PriceHistory).filter(*filters)
+        db_query_str = str(
+            db_query.statement.compile(dialect=storage.db_engine.dialect, compile_kwargs={"literal_binds": True})
+        )
+    frame = pl.read_database(query=db_query_str, connection=storage.db_engine)
+    frame = frame.with_columns(pl.col("timestamp").str.to_datetime("%Y-%m-%d %H:%M:%S%.f"))
+    return frame.drop("id")
+
+
+def per_call_us(func, calls: int) -> float:
+    func()
+    begin = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - begin) / calls * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1440)
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    storage = CentralStorage(enable_price_cache=False)
+    frame = generate_ticker_frame("A", Interval.MIN_1, args.rows, start=dt.datetime(2024, 1, 1))
+    storage.bulk_insert_price_history(frame)
+    latest = frame.df["timestamp"][-1]
+
+    print(f"{'query':>16} {'literal us/call':>16} {'bound us/call':>14}")
+    for label, start in (("last 10 rows", latest - dt.timedelta(minutes=9)), ("all rows", None)):
+        assert literal_read(storage, "A", Interval.MIN_1, start).equals(
+            storage.get_price_history("A", Interval.MIN_1, start).df
+        )
+        before = per_call_us(lambda: literal_read(storage, "A", Interval.MIN_1, start), args.calls)
+        after = per_call_us(lambda: storage.get_price_history("A", Interval.MIN_1, start), args.calls)
+        print(f"{label:>16} {before:>16,.0f} {after:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
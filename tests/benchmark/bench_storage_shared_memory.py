@@ -0,0 +1,78 @@
+import argparse
+import datetime as dt
+import multiprocessing
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from harvest.enum import Interval
+from harvest.storage._base import CentralStorage
+from harvest.storage.shared_prices import SharedPriceStore
+from harvest.util.helper import generate_ticker_frame
+
+"""
+Compares how fast an algorithm in a worker process reads price history published by
+the Client: through a database shared in multi-process mode, or through a
+SharedPriceStore.
+
+Usage:
+    python tests/benchmark/bench_storage_shared_memory.py --symbols 20 --rows 390 --calls 200
+
+Each read is of the full series of one symbol, cycling through the symbols.
+"""
+
+
+def per_call_us(func, symbols: list[str], calls: int) -> float:
+    func(symbols[0])
+    begin = time.perf_counter()
+    for i in range(calls):
+        func(symbols[i % len(symbols)])
+    return (time.perf_counter() - begin) / calls * 1e6
+
+
+def worker(db_path: str, name: str, symbols: list[str], calls: int, results) -> None:
+    storage = CentralStorage(db_path=db_path, multi_process=True)
+    shared = SharedPriceStore(name)
+    results.put(
+        (
+            per_call_us(lambda symbol: storage.get_price_history(symbol, Interval.MIN_1), symbols, calls),
+            per_call_us(lambda symbol: shared.get_price_history(symbol, Interval.MIN_1), symbols, calls),
+        )
+    )
+    shared.close()
+    storage.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=390)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    name = f"bench{uuid.uuid4().hex[:6]}"
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = f"sqlite:///{Path(directory) / 'central.db'}"
+        storage = CentralStorage(db_path=db_path, multi_process=True, shared_memory_name=name)
+        begin = time.perf_counter()
+        for symbol in symbols:
+            storage.insert_price_history(generate_ticker_frame(symbol, Interval.MIN_1, args.rows, start=dt.datetime(2024, 1, 1)))
+        print(f"insert: {(time.perf_counter() - begin) / args.symbols * 1e3:,.2f} ms per symbol")
+
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        process = context.Process(target=worker, args=(db_path, name, symbols, args.calls, results))
+        process.start()
+        database_us, shared_us = results.get(timeout=600)
+        process.join()
+        storage.close()
+
+    print(f"{'path':>14} {'read us':>10}")
+    print(f"{'database':>14} {database_us:>10,.1f}")
+    print(f"{'shared memory':>14} {shared_us:>10,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import datetime as dt
+import sys
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+import harvest.broker._base
+import harvest.definitions
+from harvest.broker._base import Broker
+
+# alpaca-trade-api is an optional extra, and harvest.broker.alpaca still imports
+# StreamBroker and Stats, which harvest no longer defines. Stand in for whichever is
+# missing while harvest.broker.alpaca is imported: these tests stub the API client and
+# only exercise the REST fetches. The stand-ins are removed again afterwards.
+_stub_modules = []
+try:
+    import alpaca_trade_api  # noqa: F401
+except ImportError:
+    _stub_modules = ["alpaca_trade_api", "alpaca_trade_api.entity", "alpaca_trade_api.rest"]
+    for _module in _stub_modules:
+        sys.modules[_module] = MagicMock()
+_stub_names = []
+if not hasattr(harvest.broker._base, "StreamBroker"):
+    harvest.broker._base.StreamBroker = Broker
+    _stub_names.append((harvest.broker._base, "StreamBroker"))
+if not hasattr(harvest.definitions, "Stats"):
+    harvest.definitions.Stats = harvest.definitions.RuntimeData
+    _stub_names.append((harvest.definitions, "Stats"))
+
+from harvest.broker.alpaca import AlpacaBroker  # noqa: E402
+from harvest.enum import Interval  # noqa: E402
+
+for _module in _stub_modules:
+    del sys.modules[_module]
+for _owner, _name in _stub_names:
+    delattr(_owner, _name)
+
+NOW = dt.datetime(2024, 1, 3, 15, 0, tzinfo=dt.timezone.utc)
+
+
+def make_bar(timestamp: dt.datetime, price: float) -> SimpleNamespace:
+    return SimpleNamespace(
+        _raw={"t": timestamp.isoformat(), "o": price, "h": price + 1, "l": price - 1, "c": price, "v": 100.0}
+    )
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    monkeypatch.setattr("harvest.broker.alpaca.utc_current_time", lambda: NOW)
+    broker = AlpacaBroker.__new__(AlpacaBroker)
+    Broker.__init__(broker)
+    broker.basic = False
+    broker.api = MagicMock()
+    broker.api.get_latest_bars.side_effect = lambda symbols, feed: {
+        symbol: make_bar(NOW - dt.timedelta(minutes=1), 10.0) for symbol in symbols
+    }
+    broker.api.get_bars.side_effect = lambda symbol, timeframe, start, end, adjustment: [
+        make_bar(NOW - dt.timedelta(days=2), 20.0),
+        make_bar(NOW - dt.timedelta(days=1), 30.0),
+    ]
+    return broker
+
+
+def test_latest_minute_bars_of_stocks_are_fetched_together(broker):
+    candles = broker.fetch_latest_prices(["SPY", "QQQ", "@BTC"], Interval.MIN_1)
+
+    broker.api.get_latest_bars.assert_called_once_with(["SPY", "QQQ"], feed="sip")
+    # Cryptos are not served by the latest bars endpoint
+    assert [call.args[0] for call in broker.api.get_bars.call_args_list] == ["BTC"]
+    assert candles["SPY"].close == 10.0
+    assert candles["SPY"].timestamp == NOW - dt.timedelta(minutes=1)
+    assert candles["@BTC"].close == 30.0
+
+
+def test_other_intervals_are_fetched_per_symbol(broker):
+    candles = broker.fetch_latest_prices(["SPY", "QQQ"], Interval.DAY_1)
+
+    broker.api.get_latest_bars.assert_not_called()
+    assert sorted(call.args[0] for call in broker.api.get_bars.call_args_list) == ["QQQ", "SPY"]
+    assert {symbol: candle.close for symbol, candle in candles.items()} == {"SPY": 30.0, "QQQ": 30.0}
+    assert candles["SPY"].timestamp == (NOW - dt.timedelta(days=1)).replace(hour=0)
@@ -0,0 +1,90 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from harvest.broker._base import Broker
+
+
+class Handler(BaseHTTPRequestHandler):
+    # Keep connections open between requests
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self.server.requests.append((self.client_address, dict(self.headers)))
+        if self.path.startswith("/slow"):
+            threading.Event().wait(0.5)
+        body = b'{"status": "OK"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_requests_reuse_connections(server):
+    server, url = server
+    broker = Broker()
+    for _ in range(5):
+        assert broker.http_get(f"{url}/status", params={"key": "value"}).json() == {"status": "OK"}
+
+    # Every request came over the same connection
+    assert len({client_address for client_address, _ in server.requests}) == 1
+    headers = server.requests[0][1]
+    assert "gzip" in headers["Accept-Encoding"]
+    assert headers["Connection"] == "keep-alive"
+
+
+def test_sessions_are_per_broker():
+    first, second = Broker(), Broker()
+    assert first.http_session is first.http_session
+    assert first.http_session is not second.http_session
+    adapter = first.http_session.get_adapter("https://api.polygon.io")
+    assert adapter._pool_maxsize == Broker.max_fetch_workers
+
+
+def test_session_pool_follows_the_concurrency():
+    broker = Broker()
+    session = broker.http_session
+    assert broker.http_session is session
+
+    broker.max_fetch_workers = 16
+    assert broker.http_session is not session
+    assert broker.http_session.get_adapter("https://api.polygon.io")._pool_maxsize == 16
+
+    broker.http_pool_size = 4
+    assert broker.http_session.get_adapter("https://api.polygon.io")._pool_maxsize == 4
+
+
+def test_requests_time_out(server):
+    server, url = server
+    broker = Broker()
+    broker.http_timeout = (1.0, 0.1)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        broker.http_get(f"{url}/slow")
+    # An explicit timeout wins over the broker's
+    assert broker.http_get(f"{url}/slow", timeout=5).status_code == 200
+
+
+def test_exit_closes_the_session(server):
+    server, url = server
+    broker = Broker()
+    session = broker.http_session
+    broker.http_get(f"{url}/status")
+    broker.exit()
+    assert broker.http_session is not session
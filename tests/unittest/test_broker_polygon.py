@@ -0,0 +1,87 @@
+import datetime as dt
+
+import pytest
+
+from harvest.broker._base import Broker
+from harvest.broker.polygon import PolygonBroker, _last_session_date
+from harvest.enum import Interval
+
+
+@pytest.mark.parametrize(
+    "now, crypto, expected",
+    [
+        # 10:00 in New York on a Wednesday, while the session is open
+        (dt.datetime(2024, 1, 3, 15, 0, tzinfo=dt.timezone.utc), False, dt.date(2024, 1, 2)),
+        # 17:00 in New York, after the close
+        (dt.datetime(2024, 1, 3, 22, 0, tzinfo=dt.timezone.utc), False, dt.date(2024, 1, 3)),
+        # Still Wednesday evening in New York
+        (dt.datetime(2024, 1, 4, 2, 0, tzinfo=dt.timezone.utc), False, dt.date(2024, 1, 3)),
+        # Monday morning and Sunday both go back to Friday
+        (dt.datetime(2024, 1, 8, 15, 0, tzinfo=dt.timezone.utc), False, dt.date(2024, 1, 5)),
+        (dt.datetime(2024, 1, 7, 15, 0, tzinfo=dt.timezone.utc), False, dt.date(2024, 1, 5)),
+        # Crypto days end at midnight UTC, on weekends too
+        (dt.datetime(2024, 1, 7, 15, 0, tzinfo=dt.timezone.utc), True, dt.date(2024, 1, 6)),
+    ],
+)
+def test_last_session_date(now, crypto, expected):
+    assert _last_session_date(now, crypto) == expected
+
+
+@pytest.fixture
+def broker():
+    broker = PolygonBroker.__new__(PolygonBroker)
+    Broker.__init__(broker)
+    broker.config = {"polygon_api_key": "key"}
+    broker.basic = False
+    return broker
+
+
+def stub_grouped_bars(broker, monkeypatch, now, bars):
+    """
+    Serves the grouped daily bars of each date in `bars`, and no bars for other dates.
+    """
+    monkeypatch.setattr("harvest.broker.polygon.utc_current_time", lambda: now)
+    requests = []
+
+    def handle(request, priority):
+        market, date = request.split("?")[0].split("/")[-2:]
+        requests.append((market, date))
+        return bars.get(date, [])
+
+    broker._handle_request_response = handle
+    return requests
+
+
+def bar(ticker: str, date: str, close: float) -> dict:
+    timestamp = dt.datetime.fromisoformat(date).replace(tzinfo=dt.timezone.utc).timestamp() * 1000
+    return {"T": ticker, "t": timestamp, "o": close, "h": close, "l": close, "c": close, "v": 100.0}
+
+
+def test_daily_bars_of_the_last_session_are_fetched_per_market(broker, monkeypatch):
+    now = dt.datetime(2024, 1, 3, 15, 0, tzinfo=dt.timezone.utc)
+    bars = [bar("SPY", "2024-01-02", 1.0), bar("QQQ", "2024-01-02", 2.0), bar("X:BTCUSD", "2024-01-02", 3.0)]
+    requests = stub_grouped_bars(broker, monkeypatch, now, {"2024-01-02": bars})
+
+    candles = broker.fetch_latest_prices(["SPY", "QQQ", "@BTC"], Interval.DAY_1)
+
+    assert sorted(requests) == [("crypto", "2024-01-02"), ("stocks", "2024-01-02")]
+    assert {symbol: candle.close for symbol, candle in candles.items()} == {"SPY": 1.0, "QQQ": 2.0, "@BTC": 3.0}
+    assert candles["SPY"].timestamp == dt.datetime(2024, 1, 2, tzinfo=dt.timezone.utc)
+
+
+def test_market_holidays_are_stepped_over(broker, monkeypatch):
+    # January 1st is a holiday, so the last session is the Friday before it
+    now = dt.datetime(2024, 1, 2, 15, 0, tzinfo=dt.timezone.utc)
+    requests = stub_grouped_bars(broker, monkeypatch, now, {"2023-12-29": [bar("SPY", "2023-12-29", 1.0)]})
+
+    candles = broker.fetch_latest_prices(["SPY"], Interval.DAY_1)
+
+    assert requests == [("stocks", "2024-01-01"), ("stocks", "2023-12-29")]
+    assert candles["SPY"].timestamp == dt.datetime(2023, 12, 29, tzinfo=dt.timezone.utc)
+
+
+def test_lookback_is_bounded(broker, monkeypatch):
+    requests = stub_grouped_bars(broker, monkeypatch, dt.datetime(2024, 1, 3, 15, 0, tzinfo=dt.timezone.utc), {})
+
+    assert broker.fetch_latest_prices(["SPY"], Interval.DAY_1) == {}
+    assert len(requests) == broker.grouped_lookback_sessions
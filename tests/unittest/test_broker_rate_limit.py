@@ -0,0 +1,196 @@
+import datetime as dt
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from harvest.broker._base import Broker
+from harvest.broker.rate_limit import RateLimiter, RateLimitTimeout, RequestPriority, parse_retry_after
+from harvest.definitions import RuntimeData, TickerCandle
+from harvest.enum import Interval
+
+
+class LimitedBroker(Broker):
+    rate_limits = {"api": (2, 0.4)}
+
+
+def test_bucket_spreads_requests_over_the_period():
+    limiter = RateLimiter({"api": (2, 0.4)})
+    started = time.monotonic()
+    waits = [limiter.acquire("api") for _ in range(4)]
+    elapsed = time.monotonic() - started
+
+    # The first 2 go out at once, the others at the refill rate of one every 0.2 seconds
+    assert waits[0] < 0.05 and waits[1] < 0.05
+    assert 0.35 <= elapsed < 0.6
+    assert limiter.acquire("unlimited") == 0.0
+
+
+def test_waiting_requests_are_sent_by_priority():
+    limiter = RateLimiter({"api": (1, 0.2)})
+    limiter.acquire("api")
+    order = []
+
+    def request(name, priority):
+        limiter.acquire("api", priority)
+        order.append(name)
+
+    threads = []
+    for name, priority in [
+        ("backfill", RequestPriority.BACKFILL),
+        ("default", RequestPriority.DEFAULT),
+        ("latest 1", RequestPriority.LATEST),
+        ("latest 2", RequestPriority.LATEST),
+    ]:
+        thread = threading.Thread(target=request, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        # Let each request start waiting before the next one
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join()
+
+    assert order == ["latest 1", "latest 2", "default", "backfill"]
+
+
+def test_acquire_gives_up_at_the_timeout():
+    limiter = RateLimiter({"api": (1, 10.0)})
+    limiter.acquire("api")
+
+    # The next token is 10 seconds away, so the call fails without waiting for it
+    started = time.monotonic()
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire("api", timeout=0.5)
+    assert time.monotonic() - started < 0.1
+
+    # A request queued behind another one waits at most until its timeout
+    thread = threading.Thread(target=limiter.acquire, args=("api",), daemon=True)
+    thread.start()
+    time.sleep(0.02)
+    started = time.monotonic()
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire("api", timeout=0.2)
+    assert 0.15 <= time.monotonic() - started < 0.4
+    assert limiter.acquire("unlimited", timeout=0) == 0.0
+
+
+def test_pause_holds_back_an_endpoint():
+    limiter = RateLimiter({})
+    limiter.pause("api.example.com", 0.3)
+    assert 0.25 <= limiter.acquire("api.example.com") < 0.5
+    # The pause is over, so the endpoint is unlimited again
+    assert limiter.acquire("api.example.com") == 0.0
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("3", 3.0), ("0.5", 0.5), (None, None), ("soon", None), ("Wed, 21 Oct 2015 07:28:00 GMT", 0.0)],
+)
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        self.server.times.append(time.monotonic())
+        if len(self.server.times) <= self.server.throttled:
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = b'{"status": "OK"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.times = []
+    server.throttled = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_get_honors_retry_after(server):
+    server, url = server
+    server.throttled = 1
+    broker = Broker()
+    response = broker.http_get(f"{url}/bars")
+
+    assert response.status_code == 200
+    assert len(server.times) == 2
+    assert server.times[1] - server.times[0] >= 0.95
+
+
+def test_http_get_gives_up_after_max_retries(server):
+    server, url = server
+    server.throttled = 100
+    broker = Broker()
+    broker.http_max_retries = 0
+    assert broker.http_get(f"{url}/bars").status_code == 429
+    assert len(server.times) == 1
+
+
+def test_http_get_schedules_within_the_declared_quota(server):
+    server, url = server
+    broker = LimitedBroker()
+    for _ in range(3):
+        broker.http_get(f"{url}/bars", endpoint="api")
+    # Requests to endpoints without a quota are not held back
+    broker.http_get(f"{url}/status")
+
+    assert server.times[2] - server.times[0] >= 0.15
+    assert server.times[3] - server.times[2] < 0.1
+
+
+class QuotaBroker(LimitedBroker):
+    """
+    Broker with a quota of 2 requests a minute, whose latest prices come from the test server.
+    """
+
+    rate_limits = {"api": (2, 60.0)}
+    # 0.6 seconds for a 1-minute tick
+    tick_deadline_ratio = 0.01
+
+    def __init__(self, url: str) -> None:
+        super().__init__()
+        self.url = url
+        now = dt.datetime(2024, 1, 2, tzinfo=dt.timezone.utc)
+        self.stats = RuntimeData(broker_timezone=dt.timezone.utc, utc_timestamp=now)
+
+    def fetch_latest_price(self, symbol: str, interval: Interval) -> TickerCandle:
+        self.http_get(f"{self.url}/bars", endpoint="api", priority=RequestPriority.LATEST)
+        return TickerCandle(self.stats.utc_timestamp - dt.timedelta(minutes=1), symbol, 1.0, 1.0, 1.0, 1.0, 1.0)
+
+
+@pytest.mark.parametrize("workers", [1, 8])
+def test_tick_returns_by_the_deadline_under_a_quota(server, workers):
+    server, url = server
+    broker = QuotaBroker(url)
+    broker.max_fetch_workers = workers
+    symbols = [f"S{index}" for index in range(6)]
+    results = []
+    broker.watch_dict = {Interval.MIN_1: symbols}
+    broker.step_callback = results.append
+
+    started = time.monotonic()
+    broker.tick()
+
+    # The quota allows 2 requests, and the other symbols are reported late instead of waiting for it
+    assert time.monotonic() - started < 1.0
+    fetched = list(results[0][Interval.MIN_1])
+    assert len(fetched) == 2
+    assert broker.late_symbols == {Interval.MIN_1: [symbol for symbol in symbols if symbol not in fetched]}
+    assert len(server.times) == 2
@@ -0,0 +1,187 @@
+import datetime as dt
+import threading
+import time
+
+import pytest
+
+from harvest.broker._base import Broker
+from harvest.definitions import RuntimeData, TickerCandle
+from harvest.enum import Interval
+from harvest.util.helper import interval_to_timedelta
+
+NOW = dt.datetime(2008, 9, 15, 10, 0, 0, tzinfo=dt.timezone.utc)
+
+
+class SlowBroker(Broker):
+    """
+    Broker whose latest price requests block for `delay` seconds, and which records how
+    many requests were in flight at the same time.
+    """
+
+    retry_base_delay = 0.02
+    retry_max_delay = 0.1
+    # 0.6 seconds for a 1-minute tick
+    tick_deadline_ratio = 0.01
+
+    def __init__(self, delay: float = 0.05) -> None:
+        super().__init__()
+        self.stats = RuntimeData(broker_timezone=dt.timezone.utc, utc_timestamp=NOW)
+        self.delay = delay
+        # Number of times a symbol returns the previous candle before the latest one
+        self.stale = {}
+        self.failures = {}
+        self.calls = []
+        self.call_times = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def fetch_latest_price(self, symbol: str, interval: Interval) -> TickerCandle:
+        with self._lock:
+            self.calls.append((symbol, interval))
+            self.call_times.setdefault(symbol, []).append(time.monotonic())
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            threading.Event().wait(self.delay)
+            with self._lock:
+                if self.failures.get(symbol, 0) > 0:
+                    self.failures[symbol] -= 1
+                    raise ConnectionError("reset by peer")
+                stale = self.stale.get(symbol, 0) > 0
+                if stale:
+                    self.stale[symbol] -= 1
+            timestamp = self.stats.utc_timestamp - interval_to_timedelta(interval) * (2 if stale else 1)
+            return TickerCandle(timestamp, symbol, 1.0, 1.0, 1.0, 1.0, 1.0)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def run_tick(broker: Broker, watch_dict: dict) -> dict:
+    results = []
+    broker.watch_dict = watch_dict
+    broker.step_callback = results.append
+    broker.tick()
+    assert len(results) == 1
+    return results[0]
+
+
+def test_tick_fetches_symbols_concurrently():
+    broker = SlowBroker()
+    broker.max_fetch_workers = 4
+    symbols = [f"S{index}" for index in range(10)]
+    df_dict = run_tick(broker, {Interval.MIN_1: symbols, Interval.MIN_5: ["SPY"]})
+
+    assert broker.max_in_flight == 4
+    assert sorted(df_dict[Interval.MIN_1]) == sorted(symbols)
+    assert df_dict[Interval.MIN_5]["SPY"].timestamp == NOW - dt.timedelta(minutes=5)
+    assert all(candle.symbol == symbol for symbol, candle in df_dict[Interval.MIN_1].items())
+
+
+@pytest.mark.parametrize("workers", [1, 8])
+def test_tick_retries_stale_and_failed_symbols(workers):
+    broker = SlowBroker(delay=0)
+    broker.max_fetch_workers = workers
+    broker.stale = {"AAPL": 2}
+    broker.failures = {"META": 1}
+    df_dict = run_tick(broker, {Interval.MIN_1: ["SPY", "AAPL", "META"]})
+
+    assert sorted(df_dict[Interval.MIN_1]) == ["AAPL", "META", "SPY"]
+    assert df_dict[Interval.MIN_1]["AAPL"].timestamp == NOW - dt.timedelta(minutes=1)
+    assert broker.calls.count(("AAPL", Interval.MIN_1)) == 3
+    assert broker.calls.count(("SPY", Interval.MIN_1)) == 1
+
+
+def test_tick_backs_off_per_symbol():
+    broker = SlowBroker(delay=0)
+    broker.stale = {"AAPL": 3, "META": 1}
+    df_dict = run_tick(broker, {Interval.MIN_1: ["SPY", "AAPL", "META"]})
+
+    assert sorted(df_dict[Interval.MIN_1]) == ["AAPL", "META", "SPY"]
+    assert broker.late_symbols == {}
+    # A slow symbol does not hold the others back or use up their retries
+    assert [len(broker.call_times[symbol]) for symbol in ("SPY", "AAPL", "META")] == [1, 4, 2]
+    times = broker.call_times["AAPL"]
+    gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+    assert gaps[0] >= 0.01
+    assert gaps[2] > gaps[0]
+
+
+def test_tick_sends_partial_results_at_the_deadline():
+    broker = SlowBroker(delay=0)
+    broker.retry_max_attempts = 1000
+    broker.stale = {"AAPL": 1000}
+    started = time.monotonic()
+    df_dict = run_tick(broker, {Interval.MIN_1: ["SPY", "AAPL"], Interval.MIN_5: ["AAPL"]})
+    elapsed = time.monotonic() - started
+
+    assert 0.6 <= elapsed < 1.0
+    assert list(df_dict[Interval.MIN_1]) == ["SPY"]
+    assert df_dict[Interval.MIN_5] == {}
+    assert broker.late_symbols == {Interval.MIN_1: ["AAPL"], Interval.MIN_5: ["AAPL"]}
+    # Backoff is capped at retry_max_delay, so a stale symbol is polled a handful of times, not spun on
+    assert broker.calls.count(("AAPL", Interval.MIN_1)) <= 15
+
+    broker.stale = {}
+    run_tick(broker, {Interval.MIN_1: ["SPY", "AAPL"]})
+    assert broker.late_symbols == {}
+
+
+def test_tick_stops_retrying_a_symbol_after_max_attempts():
+    broker = SlowBroker(delay=0)
+    broker.retry_max_attempts = 3
+    broker.stale = {"AAPL": 1000}
+    started = time.monotonic()
+    df_dict = run_tick(broker, {Interval.MIN_1: ["SPY", "AAPL"]})
+
+    # The tick ends once AAPL is out of attempts, well before the deadline
+    assert time.monotonic() - started < 0.4
+    assert list(df_dict[Interval.MIN_1]) == ["SPY"]
+    assert broker.calls.count(("AAPL", Interval.MIN_1)) == 3
+    assert broker.late_symbols == {Interval.MIN_1: ["AAPL"]}
+
+
+def test_tick_skips_intervals_that_are_not_due():
+    broker = SlowBroker(delay=0)
+    broker.stats.utc_timestamp = NOW + dt.timedelta(minutes=1)
+    df_dict = run_tick(broker, {Interval.MIN_1: ["SPY"], Interval.MIN_5: ["META"]})
+    assert list(df_dict) == [Interval.MIN_1]
+    assert broker.calls == [("SPY", Interval.MIN_1)]
+
+
+class BatchBroker(SlowBroker):
+    """
+    Broker that returns the latest candles of all requested symbols in one call.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(delay=0)
+        self.batches = []
+
+    def fetch_latest_prices(self, symbols, interval):
+        self.batches.append((list(symbols), interval))
+        return {symbol: self.fetch_latest_price(symbol, interval) for symbol in symbols if symbol != "GONE"}
+
+
+def test_default_fetch_latest_prices_leaves_out_failed_symbols():
+    broker = SlowBroker(delay=0)
+    broker.failures = {"META": 1}
+    candles = broker.fetch_latest_prices(["SPY", "META", "AAPL"], Interval.MIN_1)
+    assert sorted(candles) == ["AAPL", "SPY"]
+    assert candles["AAPL"].symbol == "AAPL"
+
+
+def test_tick_fetches_each_interval_in_one_batch():
+    broker = BatchBroker()
+    broker.stale = {"AAPL": 1}
+    df_dict = run_tick(broker, {Interval.MIN_1: ["SPY", "AAPL", "GONE"], Interval.MIN_5: ["META", "AAPL"]})
+
+    assert broker.batches[:2] == [(["SPY", "AAPL", "GONE"], Interval.MIN_1), (["META", "AAPL"], Interval.MIN_5)]
+    # Only the symbols that were not up to date are requested again
+    retried = [symbol for symbols, _ in broker.batches[2:] for symbol in symbols]
+    assert retried.count("AAPL") == 1
+    assert set(retried) == {"AAPL", "GONE"}
+    assert sorted(df_dict[Interval.MIN_1]) == ["AAPL", "SPY"]
+    assert sorted(df_dict[Interval.MIN_5]) == ["AAPL", "META"]
+    assert broker.late_symbols == {Interval.MIN_1: ["GONE"]}
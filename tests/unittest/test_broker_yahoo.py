@@ -6,6 +6,7 @@ import pandas as pd
 from _util import mock_utc_current_time
 
 from harvest.broker.yahoo import YahooBroker
+from harvest.enum import Interval
 from harvest.util.helper import data_to_occ
 from tests.unittest.test_broker_base import TestBroker
 
@@ -211,6 +212,32 @@ class TestYahooBroker(TestBroker, unittest.TestCase):
 
         super().test_chain_data(YahooBroker)
 
+    @patch("harvest.broker.yahoo.utc_current_time", mock_utc_current_time)
+    @patch("yfinance.download")
+    def test_fetch_latest_prices(self, mock_download):
+        """
+        Test that the latest bars of all symbols are downloaded with one call,
+        and that the bar that is still forming is left out.
+        """
+        now = mock_utc_current_time()
+        index = pd.date_range(now - dt.timedelta(minutes=2), now, freq="min")
+        columns = pd.MultiIndex.from_product(
+            [["SPY", "BTC-USD"], ["Open", "High", "Low", "Close", "Adj Close", "Volume"]]
+        )
+        mock_download.return_value = pd.DataFrame(
+            [[float(row)] * len(columns) for row in range(len(index))], index=index, columns=columns
+        )
+
+        candles = YahooBroker().fetch_latest_prices(["SPY", "@BTC", "QQQ"], Interval.MIN_1)
+
+        mock_download.assert_called_once()
+        self.assertEqual(mock_download.call_args.args[0], "SPY BTC-USD QQQ")
+        # QQQ is not in the download, so it is left out
+        self.assertEqual(sorted(candles), ["@BTC", "SPY"])
+        self.assertEqual(candles["SPY"].timestamp, now - dt.timedelta(minutes=1))
+        self.assertEqual(candles["SPY"].close, 1.0)
+        self.assertEqual(candles["@BTC"].symbol, "@BTC")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,106 @@
+import datetime as dt
+from zoneinfo import ZoneInfo
+
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from harvest.definitions import RuntimeData, TickerFrame
+from harvest.enum import Interval
+from harvest.storage._base import CentralStorage
+from harvest.util.helper import generate_ticker_frame
+
+START = dt.datetime(2024, 1, 1)
+
+
+def make_storage():
+    storage = CentralStorage()
+    storage.insert_price_history(generate_ticker_frame("A", Interval.MIN_1, 100, start=START))
+    storage.insert_price_history(generate_ticker_frame("B", Interval.MIN_1, 100, start=START))
+    return storage
+
+
+def test_reads_follow_the_clock():
+    storage = make_storage()
+    full = storage.get_price_history("A", Interval.MIN_1).df
+    stats = RuntimeData(ZoneInfo("America/New_York"), (START + dt.timedelta(minutes=10)).replace(tzinfo=dt.timezone.utc))
+    view = storage.as_of(stats)
+
+    assert_frame_equal(view.get_price_history("A", Interval.MIN_1).df, full.head(10))
+
+    stats.utc_timestamp += dt.timedelta(minutes=20)
+    assert_frame_equal(view.get_price_history("A", Interval.MIN_1).df, full.head(30))
+
+    # An end past the clock is capped, and ranges are inclusive
+    window = view.get_price_history(
+        "A", Interval.MIN_1, start=START + dt.timedelta(minutes=25), end=START + dt.timedelta(hours=1)
+    )
+    assert_frame_equal(window.df, full.slice(25, 5))
+    assert view.get_price_history("A", Interval.MIN_1, start=START + dt.timedelta(minutes=40)).df.is_empty()
+
+
+def test_bars_are_visible_once_they_close():
+    storage = make_storage()
+    stats = RuntimeData(ZoneInfo("UTC"), (START + dt.timedelta(minutes=10)).replace(tzinfo=dt.timezone.utc))
+    view = storage.as_of(stats)
+
+    # The 00:09 bar closed at 00:10, while the 00:10 bar is still open
+    timestamps = view.get_price_history("A", Interval.MIN_1).df["timestamp"]
+    assert timestamps[-1] == START + dt.timedelta(minutes=9)
+    window = view.get_price_history(
+        "A", Interval.MIN_1, start=START + dt.timedelta(minutes=9), end=START + dt.timedelta(minutes=10)
+    )
+    assert window.df["timestamp"].to_list() == [START + dt.timedelta(minutes=9)]
+
+    storage.insert_price_history(generate_ticker_frame("A", Interval.HR_1, 3, start=START))
+    assert view.get_price_history("A", Interval.HR_1).df.is_empty()
+    stats.utc_timestamp += dt.timedelta(minutes=50)
+    assert view.get_price_history("A", Interval.HR_1).df["timestamp"].to_list() == [START]
+
+
+def test_clock_in_another_timezone():
+    storage = make_storage()
+    stats = RuntimeData(ZoneInfo("UTC"), dt.datetime(2023, 12, 31, 19, 5, tzinfo=ZoneInfo("America/New_York")))
+    assert storage.as_of(stats).get_price_history("A", Interval.MIN_1).df.height == 5
+
+
+def test_view_is_loaded_once():
+    storage = make_storage()
+    stats = RuntimeData(ZoneInfo("UTC"), START + dt.timedelta(minutes=50))
+    storage.setup(stats)
+    view = storage.as_of()
+
+    frames = view.get_price_history_many(["B", "A", "C"], Interval.MIN_1, as_dict=True)
+    assert [frames[symbol].df.height for symbol in ("A", "B", "C")] == [50, 50, 0]
+    long = view.get_price_history_many(["B", "A"], Interval.MIN_1).df
+    assert long["symbol"].to_list() == ["A"] * 50 + ["B"] * 50
+
+    # Later inserts are only seen after a reload
+    update = generate_ticker_frame("A", Interval.MIN_1, 1, start=START).df.with_columns(pl.lit(1.0).alias("close"))
+    storage.insert_price_history(TickerFrame(update))
+    assert view.get_price_history("A", Interval.MIN_1).df["close"][0] != 1.0
+    view.reload()
+    assert view.get_price_history("A", Interval.MIN_1).df["close"][0] == 1.0
+
+
+def test_aware_bounds_are_converted_to_utc():
+    storage = make_storage()
+    stats = RuntimeData(ZoneInfo("UTC"), (START + dt.timedelta(minutes=59)).replace(tzinfo=dt.timezone.utc))
+    view = storage.as_of(stats)
+    new_york = ZoneInfo("America/New_York")
+
+    # 19:10 and 19:19 in New York are 00:10 and 00:19 UTC
+    window = view.get_price_history(
+        "A",
+        Interval.MIN_1,
+        start=dt.datetime(2023, 12, 31, 19, 10, tzinfo=new_york),
+        end=dt.datetime(2023, 12, 31, 19, 19, tzinfo=new_york),
+    )
+    assert_frame_equal(window.df, storage.get_price_history("A", Interval.MIN_1).df.slice(10, 10))
+
+
+def test_no_symbols():
+    view = make_storage().as_of(RuntimeData(ZoneInfo("UTC"), START))
+    empty = view.get_price_history_many([], Interval.MIN_1)
+    assert empty.df.is_empty()
+    assert empty.df.columns == ["timestamp", "symbol", "interval", "open", "high", "low", "close", "volume"]
+    assert view.get_price_history_many([], Interval.MIN_1, as_dict=True) == {}
@@ -0,0 +1,86 @@
+import asyncio
+import datetime as dt
+import logging
+import threading
+
+import pytest
+from polars.testing import assert_frame_equal
+
+from harvest.definitions import OrderEvent, OrderSide, Transaction
+from harvest.enum import Interval
+from harvest.storage.async_storage import AsyncCentralStorage, AsyncLocalAlgorithmStorage
+from harvest.util.helper import generate_ticker_frame
+
+START = dt.datetime(2024, 1, 1)
+
+
+def test_central_storage_round_trip():
+    async def run():
+        storage = AsyncCentralStorage()
+        frame = generate_ticker_frame("A", Interval.MIN_1, 20, start=START)
+        # Fire and forget: the read is scheduled after the write, so it sees it
+        storage.insert_price_history(frame)
+        read = await storage.get_price_history("A", Interval.MIN_1)
+        assert_frame_equal(read.df, frame.df)
+
+        assert await storage.bulk_insert_price_history(generate_ticker_frame("B", Interval.MIN_1, 5, start=START)) == 5
+        frames = await storage.get_price_history_many(["A", "B"], Interval.MIN_1, as_dict=True)
+        assert [len(frames[symbol].df) for symbol in ("A", "B")] == [20, 5]
+        assert await storage.get_latest_price_timestamp("A", Interval.MIN_1) == START + dt.timedelta(minutes=19)
+
+        await storage.insert_account_performance(START, "5min_1day", 100.0)
+        assert (await storage.get_latest_account_performance("5min_1day"))["equity"] == 100.0
+        await storage.close()
+
+    asyncio.run(run())
+
+
+def test_calls_run_off_the_event_loop():
+    async def run():
+        storage = AsyncCentralStorage()
+        loop_thread = threading.get_ident()
+        threads = set()
+
+        def slow_read():
+            threads.add(threading.get_ident())
+            threading.Event().wait(0.2)
+
+        read = storage._submit(slow_read)
+        # The loop keeps running while the read blocks the storage thread
+        ticks = 0
+        while not read.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        assert ticks > 5
+        assert loop_thread not in threads
+        await storage.close()
+
+    asyncio.run(run())
+
+
+def test_failed_writes_are_logged(caplog):
+    async def run():
+        storage = AsyncCentralStorage()
+        write = storage.insert_price_history(None)
+        with pytest.raises(AttributeError):
+            await write
+        await storage.close()
+
+    with caplog.at_level(logging.ERROR, logger="harvest"):
+        asyncio.run(run())
+    assert "Background storage write failed" in caplog.text
+
+
+def test_local_storage():
+    async def run():
+        storage = AsyncLocalAlgorithmStorage("algo", write_behind=True)
+        for minutes in range(3):
+            storage.insert_transaction(
+                Transaction(START + dt.timedelta(minutes=minutes), "A", OrderSide.BUY, 1.0, 10.0, OrderEvent.FILL, "algo")
+            )
+        await storage.flush()
+        history = await storage.get_transaction_history("A")
+        assert len(history.df) == 3
+        await storage.close()
+
+    asyncio.run(run())
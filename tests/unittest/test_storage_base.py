@@ -40,12 +40,14 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 import datetime as dt
 import pytest
 import polars as pl
+import sqlalchemy
 import tempfile
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 
 # Import directly from the storage module to avoid circular imports
 from harvest.storage._base import (
     LocalAlgorithmStorage,
+    LocalStorageBackend,
     CentralStorage,
     Storage,
     PriceHistory,
@@ -64,6 +66,7 @@ from harvest.definitions import (
     TransactionFrame,
 )
 from harvest.enum import Interval
+from harvest.util.helper import generate_ticker_frame
 
 
 class TestLocalAlgorithmStorage:
@@ -419,6 +422,170 @@ class TestLocalAlgorithmStorage:
         assert row["side"] == "sell"  # OrderSide.SELL.value is "sell"
         assert row["quantity"] == 50.0
 
+    def _count_rows(self, storage, model):
+        with storage.db_engine.connect() as connection:
+            return connection.execute(sqlalchemy.select(sqlalchemy.func.count()).select_from(model)).scalar()
+
+    def test_write_behind_transactions(self):
+        """Test that write-behind mode buffers transactions and serves them from reads."""
+        storage = LocalAlgorithmStorage(algorithm_name=self.algorithm_name, write_behind=True)
+        for i in range(3):
+            storage.insert_transaction(Transaction(
+                timestamp=self.test_timestamp + dt.timedelta(seconds=i),
+                symbol="AAPL",
+                side=OrderSide.BUY if i % 2 == 0 else OrderSide.SELL,
+                quantity=10.0 + i,
+                price=150.0,
+                event=OrderEvent.FILL,
+                algorithm_name=self.algorithm_name,
+            ))
+
+        assert self._count_rows(storage, TransactionHistory) == 0
+        assert len(storage.get_transaction_history("AAPL").df) == 3
+        assert storage.get_transaction_history("AAPL", side=OrderSide.SELL).df["quantity"].to_list() == [11.0]
+        assert len(storage.get_transaction_history("MSFT").df) == 0
+
+        buffered = storage.get_transaction_history("AAPL").df
+        storage.flush()
+        assert self._count_rows(storage, TransactionHistory) == 3
+        assert storage.get_transaction_history("AAPL").df.equals(buffered)
+
+    def test_write_behind_performance(self):
+        """Test that buffered performance rows behave like upserts."""
+        storage = LocalAlgorithmStorage(algorithm_name=self.algorithm_name, write_behind=True)
+        storage.insert_algorithm_performance(self.test_timestamp, "5min_1day", 1000.0)
+        storage.flush()
+        storage.insert_algorithm_performance(self.test_timestamp, "5min_1day", 1100.0)
+        storage.insert_algorithm_performance(self.test_timestamp + dt.timedelta(minutes=5), "5min_1day", 1200.0)
+        storage.insert_algorithm_performance(self.test_timestamp + dt.timedelta(minutes=5), "5min_1day", 1250.0)
+
+        history = storage.get_algorithm_performance_history("5min_1day")
+        assert history["equity"].to_list() == [1100.0, 1250.0]
+        assert storage.get_latest_performance("5min_1day")["equity"] == 1250.0
+
+        storage.flush()
+        assert storage.get_algorithm_performance_history("5min_1day").equals(history)
+
+    def test_write_behind_retention(self):
+        """Test that write-behind mode applies retention limits like immediate mode."""
+        results = []
+        for write_behind in (False, True):
+            storage = LocalAlgorithmStorage(
+                algorithm_name=self.algorithm_name,
+                transaction_storage_limit=TimeDelta(TimeSpan.MINUTE, 1),
+                write_behind=write_behind,
+            )
+            for i in range(10):
+                storage.insert_transaction(Transaction(
+                    timestamp=self.test_timestamp + dt.timedelta(seconds=30 * i),
+                    symbol="AAPL",
+                    side=OrderSide.BUY,
+                    quantity=float(i),
+                    price=150.0,
+                    event=OrderEvent.FILL,
+                    algorithm_name=self.algorithm_name,
+                ))
+                if i == 4:
+                    storage.flush()
+            results.append(storage.get_transaction_history("AAPL").df)
+            storage.flush()
+            results.append(storage.get_transaction_history("AAPL").df)
+
+        assert results[0]["quantity"].to_list() == [8.0, 9.0]
+        for result in results[1:]:
+            assert result.equals(results[0])
+
+    def test_write_behind_automatic_flush(self):
+        """Test that write-behind buffers flush on row count and on close."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = f"sqlite:///{os.path.join(temp_dir, 'algo.db')}"
+            storage = LocalAlgorithmStorage(
+                algorithm_name=self.algorithm_name, db_path=db_path, write_behind=True, flush_max_rows=2
+            )
+            for i in range(3):
+                storage.insert_algorithm_performance(self.test_timestamp + dt.timedelta(minutes=i), "5min_1day", 1000.0)
+            assert self._count_rows(storage, AlgorithmPerformanceHistory) == 2
+
+            storage.close()
+            engine = sqlalchemy.create_engine(db_path)
+            with engine.connect() as connection:
+                count = connection.execute(
+                    sqlalchemy.select(sqlalchemy.func.count()).select_from(AlgorithmPerformanceHistory)
+                ).scalar()
+            engine.dispose()
+            assert count == 3
+
+
+class TestLocalStorageBackend:
+    """Test cases for LocalAlgorithmStorage instances sharing a LocalStorageBackend."""
+
+    def setup_method(self):
+        self.backend = LocalStorageBackend()
+        self.test_timestamp = dt.datetime(2024, 1, 1, 12, 0, 0)
+
+    def _transaction(self, algorithm_name, minutes, side=OrderSide.BUY):
+        return Transaction(
+            timestamp=self.test_timestamp + dt.timedelta(minutes=minutes),
+            symbol="AAPL",
+            side=side,
+            quantity=float(minutes),
+            price=150.0,
+            event=OrderEvent.FILL,
+            algorithm_name=algorithm_name,
+        )
+
+    def test_storages_share_engine(self):
+        """Test that storages of a backend share its engine and stay isolated."""
+        first = LocalAlgorithmStorage("algorithm_1", backend=self.backend)
+        second = LocalAlgorithmStorage("algorithm_2", backend=self.backend)
+        assert first.db_engine is second.db_engine is self.backend.db_engine
+        assert self.backend.algorithm_names == {"algorithm_1", "algorithm_2"}
+
+        first.insert_transaction(self._transaction("algorithm_1", 0))
+        second.insert_transaction(self._transaction("algorithm_2", 1, OrderSide.SELL))
+        first.insert_algorithm_performance(self.test_timestamp, "5min_1day", 1000.0)
+        second.insert_algorithm_performance(self.test_timestamp, "5min_1day", 2000.0)
+
+        assert first.get_transaction_history("AAPL").df["side"].to_list() == ["buy"]
+        assert second.get_transaction_history("AAPL").df["side"].to_list() == ["sell"]
+        assert first.get_algorithm_performance_history("5min_1day")["equity"].to_list() == [1000.0]
+        assert second.get_latest_performance("5min_1day")["equity"] == 2000.0
+
+    @pytest.mark.parametrize("write_behind", [False, True])
+    def test_retention_is_isolated(self, write_behind):
+        """Test that retention deletes of one storage keep the rows of the others."""
+        limit = TimeDelta(TimeSpan.MINUTE, 1)
+        first = LocalAlgorithmStorage(
+            "algorithm_1", transaction_storage_limit=limit, write_behind=write_behind, backend=self.backend
+        )
+        second = LocalAlgorithmStorage("algorithm_2", transaction_storage_limit=limit, backend=self.backend)
+
+        second.insert_transaction(self._transaction("algorithm_2", 0))
+        for minutes in range(10):
+            first.insert_transaction(self._transaction("algorithm_1", minutes))
+        first.flush()
+
+        assert first.get_transaction_history("AAPL").df["quantity"].to_list() == [9.0]
+        assert len(second.get_transaction_history("AAPL").df) == 1
+
+    def test_algorithm_name_in_use(self):
+        """Test that an algorithm name can only be attached once at a time."""
+        storage = LocalAlgorithmStorage("algorithm_1", backend=self.backend)
+        storage.insert_transaction(self._transaction("algorithm_1", 0))
+        with pytest.raises(ValueError):
+            LocalAlgorithmStorage("algorithm_1", backend=self.backend)
+
+        storage.close()
+        assert self.backend.algorithm_names == set()
+        reopened = LocalAlgorithmStorage("algorithm_1", backend=self.backend)
+        assert reopened.get_transaction_history("AAPL").df.is_empty()
+
+    def test_backend_and_db_path(self):
+        """Test that a storage cannot use both a backend and a database of its own."""
+        with pytest.raises(ValueError):
+            LocalAlgorithmStorage("algorithm_1", db_path="sqlite:///:memory:", backend=self.backend)
+        assert self.backend.algorithm_names == set()
+
 
 class TestCentralStorage:
     """Test cases for CentralStorage class."""
@@ -565,6 +732,29 @@ class TestCentralStorage:
         )
         assert len(filtered_history.df) == 2
 
+    def test_get_price_history_schema(self):
+        """Test that database reads return typed columns, even when no rows match."""
+        storage = CentralStorage(enable_price_cache=False)
+        storage.insert_price_history(generate_ticker_frame("AAPL", Interval.MIN_1, 5, start=self.test_timestamp))
+
+        expected_schema = {
+            "timestamp": pl.Datetime("us"),
+            "symbol": pl.String,
+            "interval": pl.String,
+            "open": pl.Float64,
+            "high": pl.Float64,
+            "low": pl.Float64,
+            "close": pl.Float64,
+            "volume": pl.Float64,
+        }
+        history = storage.get_price_history("AAPL", Interval.MIN_1, start=self.test_timestamp + dt.timedelta(minutes=2))
+        assert dict(history.df.schema) == expected_schema
+        assert history.df["timestamp"][0] == self.test_timestamp + dt.timedelta(minutes=2)
+
+        empty = storage.get_price_history("MSFT", Interval.MIN_1)
+        assert empty.df.is_empty()
+        assert dict(empty.df.schema) == expected_schema
+
     def test_insert_account_performance(self):
         """Test inserting account performance data."""
         self.storage.insert_account_performance(
@@ -762,6 +952,82 @@ class TestCentralStorage:
         assert row["close"] == 156.0
         assert row["volume"] == 1200.0
 
+    def test_bulk_insert_price_history(self):
+        """Test that bulk inserts store the same data as regular inserts."""
+        frame = generate_ticker_frame("AAPL", Interval.MIN_1, 500, start=self.test_timestamp)
+        reference = CentralStorage(enable_price_cache=False)
+        reference.insert_price_history(frame)
+
+        bulk = CentralStorage(enable_price_cache=False)
+        # A small batch size exercises multiple executemany calls
+        written = bulk.bulk_insert_price_history(frame, batch_size=64)
+
+        assert written == 500
+        assert bulk.get_price_history("AAPL", Interval.MIN_1).df.equals(
+            reference.get_price_history("AAPL", Interval.MIN_1).df
+        )
+
+    def test_bulk_insert_price_history_upsert(self):
+        """Test that bulk inserts update existing rows and accept multiple symbols."""
+        self.storage.insert_price_history(generate_ticker_frame("AAPL", Interval.MIN_1, 10, start=self.test_timestamp))
+
+        df = generate_ticker_frame("AAPL", Interval.MIN_1, 20, start=self.test_timestamp).df
+        df = pl.concat([df, generate_ticker_frame("MSFT", Interval.MIN_5, 3, start=self.test_timestamp).df])
+        self.storage.bulk_insert_price_history(TickerFrame(df))
+
+        history = self.storage.get_price_history("AAPL", Interval.MIN_1)
+        assert len(history.df) == 20
+        assert history.df["close"].to_list() == df["close"][:20].to_list()
+        assert len(self.storage.get_price_history("MSFT", Interval.MIN_5).df) == 3
+
+    def test_bulk_insert_price_history_postgresql(self):
+        """Test that bulk inserts use the PostgreSQL UPSERT on PostgreSQL databases."""
+        storage = CentralStorage(enable_price_cache=False)
+        storage.write_engine = MagicMock()
+        storage.write_engine.dialect.name = "postgresql"
+        connection = storage.write_engine.begin.return_value.__enter__.return_value
+
+        frame = generate_ticker_frame("AAPL", Interval.MIN_1, 3, start=self.test_timestamp)
+        # Rows repeated in one statement must be collapsed to the last one
+        df = pl.concat([frame.df, frame.df.tail(1).with_columns(pl.lit(1.0).alias("close"))])
+        storage.bulk_insert_price_history(TickerFrame(df))
+
+        statement, rows = connection.execute.call_args.args
+        sql = str(statement.compile(dialect=sqlalchemy.dialects.postgresql.dialect()))
+        assert "ON CONFLICT (symbol, interval, timestamp) DO UPDATE" in sql
+        assert [row["close"] for row in rows] == frame.df["close"].head(2).to_list() + [1.0]
+        assert all(row["timestamp"].tzinfo is None for row in rows)
+
+        storage.write_engine.dialect.name = "mysql"
+        with pytest.raises(ValueError):
+            storage.bulk_insert_price_history(frame)
+
+    @pytest.mark.parametrize("enable_price_cache", [True, False])
+    def test_get_price_history_many(self, enable_price_cache):
+        """Test that a batched read returns the same rows as one read per symbol."""
+        storage = CentralStorage(enable_price_cache=enable_price_cache)
+        symbols = ["MSFT", "AAPL", "TSLA"]
+        for symbol in symbols:
+            storage.insert_price_history(generate_ticker_frame(symbol, Interval.MIN_1, 30, start=self.test_timestamp))
+        # A later insert moves the retention cutoff of one symbol only
+        storage.insert_price_history(
+            generate_ticker_frame("AAPL", Interval.MIN_1, 1, start=self.test_timestamp + dt.timedelta(days=1, minutes=10))
+        )
+        start = self.test_timestamp + dt.timedelta(minutes=5)
+
+        frames = storage.get_price_history_many(symbols + ["NVDA", "AAPL"], Interval.MIN_1, start=start, as_dict=True)
+        assert list(frames) == symbols + ["NVDA"]
+        for symbol in symbols:
+            expected = storage.get_price_history(symbol, Interval.MIN_1, start=start).df
+            assert frames[symbol].df.equals(expected.cast(frames[symbol].df.schema))
+        assert frames["NVDA"].df.is_empty()
+        # Rows up to 12:10 fell out of AAPL's one day window
+        assert len(frames["AAPL"].df) == 20
+
+        long = storage.get_price_history_many(symbols, Interval.MIN_1, start=start).df
+        assert long["symbol"].to_list() == ["AAPL"] * 20 + ["MSFT"] * 25 + ["TSLA"] * 25
+        assert long.filter(pl.col("symbol") == "AAPL")["timestamp"].is_sorted()
+
 
 class TestBackwardCompatibility:
     """Test backward compatibility features."""
@@ -0,0 +1,132 @@
+import datetime as dt
+import os
+
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from harvest.definitions import TickerFrame, TimeDelta, TimeSpan
+from harvest.enum import Interval
+from harvest.storage._base import CentralStorage
+from harvest.storage.cold_storage import ParquetColdStorage
+from harvest.util.helper import generate_ticker_frame
+
+
+def make_storage(path, **kwargs):
+    return CentralStorage(
+        price_storage_limit={Interval.HR_1: TimeDelta(TimeSpan.DAY, 1)},
+        cold_storage_path=str(path),
+        **kwargs,
+    )
+
+
+def test_aged_rows_move_to_parquet(tmp_path):
+    """
+    Rows past the hot window should be moved into date partitions, not deleted.
+    """
+    storage = make_storage(tmp_path)
+    frame = generate_ticker_frame("A", Interval.HR_1, 72, start=dt.datetime(2024, 1, 1))
+    storage.insert_price_history(frame)
+
+    report = storage.retention.run_once()
+
+    assert report.total == 48
+    assert sorted(os.listdir(tmp_path / "symbol=A" / "interval=HR_1")) == [
+        "date=2024-01-01",
+        "date=2024-01-02",
+    ]
+    assert_frame_equal(storage.get_price_history("A", Interval.HR_1).df, frame.df)
+
+
+def test_reads_stitch_tiers(tmp_path):
+    """
+    Ranges spanning both tiers should be served from both, before and after archiving.
+    """
+    storage = make_storage(tmp_path)
+    frame = generate_ticker_frame("A", Interval.HR_1, 72, start=dt.datetime(2024, 1, 1))
+    storage.insert_price_history(frame)
+
+    start = dt.datetime(2024, 1, 2, 12)
+    end = dt.datetime(2024, 1, 3, 5)
+    expected = frame.df.filter(pl.col("timestamp").is_between(start, end))
+
+    # Expired rows that were not archived yet must not disappear
+    assert_frame_equal(storage.get_price_history("A", Interval.HR_1, start, end).df, expected)
+    storage.retention.run_once()
+    assert_frame_equal(storage.get_price_history("A", Interval.HR_1, start, end).df, expected)
+
+    # Ranges inside the hot window do not touch the cold tier
+    recent = storage.get_price_history("A", Interval.HR_1, start=dt.datetime(2024, 1, 3, 12))
+    assert len(recent.df) == 12
+
+
+def test_cold_tier_persists_across_restarts(tmp_path):
+    storage = make_storage(tmp_path)
+    frame = generate_ticker_frame("A", Interval.HR_1, 72, start=dt.datetime(2024, 1, 1))
+    storage.insert_price_history(frame)
+    storage.retention.run_once()
+
+    restarted = make_storage(tmp_path)
+    assert_frame_equal(restarted.get_price_history("A", Interval.HR_1).df, frame.df.head(48))
+
+
+def test_partition_rewrite_replaces_duplicates(tmp_path):
+    cold = ParquetColdStorage(str(tmp_path))
+    frame = generate_ticker_frame("A", Interval.HR_1, 10, start=dt.datetime(2024, 1, 1))
+    cold.write(frame.df)
+    updated = frame.df.head(3).with_columns(pl.lit(1.0).alias("close"))
+    cold.write(updated)
+
+    stored = cold.read("A", "HR_1")
+    assert len(stored) == 10
+    assert stored["close"].head(3).to_list() == [1.0, 1.0, 1.0]
+    assert stored["close"].tail(7).to_list() == frame.df["close"].tail(7).to_list()
+    assert cold.read("A", "HR_1", start=dt.datetime(2024, 1, 1, 8)).height == 2
+    assert cold.read("B", "HR_1").is_empty()
+
+
+def test_reads_prune_partitions(tmp_path):
+    """
+    Range reads should only open the partitions of the days in the range.
+    """
+    cold = ParquetColdStorage(str(tmp_path))
+    cold.write(generate_ticker_frame("A", Interval.HR_1, 72, start=dt.datetime(2024, 1, 1)).df)
+    (tmp_path / "symbol=A" / "interval=HR_1" / "date=2024-01-01" / "data.parquet").write_bytes(b"corrupt")
+
+    assert cold.read("A", "HR_1", start=dt.datetime(2024, 1, 2, 5)).height == 43
+
+
+def test_cached_ranges_skip_the_cold_tier(tmp_path, mocker):
+    """
+    Ranges the price cache holds from before their start should not read Parquet.
+    """
+    storage = make_storage(tmp_path)
+    frame = generate_ticker_frame("A", Interval.HR_1, 72, start=dt.datetime(2024, 1, 1))
+    storage.insert_price_history(frame)
+    storage.retention.run_once()
+
+    # Nothing expires in the restarted storage, so there is no retention cutoff to compare with
+    restarted = CentralStorage(
+        price_storage_limit={Interval.HR_1: TimeDelta(TimeSpan.DAY, -1)}, cold_storage_path=str(tmp_path)
+    )
+    restarted.insert_price_history(TickerFrame(frame.df.tail(24)))
+    read = mocker.spy(restarted.cold_storage, "read")
+
+    start = dt.datetime(2024, 1, 3, 12)
+    expected = frame.df.filter(pl.col("timestamp") >= start)
+    assert_frame_equal(restarted.get_price_history("A", Interval.HR_1, start).df, expected)
+    assert_frame_equal(restarted.get_price_history_many(["A"], Interval.HR_1, start).df, expected)
+    assert read.call_count == 0
+
+    # Ranges starting before the cached rows still read both tiers
+    assert_frame_equal(restarted.get_price_history("A", Interval.HR_1).df, frame.df)
+    assert read.call_count == 1
+
+
+def test_symbols_with_slashes_stay_in_one_partition(tmp_path):
+    cold = ParquetColdStorage(str(tmp_path))
+    frame = generate_ticker_frame("BRK/B", Interval.HR_1, 10, start=dt.datetime(2024, 1, 1))
+    cold.write(frame.df)
+
+    assert sorted(os.listdir(tmp_path)) == ["symbol=BRK%2FB"]
+    assert_frame_equal(cold.read("BRK/B", "HR_1"), frame.df)
+    assert ParquetColdStorage(str(tmp_path))._keys == {("BRK/B", "HR_1")}
@@ -1,10 +1,13 @@
+import datetime as dt
 import os
 import unittest
 
-from pandas.testing import assert_frame_equal
+import polars as pl
+from polars.testing import assert_frame_equal
 
+from harvest.enum import Interval
 from harvest.storage.database_storage import DBStorage
-from harvest.util.helper import gen_data
+from harvest.util.helper import generate_ticker_frame
 
 
 class TestDBStorage(unittest.TestCase):
@@ -18,22 +21,37 @@ class TestDBStorage(unittest.TestCase):
 
     def test_simple_load(self):
         storage = DBStorage("sqlite:///foo.db")
-        data = gen_data("A", 50)
-        storage.store("A", "1MIN", data.copy(True))
+        data = generate_ticker_frame("A", Interval.MIN_1, 50).df
+        storage.store("A", "MIN_1", data)
 
-        loaded_data = storage.load("A", "1MIN")
+        loaded_data = storage.load("A", "MIN_1")
 
-        # sort_index to prevent order issues
-        assert_frame_equal(loaded_data.sort_index(axis=1), data.sort_index(axis=1))
+        assert_frame_equal(loaded_data, data)
+
+    def test_store_updates_existing_rows(self):
+        storage = DBStorage("sqlite:///foo.db")
+        data = generate_ticker_frame("B", Interval.MIN_1, 50).df
+        storage.store("B", "MIN_1", data, batch_size=7)
+        updated = data.tail(5).with_columns(pl.lit(1.0).alias("close"))
+        # Duplicated timestamps in one call keep the last row
+        self.assertEqual(storage.store("B", "MIN_1", pl.concat([data.tail(5), updated])), 5)
+
+        loaded_data = storage.load("B", "MIN_1")
+        assert_frame_equal(loaded_data, pl.concat([data.head(45), updated]))
+
+        start = dt.datetime(1970, 1, 1, 0, 10)
+        self.assertEqual(len(storage.load("B", "MIN_1", start=start, end=start + dt.timedelta(minutes=4))), 5)
 
     def test_reset(self):
         storage = DBStorage("sqlite:///foo.db")
-        data = gen_data("A", 50)
-        storage.store("A", "1MIN", data.copy(True))
-        storage.reset("A", "1MIN")
-        loaded_data = storage.load("A", "1MIN")
+        data = generate_ticker_frame("A", Interval.MIN_1, 50).df
+        storage.store("A", "MIN_1", data)
+        storage.store("A", "MIN_5", data)
+        storage.reset("A", "MIN_1")
+        loaded_data = storage.load("A", "MIN_1")
 
         self.assertTrue(loaded_data is None)
+        self.assertEqual(len(storage.load("A", "MIN_5")), 50)
 
     @classmethod
     def tearDownClass(self):
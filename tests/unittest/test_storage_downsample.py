@@ -0,0 +1,99 @@
+import datetime as dt
+
+import numpy as np
+import polars as pl
+import pytest
+
+from harvest.definitions import TimeDelta, TimeSpan
+from harvest.storage._base import CentralStorage, LocalAlgorithmStorage
+from harvest.storage.downsample import DownsampleCache, lttb, lttb_indices
+
+START = dt.datetime(2024, 1, 1)
+
+
+def test_lttb_indices_keeps_endpoints_and_size():
+    x = np.arange(1000)
+    y = np.sin(x / 50)
+    indices = lttb_indices(x, y, 100)
+
+    assert len(indices) == 100
+    assert indices[0] == 0
+    assert indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_indices_keeps_spike():
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[537] = 100.0
+    assert 537 in lttb_indices(x, y, 20)
+
+
+@pytest.mark.parametrize("max_points, expected", [(10, 5), (2, 2), (0, 2)])
+def test_lttb_indices_small_targets(max_points, expected):
+    assert len(lttb_indices(np.arange(5), np.arange(5), max_points)) == min(expected, 5)
+
+
+def test_lttb_frame_returns_original_rows():
+    df = pl.DataFrame(
+        {
+            "timestamp": [START + dt.timedelta(minutes=i) for i in range(500)],
+            "equity": np.random.default_rng(0).normal(size=500).cumsum(),
+        }
+    )
+    sampled = lttb(df, 50)
+
+    assert len(sampled) == 50
+    assert sampled["timestamp"].is_sorted()
+    assert sampled.join(df, on=["timestamp", "equity"], how="anti").is_empty()
+    assert lttb(df, 1000) is df
+
+
+def test_cache_ignores_results_of_outdated_reads():
+    cache = DownsampleCache()
+    version = cache.version("a")
+    cache.invalidate("a")
+    cache.put("a", 10, pl.DataFrame(), version)
+    assert cache.get("a", 10) is None
+
+    cache.put("a", 10, pl.DataFrame(), cache.version("a"))
+    assert cache.get("a", 10) is not None
+    cache.invalidate("a")
+    assert cache.get("a", 10) is None
+
+
+def test_account_performance_downsampling():
+    storage = CentralStorage(performance_storage_limit={"variable_all": TimeDelta(TimeSpan.DAY, -1)})
+    for day in range(1000):
+        storage.insert_account_performance(START + dt.timedelta(days=day), "variable_all", 100.0 + day % 37)
+
+    full = storage.get_account_performance_history("variable_all")
+    sampled = storage.get_account_performance_history("variable_all", max_points=100)
+    assert len(full) == 1000
+    assert len(sampled) == 100
+    assert sampled["timestamp"][0] == full["timestamp"][0]
+    assert sampled["timestamp"][-1] == full["timestamp"][-1]
+
+    # Served from memory until the next insert
+    assert storage.get_account_performance_history("variable_all", max_points=100) is sampled
+    storage.insert_account_performance(START + dt.timedelta(days=1000), "variable_all", 500.0)
+    refreshed = storage.get_account_performance_history("variable_all", max_points=100)
+    assert refreshed["equity"][-1] == 500.0
+
+    ranged = storage.get_account_performance_history("variable_all", start=START + dt.timedelta(days=500), max_points=10)
+    assert len(ranged) == 10
+    assert ranged["timestamp"][0] == START + dt.timedelta(days=500)
+
+
+@pytest.mark.parametrize("write_behind", [False, True])
+def test_algorithm_performance_downsampling(write_behind):
+    storage = LocalAlgorithmStorage("algo", write_behind=write_behind)
+    for day in range(300):
+        storage.insert_algorithm_performance(START + dt.timedelta(days=day), "variable_all", 100.0 + day % 11)
+
+    sampled = storage.get_algorithm_performance_history("variable_all", max_points=30)
+    assert len(sampled) == 30
+    assert storage.get_algorithm_performance_history("variable_all", max_points=30) is sampled
+
+    storage.insert_algorithm_performance(START + dt.timedelta(days=300), "variable_all", 500.0)
+    assert storage.get_algorithm_performance_history("variable_all", max_points=30)["equity"][-1] == 500.0
@@ -0,0 +1,97 @@
+import datetime as dt
+
+import numpy as np
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from harvest.definitions import TickerFrame, TimeDelta, TimeSpan
+from harvest.enum import Interval
+from harvest.storage._base import CentralStorage
+from harvest.storage.cold_storage import ParquetColdStorage
+from harvest.storage.encoding import PriceEncoding
+from harvest.storage.file_storage import FileStorage
+from harvest.util.helper import generate_ticker_frame
+
+START = dt.datetime(2024, 1, 1)
+
+
+def quoted_frame(count, interval=Interval.MIN_1):
+    """
+    Price frame with prices quoted to 4 decimals, which scaled encoding stores exactly.
+    """
+    frame = generate_ticker_frame("A", interval, count, start=START).df
+    return frame.with_columns(pl.col(name).round(4) * 100 for name in ("open", "high", "low", "close"))
+
+
+@pytest.mark.parametrize(
+    "encoding",
+    [
+        PriceEncoding(),
+        PriceEncoding(prices="scaled", categorical=True, delta_timestamps=True),
+        PriceEncoding(prices="float32", categorical=True),
+    ],
+)
+def test_round_trip(encoding):
+    frame = quoted_frame(100)
+    encoded = encoding.encode(frame)
+    assert encoded.schema == pl.Schema(encoding.schema(frame.schema))
+
+    decoded = encoding.decode(encoded)
+    if encoding.prices == "float32":
+        assert_frame_equal(decoded, frame, check_exact=False, rel_tol=1e-6)
+    else:
+        assert_frame_equal(decoded, frame)
+
+
+def test_invalid_encoding():
+    with pytest.raises(ValueError):
+        PriceEncoding(prices="float16")
+
+
+def test_encoded_file_storage(tmp_path):
+    encoding = PriceEncoding(prices="scaled", delta_timestamps=True)
+    storage = FileStorage(str(tmp_path), encoding=encoding)
+    frame = quoted_frame(30)
+    for chunk in frame.iter_slices(10):
+        storage.insert_price_history(TickerFrame(chunk))
+
+    segment = pl.read_ipc(tmp_path / "A" / "MIN_1" / "0000000001.arrow")
+    assert segment.schema["timestamp"] == pl.Int64
+    assert segment["timestamp"][1:].to_list() == [60_000_000] * 9
+
+    assert_frame_equal(storage.get_price_history("A", Interval.MIN_1).df, frame)
+    storage.compact()
+    assert_frame_equal(FileStorage(str(tmp_path), encoding=encoding).get_price_history("A", Interval.MIN_1).df, frame)
+
+
+def test_encoded_cold_storage(tmp_path):
+    """
+    Delta timestamps restart in every partition file, so range reads spanning several
+    files still decode correctly.
+    """
+    cold = ParquetColdStorage(str(tmp_path), PriceEncoding(prices="scaled", delta_timestamps=True))
+    frame = quoted_frame(72, Interval.HR_1)
+    cold.write(frame)
+
+    assert_frame_equal(cold.read("A", "HR_1"), frame)
+    start = dt.datetime(2024, 1, 1, 20)
+    end = dt.datetime(2024, 1, 3, 2)
+    assert_frame_equal(cold.read("A", "HR_1", start, end), frame.filter(pl.col("timestamp").is_between(start, end)))
+
+
+def test_float32_price_cache():
+    storage = CentralStorage(
+        price_storage_limit={Interval.MIN_1: TimeDelta(TimeSpan.DAY, 1)},
+        price_encoding=PriceEncoding(prices="float32"),
+    )
+    frame = generate_ticker_frame("A", Interval.MIN_1, 50, start=START)
+    storage.insert_price_history(frame)
+
+    buffer = storage.price_cache.buffers[("A", Interval.MIN_1)]
+    assert buffer._columns["close"].dtype == np.float32
+    assert buffer._columns["volume"].dtype == np.float64
+
+    cached = storage.get_price_history("A", Interval.MIN_1).df
+    assert cached.schema == frame.df.schema
+    assert_frame_equal(cached, frame.df, check_exact=False, rel_tol=1e-6)
@@ -0,0 +1,130 @@
+import datetime as dt
+import os
+
+import pandas as pd
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from harvest.definitions import TickerFrame
+from harvest.enum import Interval, StorageType
+from harvest.storage.file_storage import FileStorage
+from harvest.util.helper import generate_ticker_frame, str_to_storage_type
+
+START = dt.datetime(2024, 1, 1)
+
+
+def segment_files(path):
+    return sorted(name for name in os.listdir(path / "A" / "MIN_1") if name.endswith(".arrow"))
+
+
+def test_inserts_append_segments(tmp_path):
+    """
+    Each insert should write only its own rows, as a new segment.
+    """
+    storage = FileStorage(str(tmp_path))
+    frame = generate_ticker_frame("A", Interval.MIN_1, 30, start=START)
+    for chunk in frame.df.iter_slices(10):
+        storage.insert_price_history(TickerFrame(chunk))
+
+    assert segment_files(tmp_path) == ["0000000000.arrow", "0000000001.arrow", "0000000002.arrow"]
+    assert pl.read_ipc(tmp_path / "A" / "MIN_1" / "0000000002.arrow").height == 10
+    assert_frame_equal(storage.get_price_history("A", Interval.MIN_1).df, frame.df)
+
+
+def test_later_rows_replace_earlier_ones(tmp_path):
+    storage = FileStorage(str(tmp_path))
+    frame = generate_ticker_frame("A", Interval.MIN_1, 10, start=START)
+    storage.insert_price_history(frame)
+    # Read once so the merged frame is cached, then update it
+    storage.get_price_history("A", Interval.MIN_1)
+    updated = frame.df.tail(2).with_columns(pl.lit(1.0).alias("close"))
+    storage.insert_price_history(TickerFrame(updated))
+
+    expected = pl.concat([frame.df.head(8), updated])
+    assert_frame_equal(storage.get_price_history("A", Interval.MIN_1).df, expected)
+    assert_frame_equal(FileStorage(str(tmp_path)).get_price_history("A", Interval.MIN_1).df, expected)
+
+
+def test_compaction(tmp_path):
+    storage = FileStorage(str(tmp_path), max_segments=4)
+    frame = generate_ticker_frame("A", Interval.MIN_1, 50, start=START)
+    for chunk in frame.df.iter_slices(10):
+        storage.insert_price_history(TickerFrame(chunk))
+
+    # The fifth segment pushed the series over the limit
+    assert segment_files(tmp_path) == ["0000000004.arrow"]
+    assert_frame_equal(FileStorage(str(tmp_path)).get_price_history("A", Interval.MIN_1).df, frame.df)
+
+    storage.insert_price_history(generate_ticker_frame("A", Interval.MIN_1, 5, start=START + dt.timedelta(hours=1)))
+    storage.compact("A")
+    assert segment_files(tmp_path) == ["0000000005.arrow"]
+    assert storage.get_price_history("A", Interval.MIN_1).df.height == 55
+
+
+def test_interrupted_compaction_keeps_data(tmp_path):
+    """
+    If a compaction stops before removing the older segments, reads should be unaffected.
+    """
+    storage = FileStorage(str(tmp_path))
+    frame = generate_ticker_frame("A", Interval.MIN_1, 20, start=START)
+    storage.insert_price_history(TickerFrame(frame.df.head(10)))
+    storage.insert_price_history(TickerFrame(frame.df.tail(10)))
+    # The merged segment was renamed over the newest one, but the older one is still there
+    frame.df.drop("symbol", "interval").write_ipc(tmp_path / "A" / "MIN_1" / "0000000001.arrow")
+
+    assert_frame_equal(FileStorage(str(tmp_path)).get_price_history("A", Interval.MIN_1).df, frame.df)
+
+
+def test_startup_is_lazy(tmp_path):
+    """
+    Opening a storage should not read any segment until its series is queried.
+    """
+    storage = FileStorage(str(tmp_path))
+    storage.insert_price_history(generate_ticker_frame("A", Interval.MIN_1, 10, start=START))
+    storage.insert_price_history(generate_ticker_frame("B", Interval.MIN_1, 10, start=START))
+    (tmp_path / "B" / "MIN_1" / "0000000000.arrow").write_bytes(b"corrupt")
+
+    restarted = FileStorage(str(tmp_path))
+    assert restarted.symbols() == [("A", "MIN_1"), ("B", "MIN_1")]
+    assert restarted.get_price_history("A", Interval.MIN_1, start=START + dt.timedelta(minutes=5)).df.height == 5
+
+
+def test_reset(tmp_path):
+    storage = FileStorage(str(tmp_path))
+    storage.insert_price_history(generate_ticker_frame("A", Interval.MIN_1, 10, start=START))
+    storage.reset("A", Interval.MIN_1)
+
+    assert storage.get_price_history("A", Interval.MIN_1).df.is_empty()
+    assert segment_files(tmp_path) == []
+    assert FileStorage(str(tmp_path)).symbols() == []
+
+
+def test_reads_files_of_the_pandas_storages(tmp_path):
+    """
+    CSV and pickle files written by earlier versions should be read before the segments.
+    """
+    frame = generate_ticker_frame("A", Interval.MIN_1, 20, start=START)
+    legacy = pd.DataFrame(frame.df.head(15).drop("symbol", "interval").to_dict(as_series=False)).set_index("timestamp")
+    legacy.to_csv(tmp_path / "A@1MIN.csv")
+    legacy.columns = pd.MultiIndex.from_product([["B"], legacy.columns])
+    legacy.to_pickle(tmp_path / "B@1MIN.pickle")
+
+    storage = FileStorage(str(tmp_path))
+    assert storage.symbols() == [("A", "MIN_1"), ("B", "MIN_1")]
+    storage.insert_price_history(TickerFrame(frame.df.tail(10)))
+
+    assert_frame_equal(storage.get_price_history("A", Interval.MIN_1).df, frame.df)
+    expected = frame.df.head(15).with_columns(pl.lit("B").alias("symbol"))
+    assert_frame_equal(storage.get_price_history("B", Interval.MIN_1).df, expected)
+
+    storage.reset("B", Interval.MIN_1)
+    assert not (tmp_path / "B@1MIN.pickle").exists()
+
+
+def test_legacy_storage_names_are_deprecated():
+    with pytest.warns(DeprecationWarning):
+        assert str_to_storage_type("csv") == StorageType.FILE
+    with pytest.warns(DeprecationWarning):
+        assert str_to_storage_type("pickle") == StorageType.FILE
+    assert str_to_storage_type("file") == StorageType.FILE
@@ -0,0 +1,98 @@
+import datetime as dt
+import json
+import logging
+
+import pytest
+
+from harvest.definitions import OrderEvent, OrderSide, TimeDelta, TimeSpan, Transaction
+from harvest.enum import Interval
+from harvest.storage._base import CentralStorage, LocalAlgorithmStorage
+from harvest.storage.metrics import LatencyHistogram, StorageMetrics
+from harvest.util.helper import generate_ticker_frame
+
+START = dt.datetime(2024, 1, 1)
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for nanoseconds in range(1, 10_001):
+        histogram.record(nanoseconds * 1000)
+
+    for q in (0.5, 0.95, 0.99):
+        assert histogram.percentile(q) == pytest.approx(q * 10_000_000, rel=0.07)
+    assert histogram.percentile(1.0) == 10_000_000
+    assert LatencyHistogram().percentile(0.5) == 0.0
+
+
+def test_storage_not_instrumented_by_default():
+    assert CentralStorage().metrics is None
+    assert LocalAlgorithmStorage("algo").metrics is None
+
+
+def test_central_storage_metrics():
+    storage = CentralStorage(
+        price_storage_limit={Interval.MIN_1: TimeDelta(TimeSpan.MINUTE, 30)}, instrument=True
+    )
+    storage.insert_price_history(generate_ticker_frame("A", Interval.MIN_1, 20, start=START))
+    storage.bulk_insert_price_history(generate_ticker_frame("A", Interval.MIN_1, 40, start=START + dt.timedelta(minutes=20)))
+    for _ in range(3):
+        storage.get_price_history("A", Interval.MIN_1)
+    storage.get_price_history_many(["A", "B"], Interval.MIN_1, as_dict=True)
+    storage.insert_account_performance(START, "5min_1day", 100.0)
+    storage.retention.run_once()
+
+    methods = storage.metrics.snapshot()["methods"]
+    assert methods["insert_price_history"]["calls"] == 1
+    assert methods["insert_price_history"]["rows"] == 20
+    assert methods["bulk_insert_price_history"]["rows"] == 40
+    assert methods["get_price_history"]["calls"] == 3
+    assert methods["get_price_history"]["rows"] == 90
+    assert methods["get_price_history_many"]["rows"] == 30
+    assert methods["insert_account_performance"]["rows"] == 1
+    for stats in methods.values():
+        assert 0 < stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+
+    assert storage.metrics.snapshot()["counters"]["retention_deleted_rows"] == 30
+    assert methods["retention_run"]["rows"] == 30
+
+
+def test_errors_are_counted():
+    storage = CentralStorage(instrument=True)
+    with pytest.raises(ValueError):
+        storage.get_partial_bar("A", Interval.MIN_5)
+    stats = storage.metrics.snapshot()["methods"]["get_partial_bar"]
+    assert stats["calls"] == 1
+    assert stats["errors"] == 1
+
+
+@pytest.mark.parametrize("write_behind", [False, True])
+def test_local_storage_metrics(write_behind):
+    storage = LocalAlgorithmStorage(
+        "algo", transaction_storage_limit=TimeDelta(TimeSpan.MINUTE, 1), write_behind=write_behind, instrument=True
+    )
+    for minutes in range(5):
+        storage.insert_transaction(
+            Transaction(START + dt.timedelta(minutes=minutes), "A", OrderSide.BUY, 1.0, 10.0, OrderEvent.FILL, "algo")
+        )
+    storage.flush()
+    assert len(storage.get_transaction_history("A").df) == 1
+
+    snapshot = storage.metrics.snapshot()
+    assert snapshot["storage"] == "algo"
+    assert snapshot["methods"]["insert_transaction"]["calls"] == 5
+    assert snapshot["methods"]["get_transaction_history"]["rows"] == 1
+    # Buffered rows are dropped before they reach the database, so nothing is deleted
+    assert snapshot["counters"].get("retention_deleted_rows", 0) == (0 if write_behind else 4)
+
+
+def test_metrics_are_logged(caplog):
+    metrics = StorageMetrics("central", log_period=0.0)
+    with caplog.at_level(logging.INFO, logger="harvest"):
+        metrics.record("get_price_history", 1_000_000, rows=5)
+
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["event"] == "storage_metrics"
+    assert record["methods"]["get_price_history"]["rows"] == 5
+
+    metrics.reset()
+    assert metrics.snapshot()["methods"] == {}
@@ -0,0 +1,79 @@
+import datetime as dt
+import multiprocessing
+
+import pytest
+import sqlalchemy
+
+from harvest.enum import Interval
+from harvest.storage._base import CentralStorage
+from harvest.util.helper import generate_ticker_frame
+
+
+def write_bars(db_path: str, symbol: str, count: int) -> None:
+    storage = CentralStorage(db_path=db_path, multi_process=True)
+    start = dt.datetime(2024, 1, 1)
+    for i in range(count):
+        storage.insert_price_history(
+            generate_ticker_frame(symbol, Interval.MIN_1, 1, start=start + dt.timedelta(minutes=i))
+        )
+    storage.close()
+
+
+def read_bars(db_path: str, count: int) -> None:
+    storage = CentralStorage(db_path=db_path, multi_process=True)
+    for _ in range(count):
+        storage.get_price_history("A", Interval.MIN_1)
+    storage.close()
+
+
+def test_multi_process_settings(tmp_path):
+    storage = CentralStorage(db_path=f"sqlite:///{tmp_path / 'central.db'}", multi_process=True)
+
+    with storage.db_engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+    assert storage.write_engine is not storage.db_engine
+    assert storage.write_engine.pool.size() == 1
+    assert storage.price_cache is None
+
+
+def test_multi_process_keeps_existing_data(tmp_path):
+    db_path = f"sqlite:///{tmp_path / 'central.db'}"
+    first = CentralStorage(db_path=db_path, multi_process=True)
+    first.insert_price_history(generate_ticker_frame("A", Interval.MIN_1, 10))
+
+    second = CentralStorage(db_path=db_path, multi_process=True)
+    assert len(second.get_price_history("A", Interval.MIN_1).df) == 10
+
+    second.insert_price_history(generate_ticker_frame("A", Interval.MIN_1, 5, start=dt.datetime(1970, 1, 1, 0, 10)))
+    assert len(first.get_price_history("A", Interval.MIN_1).df) == 15
+
+
+def test_multi_process_requires_shared_database():
+    with pytest.raises(ValueError):
+        CentralStorage(multi_process=True)
+
+
+def test_concurrent_processes(tmp_path):
+    """
+    Two writer processes and a reader process should all finish without lock errors.
+    """
+    db_path = f"sqlite:///{tmp_path / 'central.db'}"
+    CentralStorage(db_path=db_path, multi_process=True).close()
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=write_bars, args=(db_path, "A", 100)),
+        context.Process(target=write_bars, args=(db_path, "B", 100)),
+        context.Process(target=read_bars, args=(db_path, 100)),
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    engine = sqlalchemy.create_engine(db_path)
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT COUNT(*) FROM price_history").scalar() == 200
+    engine.dispose()
@@ -0,0 +1,134 @@
+import datetime as dt
+
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from harvest.definitions import TimeDelta, TimeSpan
+from harvest.enum import Interval
+from harvest.storage._base import CentralStorage
+from harvest.storage.price_cache import PriceRingBuffer, buffer_capacity
+from harvest.util.helper import generate_ticker_frame
+
+
+def test_buffer_capacity_follows_storage_limit():
+    """
+    The buffer should be sized to hold exactly the retention window of candles.
+    """
+    assert buffer_capacity(Interval.MIN_1, TimeDelta(TimeSpan.DAY, 1)) == 1441
+    assert buffer_capacity(Interval.MIN_5, TimeDelta(TimeSpan.HOUR, 1)) == 13
+    assert buffer_capacity(Interval.DAY_1, None) > 0
+
+
+def test_cache_matches_database():
+    """
+    Frames served from the cache should be identical to frames read from the database.
+    """
+    cached = CentralStorage()
+    uncached = CentralStorage(enable_price_cache=False)
+
+    frames = [
+        generate_ticker_frame("A", Interval.MIN_1, 10, start=dt.datetime(1970, 1, 1, 0, 0)),
+        generate_ticker_frame("A", Interval.MIN_1, 10, start=dt.datetime(1970, 1, 1, 0, 5)),
+        generate_ticker_frame("A", Interval.MIN_1, 3, start=dt.datetime(1970, 1, 1, 0, 2)),
+    ]
+    for frame in frames:
+        cached.insert_price_history(frame)
+        uncached.insert_price_history(frame)
+
+    start = dt.datetime(1970, 1, 1, 0, 3)
+    end = dt.datetime(1970, 1, 1, 0, 11)
+    assert_frame_equal(
+        cached.get_price_history("A", Interval.MIN_1).df,
+        uncached.get_price_history("A", Interval.MIN_1).df.sort("timestamp"),
+    )
+    assert_frame_equal(
+        cached.get_price_history("A", Interval.MIN_1, start, end).df,
+        uncached.get_price_history("A", Interval.MIN_1, start, end).df.sort("timestamp"),
+    )
+
+
+def test_aware_ranges_are_converted_to_utc():
+    """
+    Aware bounds should select the same candles from the cache and the database.
+    """
+    cached = CentralStorage()
+    uncached = CentralStorage(enable_price_cache=False)
+    frame = generate_ticker_frame("A", Interval.MIN_1, 20, start=dt.datetime(2024, 1, 1, 14, 0))
+    cached.insert_price_history(frame)
+    uncached.insert_price_history(frame)
+
+    new_york = dt.timezone(dt.timedelta(hours=-5))
+    start = dt.datetime(2024, 1, 1, 9, 5, tzinfo=new_york)
+    end = dt.datetime(2024, 1, 1, 9, 9, tzinfo=new_york)
+    expected = frame.df.filter(
+        pl.col("timestamp").is_between(dt.datetime(2024, 1, 1, 14, 5), dt.datetime(2024, 1, 1, 14, 9))
+    )
+    assert_frame_equal(cached.get_price_history("A", Interval.MIN_1, start, end).df, expected)
+    assert_frame_equal(uncached.get_price_history("A", Interval.MIN_1, start, end).df, expected)
+    assert_frame_equal(cached.get_price_history_many(["A"], Interval.MIN_1, start, end).df, expected)
+
+
+def test_cache_serves_reads_without_database(mocker):
+    """
+    Once data is inserted, reads should not query the database.
+    """
+    storage = CentralStorage()
+    storage.insert_price_history(generate_ticker_frame("A", Interval.MIN_1, 20))
+
+    read_frame = mocker.patch("harvest.storage._base._read_frame")
+    loaded = storage.get_price_history("A", Interval.MIN_1)
+
+    assert len(loaded.df) == 20
+    read_frame.assert_not_called()
+
+
+def test_cache_eviction_falls_back_to_database(mocker):
+    """
+    When the buffer overflows, ranges older than the buffer should still be served
+    from the database.
+    """
+    mocker.patch("harvest.storage.price_cache.buffer_capacity", return_value=10)
+    storage = CentralStorage()
+    frame = generate_ticker_frame("A", Interval.MIN_1, 30)
+    storage.insert_price_history(frame)
+
+    loaded = storage.get_price_history("A", Interval.MIN_1)
+    assert len(loaded.df) == 30
+    assert loaded[0] == frame[0]
+
+    recent = storage.get_price_history("A", Interval.MIN_1, start=dt.datetime(1970, 1, 1, 0, 25))
+    assert len(recent.df) == 5
+    assert recent[-1] == frame[-1]
+
+
+def test_cache_timezone_aware_input():
+    """
+    Timezone-aware input should be stored as naive UTC, like the database does.
+    """
+    storage = CentralStorage()
+    frame = generate_ticker_frame("A", Interval.MIN_1, 5, start=dt.datetime(2024, 1, 1, 9, 30))
+    aware = frame.df.with_columns(pl.col("timestamp").dt.replace_time_zone("UTC"))
+    storage.insert_price_history(type(frame)(aware))
+
+    loaded = storage.get_price_history("A", Interval.MIN_1)
+    assert_frame_equal(loaded.df, frame.df)
+
+
+def test_ring_buffer_views_survive_appends():
+    """
+    Views handed out by the buffer must not change when more data is appended.
+    """
+    buffer = PriceRingBuffer("A", Interval.MIN_1, 4)
+    columns = {name: pl.Series([1.0, 2.0]).to_numpy() for name in ("open", "high", "low", "close", "volume")}
+    buffer.append(pl.Series([1, 2]).to_numpy(), columns)
+
+    timestamp, values = buffer.slice_arrays(None, None)
+    snapshot = timestamp.copy(), values["close"].copy()
+
+    for i in range(3, 20):
+        buffer.append(pl.Series([i]).to_numpy(), {name: pl.Series([float(i)]).to_numpy() for name in columns})
+
+    assert (timestamp == snapshot[0]).all()
+    assert (values["close"] == snapshot[1]).all()
+    assert len(buffer) == 4
+    assert list(buffer.timestamps) == [16, 17, 18, 19]
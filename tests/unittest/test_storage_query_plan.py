@@ -0,0 +1,180 @@
+import datetime as dt
+
+import pytest
+import sqlalchemy
+
+from harvest.definitions import OrderEvent, OrderSide, Transaction
+from harvest.enum import Interval
+from harvest.storage._base import CentralStorage, LocalAlgorithmStorage, PriceHistory
+from harvest.util.helper import generate_ticker_frame
+
+START = dt.datetime(2024, 1, 1)
+
+
+class QueryRecorder:
+    """
+    Records the SELECT statements an engine runs, so their query plans can be checked.
+    """
+
+    def __init__(self, engine: sqlalchemy.Engine) -> None:
+        self.engine = engine
+        self.queries: list[tuple[str, tuple]] = []
+        sqlalchemy.event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, connection, cursor, statement, parameters, context, executemany) -> None:
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.queries.append((statement, parameters))
+
+    def plans(self) -> list[list[str]]:
+        sqlalchemy.event.remove(self.engine, "before_cursor_execute", self._record)
+        with self.engine.connect() as connection:
+            return [
+                [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+                for statement, parameters in self.queries
+            ]
+
+
+def assert_searches(plan: list[str], *columns: str) -> None:
+    """
+    Asserts that every step of `plan` is an index search constrained by equality on `columns`,
+    so the query reads one series instead of scanning the table or a timestamp range of all series.
+    """
+    for step in plan:
+        assert "TEMP B-TREE" not in step, f"sort not served by an index: {plan}"
+        assert step.startswith("SEARCH") and "INDEX" in step, f"table scan: {plan}"
+        for column in columns:
+            assert f"{column}=?" in step, f"index does not constrain {column}: {plan}"
+
+
+def assert_indexed(recorder: QueryRecorder, *columns: str) -> None:
+    plans = recorder.plans()
+    assert plans, "no queries were recorded"
+    for plan in plans:
+        assert_searches(plan, *columns)
+
+
+@pytest.fixture
+def central():
+    storage = CentralStorage(enable_price_cache=False)
+    storage.bulk_insert_price_history(generate_ticker_frame("A", Interval.MIN_1, 100, start=START))
+    storage.bulk_insert_price_history(generate_ticker_frame("B", Interval.MIN_1, 100, start=START))
+    storage.insert_account_performance(START, "5min_1day", 100.0, 0.0, 0.0)
+    return storage
+
+
+@pytest.fixture
+def local():
+    storage = LocalAlgorithmStorage("algo")
+    for i in range(10):
+        storage.insert_transaction(
+            Transaction(
+                timestamp=START + dt.timedelta(minutes=i),
+                symbol="A",
+                side=OrderSide.BUY,
+                quantity=1.0,
+                price=10.0,
+                event=OrderEvent.FILL,
+                algorithm_name="algo",
+            )
+        )
+    storage.insert_algorithm_performance(START, "5min_1day", 100.0, 0.0, 0.0)
+    return storage
+
+
+@pytest.mark.parametrize(
+    "start, end",
+    [
+        (None, None),
+        (START + dt.timedelta(minutes=10), None),
+        (None, START + dt.timedelta(minutes=10)),
+        (START, START + dt.timedelta(minutes=10)),
+    ],
+)
+def test_get_price_history_uses_index(central, start, end):
+    recorder = QueryRecorder(central.db_engine)
+    central.get_price_history("A", Interval.MIN_1, start, end)
+    assert_indexed(recorder, "symbol", "interval")
+
+
+def test_get_price_history_with_retention_cutoff_uses_index(central):
+    central.retention.mark(PriceHistory, {"symbol": "A", "interval": "MIN_1"}, START + dt.timedelta(minutes=5))
+    recorder = QueryRecorder(central.db_engine)
+    central.get_price_history("A", Interval.MIN_1, START + dt.timedelta(minutes=10))
+    assert_indexed(recorder, "symbol", "interval")
+
+
+@pytest.mark.parametrize("start", [None, START + dt.timedelta(minutes=10)])
+def test_get_price_history_many_uses_index(central, start):
+    recorder = QueryRecorder(central.db_engine)
+    central.get_price_history_many(["A", "B"], Interval.MIN_1, start)
+    assert_indexed(recorder, "symbol", "interval")
+
+
+def test_get_latest_price_timestamp_uses_index(central):
+    recorder = QueryRecorder(central.db_engine)
+    central.get_latest_price_timestamp("A", Interval.MIN_1)
+    assert_indexed(recorder, "symbol", "interval")
+
+
+def test_retention_delete_uses_index(central):
+    central.retention.mark(PriceHistory, {"symbol": "A", "interval": "MIN_1"}, START + dt.timedelta(minutes=5))
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("DELETE"):
+            statements.append((statement, parameters))
+
+    sqlalchemy.event.listen(central.write_engine, "before_cursor_execute", record)
+    central.retention.run_once()
+    sqlalchemy.event.remove(central.write_engine, "before_cursor_execute", record)
+
+    assert statements
+    with central.write_engine.connect() as connection:
+        for statement, parameters in statements:
+            plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            # The outer DELETE looks rows up by id, the subquery must search the series index
+            steps = [step for step in plan if step.startswith(("SCAN", "SEARCH")) and "INTEGER PRIMARY KEY" not in step]
+            if "price_history" in statement:
+                assert_searches(steps, "symbol", "interval")
+            else:
+                assert_searches(steps, "interval")
+
+
+@pytest.mark.parametrize("start", [None, START])
+def test_get_account_performance_history_uses_index(central, start):
+    recorder = QueryRecorder(central.db_engine)
+    central.get_account_performance_history("5min_1day", start)
+    assert_indexed(recorder, "interval")
+
+
+def test_get_latest_account_performance_uses_index(central):
+    recorder = QueryRecorder(central.db_engine)
+    central.get_latest_account_performance("5min_1day")
+    assert_indexed(recorder, "interval")
+
+
+@pytest.mark.parametrize(
+    "side, start, end",
+    [
+        (None, None, None),
+        (OrderSide.BUY, None, None),
+        (None, START + dt.timedelta(minutes=2), START + dt.timedelta(minutes=5)),
+    ],
+)
+def test_get_transaction_history_uses_index(local, side, start, end):
+    recorder = QueryRecorder(local.db_engine)
+    local.get_transaction_history("A", side, start, end)
+    assert_indexed(recorder, "algorithm_name", "symbol")
+
+
+@pytest.mark.parametrize("start", [None, START])
+def test_get_algorithm_performance_history_uses_index(local, start):
+    recorder = QueryRecorder(local.db_engine)
+    local.get_algorithm_performance_history("5min_1day", start)
+    assert_indexed(recorder, "algorithm_name", "interval")
+
+
+def test_get_latest_performance_uses_index(local):
+    recorder = QueryRecorder(local.db_engine)
+    local.get_latest_performance("5min_1day")
+    assert_indexed(recorder, "algorithm_name", "interval")
@@ -0,0 +1,124 @@
+import datetime as dt
+import os
+import tempfile
+import time
+
+import pytest
+import sqlalchemy
+
+from harvest.definitions import TimeDelta, TimeSpan
+from harvest.enum import Interval
+from harvest.storage._base import AccountPerformanceHistory, CentralStorage, PriceHistory
+from harvest.util.helper import generate_ticker_frame
+
+
+def count_rows(storage, model, **key):
+    table = model.__table__
+    query = sqlalchemy.select(sqlalchemy.func.count()).select_from(table)
+    query = query.where(*(table.c[name] == value for name, value in key.items()))
+    with storage.db_engine.connect() as connection:
+        return connection.execute(query).scalar()
+
+
+def test_retention_is_per_interval():
+    """
+    Inserting 1-minute bars must not delete daily bars of the same symbol.
+    """
+    storage = CentralStorage(price_storage_limit={Interval.MIN_1: TimeDelta(TimeSpan.MINUTE, 10)})
+    storage.insert_price_history(generate_ticker_frame("A", Interval.DAY_1, 5, start=dt.datetime(2024, 1, 1)))
+    storage.insert_price_history(generate_ticker_frame("A", Interval.MIN_1, 60, start=dt.datetime(2024, 1, 10)))
+
+    report = storage.retention.run_once()
+
+    assert report.rows == {("price_history", "A", "MIN_1"): 50}
+    assert count_rows(storage, PriceHistory, interval="DAY_1") == 5
+    assert len(storage.get_price_history("A", Interval.DAY_1).df) == 5
+
+
+def test_expired_rows_hidden_before_compaction():
+    """
+    Reads should honor the retention limit even before the rows are deleted.
+    """
+    storage = CentralStorage(
+        price_storage_limit={Interval.MIN_1: TimeDelta(TimeSpan.MINUTE, 10)},
+        enable_price_cache=False,
+    )
+    frame = generate_ticker_frame("A", Interval.MIN_1, 60)
+    storage.insert_price_history(frame)
+
+    assert count_rows(storage, PriceHistory) == 60
+    history = storage.get_price_history("A", Interval.MIN_1)
+    assert history.df["timestamp"].to_list() == frame.df["timestamp"][-10:].to_list()
+    assert storage.retention.pending == 1
+
+    storage.retention.run_once()
+    assert count_rows(storage, PriceHistory) == 10
+    assert storage.retention.pending == 0
+    assert storage.get_price_history("A", Interval.MIN_1).df.equals(history.df)
+
+
+def test_compaction_runs_in_bounded_batches():
+    """
+    A batch budget should limit the work per call and leave the rest pending.
+    """
+    storage = CentralStorage(
+        price_storage_limit={Interval.MIN_1: TimeDelta(TimeSpan.MINUTE, 10)},
+        retention_batch_size=20,
+    )
+    storage.bulk_insert_price_history(generate_ticker_frame("A", Interval.MIN_1, 100))
+
+    first = storage.retention.run_once(max_batches=2)
+    assert first.total == 40
+    assert not first.complete
+    assert storage.retention.pending == 1
+
+    second = storage.retention.run_once()
+    assert second.total == 50
+    assert second.complete
+    assert storage.retention.total_reclaimed == 90
+    assert count_rows(storage, PriceHistory) == 10
+
+
+def test_account_performance_retention():
+    """
+    Account performance history should be compacted per interval.
+    """
+    storage = CentralStorage(performance_storage_limit={"5min_1day": TimeDelta(TimeSpan.HOUR, 1)})
+    start = dt.datetime(2024, 1, 1)
+    for i in range(24):
+        storage.insert_account_performance(start + dt.timedelta(minutes=5 * i), "5min_1day", 1000.0 + i)
+        storage.insert_account_performance(start + dt.timedelta(minutes=5 * i), "variable_all", 1000.0 + i)
+
+    assert len(storage.get_account_performance_history("5min_1day")) == 12
+    storage.retention.run_once()
+    assert count_rows(storage, AccountPerformanceHistory, interval="5min_1day") == 12
+    assert count_rows(storage, AccountPerformanceHistory, interval="variable_all") == 24
+
+
+def test_background_retention():
+    """
+    The background thread should compact a file-backed database on its own.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        storage = CentralStorage(
+            db_path=f"sqlite:///{os.path.join(temp_dir, 'central.db')}",
+            price_storage_limit={Interval.MIN_1: TimeDelta(TimeSpan.MINUTE, 10)},
+            retention_period=0.01,
+        )
+        storage.insert_price_history(generate_ticker_frame("A", Interval.MIN_1, 60))
+        assert storage.retention.running
+
+        for _ in range(500):
+            if storage.retention.pending == 0:
+                break
+            time.sleep(0.01)
+        storage.retention.stop()
+        assert not storage.retention.running
+        storage.db_engine.dispose()
+
+        assert storage.retention.total_reclaimed == 50
+
+
+def test_background_retention_requires_shared_database():
+    with pytest.raises(ValueError):
+        CentralStorage(retention_period=1.0)
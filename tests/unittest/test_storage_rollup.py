@@ -0,0 +1,137 @@
+import datetime as dt
+
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from harvest.definitions import TickerFrame
+from harvest.enum import Interval
+from harvest.storage._base import CentralStorage
+from harvest.storage.rollup import ROLLUP_INTERVALS, ROLLUP_SCHEMA, BarRollup, bucket_start
+from harvest.util.helper import generate_ticker_frame
+
+START = dt.datetime(2024, 1, 1)
+
+
+def resample(df: pl.DataFrame, interval: Interval) -> pl.DataFrame:
+    every = {Interval.MIN_5: "5m", Interval.MIN_15: "15m", Interval.MIN_30: "30m", Interval.HR_1: "1h", Interval.DAY_1: "1d"}
+    return (
+        df.sort("timestamp")
+        .group_by_dynamic("timestamp", every=every[interval])
+        .agg(
+            pl.col("open").first(),
+            pl.col("high").max(),
+            pl.col("low").min(),
+            pl.col("close").last(),
+            pl.col("volume").sum(),
+        )
+    )
+
+
+def test_bucket_start():
+    timestamp = dt.datetime(2024, 1, 1, 13, 47, 12, 5, tzinfo=dt.timezone.utc)
+    assert bucket_start(timestamp, Interval.MIN_5) == dt.datetime(2024, 1, 1, 13, 45, tzinfo=dt.timezone.utc)
+    assert bucket_start(timestamp, Interval.MIN_30) == dt.datetime(2024, 1, 1, 13, 30, tzinfo=dt.timezone.utc)
+    assert bucket_start(timestamp, Interval.HR_1) == dt.datetime(2024, 1, 1, 13, tzinfo=dt.timezone.utc)
+    assert bucket_start(timestamp, Interval.DAY_1) == dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc)
+
+
+@pytest.mark.parametrize("interval", [Interval.SEC_15, Interval.MIN_1])
+def test_rejects_intervals_below_one_minute(interval):
+    with pytest.raises(ValueError):
+        BarRollup([interval])
+
+
+def test_matches_full_aggregation():
+    df = generate_ticker_frame("A", Interval.MIN_1, 3 * 1440, start=START).df
+    rollup = BarRollup()
+    bars = pl.DataFrame(rollup.update_frame(df), schema=ROLLUP_SCHEMA, orient="row")
+
+    for interval in ROLLUP_INTERVALS:
+        expected = resample(df, interval)
+        # The last bucket is still open
+        expected = expected.head(len(expected) - 1)
+        actual = bars.filter(pl.col("interval") == str(interval)).drop("symbol", "interval")
+        assert_frame_equal(actual, expected)
+
+        partial = rollup.partial("A", interval)
+        assert partial["timestamp"] == resample(df, interval)["timestamp"][-1]
+
+
+def test_finalizes_on_boundary_crossing():
+    rollup = BarRollup([Interval.MIN_5])
+    for minute in range(5):
+        assert rollup.update("A", START + dt.timedelta(minutes=minute), 1.0, 2.0, 0.5, 1.5, 10.0) == []
+
+    finished = rollup.update("A", START + dt.timedelta(minutes=5), 1.0, 1.0, 1.0, 1.0, 1.0)
+    assert finished == [(Interval.MIN_5, (START, 1.0, 2.0, 0.5, 1.5, 50.0))]
+    assert rollup.partial("A", Interval.MIN_5)["timestamp"] == START + dt.timedelta(minutes=5)
+
+
+def test_revised_bar_is_not_counted_twice():
+    rollup = BarRollup([Interval.MIN_5])
+    rollup.update("A", START, 1.0, 1.0, 1.0, 1.0, 10.0)
+    rollup.update("A", START + dt.timedelta(minutes=1), 1.0, 5.0, 1.0, 4.0, 10.0)
+    # The broker revises the current candle
+    rollup.update("A", START + dt.timedelta(minutes=1), 1.0, 3.0, 0.5, 2.0, 20.0)
+
+    assert rollup.partial("A", Interval.MIN_5) == {
+        "timestamp": START,
+        "open": 1.0,
+        "high": 3.0,
+        "low": 0.5,
+        "close": 2.0,
+        "volume": 30.0,
+    }
+
+
+def test_first_bucket_started_mid_way_is_dropped():
+    rollup = BarRollup([Interval.MIN_5])
+    for minute in range(3, 11):
+        finished = rollup.update("A", START + dt.timedelta(minutes=minute), 1.0, 1.0, 1.0, 1.0, 1.0)
+        if minute == 10:
+            # 00:00 was never finalized because it started at 00:03, 00:05 was
+            assert [bar[0] for _, bar in finished] == [START + dt.timedelta(minutes=5)]
+        else:
+            assert finished == []
+
+
+def test_late_bar_for_finalized_bucket_is_ignored():
+    rollup = BarRollup([Interval.MIN_5])
+    rollup.update("A", START, 1.0, 1.0, 1.0, 1.0, 1.0)
+    rollup.update("A", START + dt.timedelta(minutes=5), 1.0, 1.0, 1.0, 1.0, 1.0)
+    assert rollup.update("A", START + dt.timedelta(minutes=4), 9.0, 9.0, 9.0, 9.0, 9.0) == []
+    assert rollup.partial("A", Interval.MIN_5)["high"] == 1.0
+
+
+def test_storage_writes_finalized_bars():
+    storage = CentralStorage(rollup_intervals=[Interval.MIN_5, Interval.HR_1])
+    df = generate_ticker_frame("A", Interval.MIN_1, 125, start=START).df
+
+    # One bar per call, like a live feed
+    for row in df.iter_slices(1):
+        storage.insert_price_history(TickerFrame(row))
+
+    five_minute = storage.get_price_history("A", Interval.MIN_5).df
+    assert len(five_minute) == 24
+    assert_frame_equal(five_minute.drop("symbol", "interval"), resample(df, Interval.MIN_5).head(24))
+    assert len(storage.get_price_history("A", Interval.HR_1).df) == 2
+    assert storage.get_partial_bar("A", Interval.MIN_5)["timestamp"] == START + dt.timedelta(minutes=120)
+
+
+def test_storage_bulk_insert_writes_finalized_bars():
+    storage = CentralStorage(rollup_intervals=ROLLUP_INTERVALS)
+    df = pl.concat(
+        [generate_ticker_frame(symbol, Interval.MIN_1, 600, start=START).df for symbol in ("A", "B")]
+    )
+    storage.bulk_insert_price_history(TickerFrame(df))
+
+    for symbol in ("A", "B"):
+        expected = resample(df.filter(pl.col("symbol") == symbol), Interval.MIN_30).head(19)
+        actual = storage.get_price_history(symbol, Interval.MIN_30).df.drop("symbol", "interval")
+        assert_frame_equal(actual, expected)
+
+
+def test_partial_bar_requires_rollup():
+    with pytest.raises(ValueError):
+        CentralStorage().get_partial_bar("A", Interval.MIN_5)
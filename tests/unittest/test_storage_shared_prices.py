@@ -0,0 +1,181 @@
+import datetime as dt
+import multiprocessing
+import uuid
+
+import numpy as np
+import polars as pl
+import pytest
+
+from harvest.definitions import TickerFrame, TimeDelta, TimeSpan
+from harvest.enum import Interval
+from harvest.storage._base import CentralStorage
+from harvest.storage.shared_prices import SharedPriceStore
+from harvest.util.helper import generate_ticker_frame
+
+START = dt.datetime(2024, 1, 1)
+
+
+def minute_bars(symbol: str, first: int, count: int) -> pl.DataFrame:
+    """
+    Bars whose prices are the minute index, so readers can check rows are consistent.
+    """
+    index = np.arange(first, first + count, dtype=np.float64)
+    return pl.DataFrame(
+        {
+            "timestamp": [START + dt.timedelta(minutes=int(i)) for i in index],
+            "symbol": symbol,
+            "interval": str(Interval.MIN_1),
+            "open": index,
+            "high": index,
+            "low": index,
+            "close": index,
+            "volume": index,
+        }
+    )
+
+
+def read_until(name: str, count: int, ready) -> None:
+    store = SharedPriceStore(name)
+    ready.set()
+    frames = []
+    while True:
+        df = store.get_price_history("A", Interval.MIN_1).df
+        frames.append(df)
+        if len(df):
+            minutes = (df["timestamp"] - START).dt.total_minutes().cast(pl.Float64)
+            assert df["timestamp"].is_sorted() and df["timestamp"].is_unique().all()
+            assert (df["close"] == minutes).all() and (df["open"] == minutes).all()
+            if minutes[-1] == count - 1:
+                break
+    # Frames read earlier stay valid after the writer has moved to later generations
+    for df in frames[-50:]:
+        minutes = (df["timestamp"] - START).dt.total_minutes().cast(pl.Float64)
+        assert (df["close"] == minutes).all()
+    store.close()
+
+
+@pytest.fixture
+def name():
+    return f"t{uuid.uuid4().hex[:8]}"
+
+
+def test_read_in_same_process(name):
+    writer = SharedPriceStore(name, create=True)
+    reader = SharedPriceStore(name)
+    frame = generate_ticker_frame("A", Interval.MIN_1, 100, start=START).df
+    writer.insert("A", Interval.MIN_1, frame)
+
+    df = reader.get_price_history("A", Interval.MIN_1).df
+    assert df.equals(frame.select(df.columns))
+    assert df.equals(writer.get_price_history("A", Interval.MIN_1).df)
+
+    # Readers view the shared memory instead of copying it
+    series = reader._readers[("A", Interval.MIN_1)]
+    timestamp, columns = series.arrays()
+    assert np.shares_memory(timestamp, series._timestamp)
+    assert all(np.shares_memory(columns[name], series._columns[name]) for name in columns)
+
+    ranged = reader.get_price_history("A", Interval.MIN_1, START + dt.timedelta(minutes=10), START + dt.timedelta(minutes=19))
+    assert len(ranged.df) == 10
+    assert reader.get_price_history("B", Interval.MIN_1).df.is_empty()
+    assert reader.get_price_history("A", Interval.MIN_5).df.is_empty()
+
+    with pytest.raises(PermissionError):
+        reader.insert("A", Interval.MIN_1, frame)
+    reader.close()
+    writer.close()
+
+
+def test_revision_keeps_earlier_frames(name):
+    writer = SharedPriceStore(name, create=True)
+    reader = SharedPriceStore(name)
+    writer.insert("A", Interval.MIN_1, minute_bars("A", 0, 10))
+    before = reader.get_price_history("A", Interval.MIN_1).df
+
+    revised = minute_bars("A", 5, 1).with_columns(pl.col("close") + 100)
+    writer.insert("A", Interval.MIN_1, revised)
+    after = reader.get_price_history("A", Interval.MIN_1).df
+
+    assert before["close"][5] == 5.0
+    assert after["close"][5] == 105.0
+    assert len(after) == 10
+    reader.close()
+    writer.close()
+
+
+def test_capacity_and_truncate(name):
+    limit = {Interval.MIN_1: TimeDelta(TimeSpan.MINUTE, 9)}
+    writer = SharedPriceStore(name, create=True, price_storage_limit=limit)
+    reader = SharedPriceStore(name)
+    for first in range(0, 50, 5):
+        writer.insert("A", Interval.MIN_1, minute_bars("A", first, 5))
+
+    df = reader.get_price_history("A", Interval.MIN_1).df
+    assert df["close"].to_list() == [float(i) for i in range(40, 50)]
+
+    writer.truncate("A", START + dt.timedelta(minutes=44))
+    assert reader.get_price_history("A", Interval.MIN_1).df["close"].to_list() == [45.0, 46.0, 47.0, 48.0, 49.0]
+    reader.close()
+    writer.close()
+
+
+def test_close_removes_segments(name):
+    writer = SharedPriceStore(name, create=True)
+    writer.insert("A", Interval.MIN_1, minute_bars("A", 0, 10))
+    writer.close()
+    assert SharedPriceStore(name).get_price_history("A", Interval.MIN_1).df.is_empty()
+
+
+def test_reader_process(name):
+    """
+    A reader process should only ever see consistent rows while the writer appends,
+    revises and compacts.
+    """
+    count = 3000
+    writer = SharedPriceStore(name, create=True, price_storage_limit={Interval.MIN_1: TimeDelta(TimeSpan.MINUTE, 499)})
+    writer.insert("A", Interval.MIN_1, minute_bars("A", 0, 1))
+
+    context = multiprocessing.get_context("spawn")
+    ready = context.Event()
+    process = context.Process(target=read_until, args=(name, count, ready))
+    process.start()
+    assert ready.wait(timeout=60)
+    for first in range(1, count, 3):
+        writer.insert("A", Interval.MIN_1, minute_bars("A", first, min(3, count - first)))
+        if first % 100 == 1:
+            # Revising an existing bar with the same values moves the series to a new generation
+            writer.insert("A", Interval.MIN_1, minute_bars("A", first, 1))
+    process.join(timeout=60)
+    writer.close()
+    assert process.exitcode == 0
+
+
+def test_central_storage_publishes(name):
+    limit = {Interval.MIN_1: TimeDelta(TimeSpan.MINUTE, 30)}
+    storage = CentralStorage(price_storage_limit=limit, shared_memory_name=name)
+    reader = SharedPriceStore(name)
+    storage.insert_price_history(TickerFrame(minute_bars("A", 0, 20)))
+    storage.bulk_insert_price_history(TickerFrame(pl.concat([minute_bars("A", 20, 40), minute_bars("B", 0, 5)])))
+
+    for symbol in ("A", "B"):
+        expected = storage.get_price_history(symbol, Interval.MIN_1).df
+        assert reader.get_price_history(symbol, Interval.MIN_1).df.equals(expected)
+    assert len(reader.get_price_history("A", Interval.MIN_1).df) == 30
+
+    storage.close()
+    reader.close()
+    assert SharedPriceStore(name).get_price_history("A", Interval.MIN_1).df.is_empty()
+
+
+def test_writer_replaces_segments_of_a_crashed_run(name):
+    crashed = SharedPriceStore(name, create=True)
+    crashed.insert("A", Interval.MIN_1, minute_bars("A", 0, 10))
+    # A crashed writer never unlinks its segments
+    crashed._writers.clear()
+
+    writer = SharedPriceStore(name, create=True)
+    writer.insert("A", Interval.MIN_1, minute_bars("A", 100, 5))
+    reader = SharedPriceStore(name)
+    assert reader.get_price_history("A", Interval.MIN_1).df["close"].to_list() == [100.0, 101.0, 102.0, 103.0, 104.0]
+    reader.close()
+    writer.close()
@@ -0,0 +1,150 @@
+import datetime as dt
+import threading
+
+import polars as pl
+import sqlalchemy
+from polars.testing import assert_frame_equal
+
+from harvest.definitions import TimeDelta, TimeSpan
+from harvest.enum import Interval
+from harvest.storage._base import CentralStorage, PriceHistory
+from harvest.util.helper import generate_ticker_frame
+
+
+def test_snapshot_round_trip(tmp_path):
+    """
+    A storage created on a snapshot directory should start with the saved history.
+    """
+    storage = CentralStorage(snapshot_path=str(tmp_path))
+    minute = generate_ticker_frame("A", Interval.MIN_1, 100, start=dt.datetime(2024, 1, 1))
+    daily = generate_ticker_frame("A", Interval.DAY_1, 10, start=dt.datetime(2024, 1, 1))
+    storage.insert_price_history(minute)
+    storage.insert_price_history(daily)
+    storage.close()
+
+    restored = CentralStorage(snapshot_path=str(tmp_path))
+    assert_frame_equal(restored.get_price_history("A", Interval.MIN_1).df, minute.df)
+    assert_frame_equal(restored.get_price_history("A", Interval.DAY_1).df, daily.df)
+    assert restored.get_latest_price_timestamp("A", Interval.MIN_1) == minute.df["timestamp"][-1]
+    assert restored.get_latest_price_timestamp("B", Interval.MIN_1) is None
+
+
+def test_snapshot_files_are_memory_mapped(tmp_path, mocker):
+    storage = CentralStorage(snapshot_path=str(tmp_path))
+    storage.insert_price_history(generate_ticker_frame("A", Interval.MIN_1, 10))
+    storage.save_snapshot()
+
+    read_ipc = mocker.spy(pl, "read_ipc")
+    CentralStorage(snapshot_path=str(tmp_path))
+    assert read_ipc.call_count == 1
+    assert read_ipc.call_args.args[0] == str(tmp_path / "A" / f"{Interval.MIN_1}.arrow")
+
+
+def test_symbols_with_slashes_stay_in_one_directory(tmp_path):
+    storage = CentralStorage(snapshot_path=str(tmp_path))
+    frame = generate_ticker_frame("BRK/B", Interval.MIN_1, 10)
+    storage.insert_price_history(frame)
+    storage.save_snapshot()
+
+    assert (tmp_path / "BRK%2FB" / f"{Interval.MIN_1}.arrow").is_file()
+    restored = CentralStorage(snapshot_path=str(tmp_path))
+    assert_frame_equal(restored.get_price_history("BRK/B", Interval.MIN_1).df, frame.df)
+
+
+def test_snapshot_writes_only_changed_series(tmp_path):
+    storage = CentralStorage(snapshot_path=str(tmp_path), snapshot_period=3600)
+    storage.insert_price_history(generate_ticker_frame("A", Interval.MIN_1, 10))
+    storage.insert_price_history(generate_ticker_frame("B", Interval.MIN_1, 10))
+    assert storage.save_snapshot() == 2
+
+    storage.insert_price_history(generate_ticker_frame("A", Interval.MIN_1, 1, start=dt.datetime(1970, 1, 1, 0, 10)))
+    assert storage.save_snapshot() == 1
+    assert storage.save_snapshot() == 0
+
+    # Not due yet
+    storage.insert_price_history(generate_ticker_frame("A", Interval.MIN_1, 1, start=dt.datetime(1970, 1, 1, 0, 11)))
+    storage.save_snapshot_if_due()
+    assert storage._snapshot_dirty
+
+
+def test_insert_during_a_save_is_kept_for_the_next_one(tmp_path):
+    # A database file, since each thread gets its own in-memory database
+    storage = CentralStorage(db_path=f"sqlite:///{tmp_path / 'central.db'}", snapshot_path=str(tmp_path / "snapshot"))
+    storage.insert_price_history(generate_ticker_frame("A", Interval.MIN_1, 10))
+    write = storage.snapshot.write
+    inserts = []
+
+    def write_while_inserting(symbol, interval, frame):
+        # Another thread inserts a row while the snapshot is being written
+        thread = threading.Thread(
+            target=storage.insert_price_history,
+            args=(generate_ticker_frame("A", Interval.MIN_1, 1, start=dt.datetime(1970, 1, 1, 0, 10)),),
+        )
+        thread.start()
+        thread.join(0.2)
+        inserts.append((thread, thread.is_alive()))
+        write(symbol, interval, frame)
+
+    storage.snapshot.write = write_while_inserting
+    assert storage.save_snapshot() == 1
+    thread, blocked = inserts[0]
+    thread.join()
+
+    # The inserting thread waited for the save, then marked the series for the next one
+    assert blocked
+    assert storage._snapshot_dirty == {("A", Interval.MIN_1)}
+    storage.snapshot.write = write
+    storage.close()
+    restored = CentralStorage(snapshot_path=str(tmp_path / "snapshot"))
+    assert restored.get_price_history("A", Interval.MIN_1).df.height == 11
+
+
+def test_snapshot_skips_expired_rows(tmp_path):
+    storage = CentralStorage(
+        snapshot_path=str(tmp_path),
+        price_storage_limit={Interval.MIN_1: TimeDelta(TimeSpan.MINUTE, 10)},
+    )
+    frame = generate_ticker_frame("A", Interval.MIN_1, 30)
+    storage.insert_price_history(frame)
+    storage.close()
+
+    restored = CentralStorage(snapshot_path=str(tmp_path))
+    assert_frame_equal(restored.get_price_history("A", Interval.MIN_1).df, frame.df.tail(10))
+
+
+def count_rows(storage: CentralStorage) -> int:
+    with storage.db_engine.connect() as connection:
+        return connection.execute(sqlalchemy.select(sqlalchemy.func.count()).select_from(PriceHistory)).scalar()
+
+
+def test_snapshot_is_written_to_database_on_demand(tmp_path):
+    """
+    Restored series should be served from the price cache, and only written to the
+    database once new rows of the series are inserted.
+    """
+    storage = CentralStorage(snapshot_path=str(tmp_path))
+    frame = generate_ticker_frame("A", Interval.MIN_1, 10)
+    storage.insert_price_history(frame)
+    storage.close()
+
+    restored = CentralStorage(snapshot_path=str(tmp_path))
+    assert_frame_equal(restored.get_price_history("A", Interval.MIN_1).df, frame.df)
+    assert_frame_equal(restored.get_price_history_many(["A"], Interval.MIN_1).df, frame.df)
+    assert restored.get_latest_price_timestamp("A", Interval.MIN_1) == frame.df["timestamp"][-1]
+    assert count_rows(restored) == 0
+
+    update = generate_ticker_frame("A", Interval.MIN_1, 2, start=dt.datetime(1970, 1, 1, 0, 9))
+    restored.insert_price_history(update)
+    assert count_rows(restored) == 11
+    assert restored.get_latest_price_timestamp("A", Interval.MIN_1) == update.df["timestamp"][-1]
+
+
+def test_snapshot_without_price_cache(tmp_path):
+    storage = CentralStorage(snapshot_path=str(tmp_path))
+    frame = generate_ticker_frame("A", Interval.MIN_1, 10)
+    storage.insert_price_history(frame)
+    storage.close()
+
+    restored = CentralStorage(snapshot_path=str(tmp_path), enable_price_cache=False)
+    assert count_rows(restored) == 10
+    assert_frame_equal(restored.get_price_history("A", Interval.MIN_1).df, frame.df)